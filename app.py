@@ -24,6 +24,7 @@ from src.gui.components.folder_picker import FolderSelector
 from src.gui.components.file_review import FileReview
 from src.gui.components.timeline import ActivityTimeline
 from src.gui.components.log_export import LogExport
+from src.gui.components.performance import PerformancePanel
 
 # Initialize the session state at the beginning
 init_session_state()
@@ -59,7 +60,8 @@ class App:
         with st.sidebar:
             st.header("Navigation")
             page = st.selectbox("Select Page", [
-                "Folder Monitor", "File Review", "Activity Timeline", "Export Logs", "Settings"
+                "Folder Monitor", "File Review", "Activity Timeline", "Export Logs", "Performance",
+                "Settings"
             ])
 
             self.display_api_key_status()
@@ -81,9 +83,14 @@ class App:
         """
         Displays the folder monitoring status and control button.
         """
-        if st.session_state.get('monitoring_active', False):
-            st.success(f"📁 Monitoring: {st.session_state.get('selected_folder', 'N/A')}")
+        service = st.session_state.get('monitoring_service')
+        roots = [r for r in service.roots() if r.on_ready is None] if service else []
+        if roots:
+            st.success(f"📁 Monitoring {len(roots)} folder(s)")
+            for root in roots:
+                st.caption(root.path)
             if st.button("Stop Monitoring"):
+                service.stop()
                 st.session_state.monitoring_active = False
                 st.rerun()
         else:
@@ -98,6 +105,7 @@ class App:
             "File Review": FileReview(self.db_manager).render,
             "Activity Timeline": ActivityTimeline(self.db_manager).render,
             "Export Logs": LogExport(self.db_manager).render,
+            "Performance": PerformancePanel().render,
             "Settings": self.render_settings_page,
         }
         
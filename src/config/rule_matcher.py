@@ -0,0 +1,127 @@
+# src/config/rule_matcher.py
+"""
+folder_rules.json compiled for one-pass classification.
+
+Every keyword of every drive/subfolder goes into a single lookup table
+keyed by its token sequence, so classifying a text is one scan over its
+words: each word (and the short phrases starting at it) is looked up
+once, whatever the number of rules. Keywords shared by several
+subfolders count for less in each of them.
+
+Subfolders with `year_required` only score fully when the text carries
+a year; without one they drop down the ranking and are flagged, so the
+caller can fall back to the "0000" (unknown year) tag.
+
+    from src.config.rule_matcher import get_matcher
+    best = get_matcher().classify(text)[0]
+"""
+
+import hashlib
+import json
+import math
+import re
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_YEAR_RE = re.compile(r"\b(19[5-9]\d|20\d{2})\b")
+YEAR_MISSING_PENALTY = 0.5
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def rules_hash(rules: dict) -> str:
+    return hashlib.sha256(json.dumps(rules, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def find_year(text: str) -> Optional[str]:
+    this_year = date.today().year
+    for m in _YEAR_RE.finditer(text):
+        if int(m.group(1)) <= this_year:
+            return m.group(1)
+    return None
+
+
+@dataclass(frozen=True)
+class Candidate:
+    drive: str
+    subfolder: str
+    score: float
+    hits: Tuple[Tuple[str, int], ...]   # (keyword, count), most frequent first
+    year_required: bool
+    year: Optional[str]
+
+    @property
+    def missing_year(self) -> bool:
+        return self.year_required and self.year is None
+
+
+class RuleMatcher:
+    """Immutable compiled form of one version of folder_rules.json."""
+
+    def __init__(self, rules: dict):
+        self.hash = rules_hash(rules)
+        self.folders: Dict[str, Tuple[str, bool]] = {}          # subfolder → (drive, year_required)
+        owners: Dict[Tuple[str, ...], List[str]] = {}
+        for drive_code, drive in rules.get("drives", {}).items():
+            for code, cfg in drive.get("subfolders", {}).items():
+                self.folders[code] = (drive_code, bool(cfg.get("year_required")))
+                for kw in cfg.get("keywords", []):
+                    tokens = tuple(tokenize(kw))
+                    if tokens and code not in owners.setdefault(tokens, []):
+                        owners[tokens].append(code)
+        # phrase → ((subfolder, weight), ...); shared keywords are worth less
+        self.table: Dict[Tuple[str, ...], Tuple[Tuple[str, float], ...]] = {
+            tokens: tuple((code, 1.0 / len(codes)) for code in codes)
+            for tokens, codes in owners.items()
+        }
+        self.max_phrase = max((len(t) for t in self.table), default=1)
+
+    def scan(self, text: str) -> Dict[Tuple[str, ...], int]:
+        """Count every keyword occurrence in `text` in a single pass."""
+        words = tokenize(text)
+        table, longest = self.table, self.max_phrase
+        counts: Dict[Tuple[str, ...], int] = {}
+        for i in range(len(words)):
+            for n in range(1, min(longest, len(words) - i) + 1):
+                phrase = tuple(words[i:i + n])
+                if phrase in table:
+                    counts[phrase] = counts.get(phrase, 0) + 1
+        return counts
+
+    def classify(self, text: str, year: Optional[str] = None, limit: int = 5) -> List[Candidate]:
+        """
+        Scored subfolder candidates for `text`, best first. `year` overrides
+        the year found in the text (e.g. a date the caller already parsed).
+        """
+        counts = self.scan(text)
+        if not counts:
+            return []
+        year = year or find_year(text)
+        scores: Dict[str, float] = {}
+        hits: Dict[str, List[Tuple[str, int]]] = {}
+        for phrase, n in counts.items():
+            for code, weight in self.table[phrase]:
+                # repeats help, with diminishing returns
+                scores[code] = scores.get(code, 0.0) + weight * (1 + math.log(n))
+                hits.setdefault(code, []).append((" ".join(phrase), n))
+
+        out = []
+        for code, score in scores.items():
+            drive, year_required = self.folders[code]
+            if year_required and year is None:
+                score *= YEAR_MISSING_PENALTY
+            out.append(Candidate(drive, code, round(score, 4),
+                                 tuple(sorted(hits[code], key=lambda h: -h[1])),
+                                 year_required, year))
+        out.sort(key=lambda c: -c.score)
+        return out[:limit]
+
+
+def get_matcher() -> RuleMatcher:
+    """Matcher of the live rules snapshot (see config.rules; rebuilt only on reload)."""
+    from src.config.rules import current_rules
+    return current_rules().matcher
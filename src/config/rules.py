@@ -1,8 +1,27 @@
 # src/config/rules.py
+"""
+folder_rules.json, served as immutable, versioned snapshots.
+
+current_rules() returns the live RulesSnapshot: the parsed rules (frozen,
+read-only) plus their compiled RuleMatcher. A reload parses, validates
+and compiles the new file on the watcher's thread, then swaps the module
+reference in one assignment, so a reader sees either the old snapshot or
+the new one, never a mix. Code that holds a snapshot keeps using it until
+it asks again. Invalid or unchanged files leave the current snapshot in place.
+
+Reloads are debounced: the monitoring service only reports the file once
+editor saves have settled.
+"""
+
 import json
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+from types import MappingProxyType
+from typing import Callable, List, Mapping, Optional
+
+from src.config.rule_matcher import RuleMatcher, rules_hash
 
 _RULES_PATH = Path(__file__).parent / "folder_rules.json"
 
@@ -10,19 +29,116 @@ def load_rules():
     """Read the JSON config (folder_rules.json)."""
     return json.loads(_RULES_PATH.read_text(encoding="utf-8"))
 
-# Optional hot-reload
-class _ReloadHandler(FileSystemEventHandler):
-    def __init__(self, callback): self.callback = callback
-    def on_modified(self, event):
-        if Path(event.src_path) == _RULES_PATH:
-            self.callback(load_rules())
-
-_rules_cache = load_rules()
-
-def watch_rules(on_change):
-    """Call on_change(new_rules) when the file updates."""
-    handler = _ReloadHandler(on_change)
-    obs = Observer()
-    obs.schedule(handler, _RULES_PATH.parent, recursive=False)
-    obs.start()
-    return obs  # keep reference if you want to stop()
+
+@dataclass(frozen=True)
+class RulesSnapshot:
+    version: int
+    hash: str
+    rules: Mapping           # read-only view of the parsed JSON
+    matcher: RuleMatcher
+    loaded_at: float
+
+
+def validate_rules(rules) -> None:
+    """Raise ValueError if `rules` isn't shaped like folder_rules.json."""
+    if not isinstance(rules, dict) or not isinstance(rules.get("drives"), dict):
+        raise ValueError("rules need a 'drives' object")
+    for drive_code, drive in rules["drives"].items():
+        subfolders = drive.get("subfolders") if isinstance(drive, dict) else None
+        if not isinstance(subfolders, dict):
+            raise ValueError(f"drive {drive_code!r} needs a 'subfolders' object")
+        for code, cfg in subfolders.items():
+            if not isinstance(cfg, dict):
+                raise ValueError(f"subfolder {code!r} must be an object")
+            keywords = cfg.get("keywords", [])
+            if not isinstance(keywords, list) or not all(isinstance(k, str) for k in keywords):
+                raise ValueError(f"subfolder {code!r}: 'keywords' must be a list of strings")
+            if not isinstance(cfg.get("year_required", False), bool):
+                raise ValueError(f"subfolder {code!r}: 'year_required' must be true/false")
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _compile(rules: dict, version: int) -> RulesSnapshot:
+    validate_rules(rules)
+    return RulesSnapshot(version, rules_hash(rules), _freeze(rules), RuleMatcher(rules), time.time())
+
+
+_current: Optional[RulesSnapshot] = None
+_reload_lock = threading.Lock()
+_subscribers: List[Callable[[RulesSnapshot], None]] = []
+_watch = None
+
+
+def current_rules() -> RulesSnapshot:
+    """The live snapshot. Hold on to it for the length of one classification."""
+    snapshot = _current
+    if snapshot is None:
+        with _reload_lock:
+            if _current is None:
+                _swap(_compile(load_rules(), 1))
+            snapshot = _current
+    return snapshot
+
+
+def _swap(snapshot: RulesSnapshot) -> None:
+    global _current
+    _current = snapshot  # a single reference assignment: readers never see a partial update
+
+
+def reload_rules() -> RulesSnapshot:
+    """
+    Re-read folder_rules.json and swap in a new snapshot if its content
+    changed and validates; otherwise keep (and return) the current one.
+    """
+    with _reload_lock:
+        old = _current
+        try:
+            rules = load_rules()
+            if old is not None and rules_hash(rules) == old.hash:
+                return old
+            new = _compile(rules, (old.version + 1) if old else 1)
+        except (OSError, ValueError) as e:  # json.JSONDecodeError is a ValueError
+            print(f"⚠️ Keeping rules v{old.version if old else 0}: {e}")
+            if old is None:
+                raise
+            return old
+        _swap(new)
+        subscribers = list(_subscribers)
+    print(f"🔁 Rules v{new.version} loaded ({len(new.matcher.folders)} subfolders)")
+    for fn in subscribers:
+        try:
+            fn(new)
+        except Exception as e:
+            print(f"⚠️ Rules subscriber failed: {e}")
+    return new
+
+
+def watch_rules(on_change: Optional[Callable[[RulesSnapshot], None]] = None):
+    """
+    Reload folder_rules.json whenever it is saved (once the save has
+    settled) and call on_change(new_snapshot) after each swap.
+    """
+    global _watch
+    current_rules()
+    with _reload_lock:
+        if on_change is not None:
+            _subscribers.append(on_change)
+        # MonitoringService.stop() keeps callback roots, but a remove_root() may still drop it
+        if _watch is not None and _watch.service.get_root(_watch.path) is _watch:
+            return _watch
+        # shares the app's observer instead of starting one of its own
+        from src.monitor.monitoring_service import RootRules, get_service
+        _watch = get_service().add_root(
+            str(_RULES_PATH.parent),
+            rules=RootRules(include=(_RULES_PATH.name,)),
+            recursive=False,
+            on_ready=lambda _path: reload_rules(),
+        )
+        return _watch  # keep reference if you want to stop()
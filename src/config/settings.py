@@ -1,15 +1,21 @@
 # src/config/settings.py
 from .env    import get_env, update_env
-from .rules  import load_rules, watch_rules
+from .rules  import current_rules, load_rules, reload_rules, watch_rules
 
 # Single import point for your app:
 ENV     = get_env()
-RULES   = load_rules()
+RULES   = load_rules()   # startup copy; live code should read current_rules()
 
 # Example usage:
 #   from src.config.settings import ENV, RULES
 #   print(ENV["OPENAI_API_KEY"])
 #   print(RULES["drives"]["F"]["subfolders"].keys())
 
-# If you want live-reload in your app startup:
-# observer = watch_rules(lambda new: globals().update(RULES=new))
+# If you want live-reload in your app startup, don't patch globals (readers
+# could see a half-updated dict). Start the watcher once and ask for the
+# current snapshot where you use it; a snapshot never changes, so keep it
+# for the whole of one classification:
+#   watch_rules()                    # or watch_rules(lambda snap: print(snap.version))
+#   snap = current_rules()
+#   snap.rules["drives"]["F"]["subfolders"].keys()
+#   snap.matcher.classify(text)
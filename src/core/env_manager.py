@@ -1,8 +1,12 @@
 # TODO
+import os
 import streamlit as st
 from src.memory.vector_store import VectorStorage
 from src.memory.embedder import ContextMemory
 from src.fileflow.rename_rules import DatabaseManager
+from src.core.metrics import get_flusher, get_metrics_server
+from src.monitor.monitoring_service import get_service
+from src.fileflow.folder_centroids import get_centroids
 
 def init_session_state():
     if 'db_manager' not in st.session_state:
@@ -14,6 +18,20 @@ def init_session_state():
     if 'context_memory' not in st.session_state:
         st.session_state.context_memory = ContextMemory(st.session_state.db_manager)
 
+    if 'metrics_flusher' not in st.session_state:
+        st.session_state.metrics_flusher = get_flusher()  # one per process, not per session
+        if os.getenv("QILIFE_METRICS_PORT"):
+            get_metrics_server(int(os.getenv("QILIFE_METRICS_PORT")))
+
+    if 'monitoring_service' not in st.session_state:
+        service = get_service()
+        # pipeline files are embedded once for folder routing and review learning
+        service.pipeline_options.setdefault("centroids", get_centroids())
+        service.attach_stores(st.session_state.db_manager,
+                              st.session_state.context_memory,
+                              st.session_state.vector_storage)
+        st.session_state.monitoring_service = service.start()  # resumes queued jobs
+
     if 'file_monitor' not in st.session_state:
         st.session_state.file_monitor = None
 
@@ -0,0 +1,345 @@
+"""
+src/core/metrics.py
+
+In-process metrics for the ingest path.
+
+A single `REGISTRY` holds counters, gauges and fixed-bucket latency
+histograms keyed by name + labels. Updates are a dict lookup and a few
+additions under one lock, cheap enough for every file and every stage.
+`MetricsFlusher` snapshots the registry into SQLite every few seconds for
+the performance panel, and `to_prometheus()` renders the text exposition
+format for scraping or export.
+
+    from src.core.metrics import REGISTRY
+    with REGISTRY.timer("qilife_stage_seconds", stage="extract"):
+        ...
+"""
+
+import bisect
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+DB_PATH = Path(__file__).parents[2] / "qilife_db.sqlite"
+
+# seconds; covers a fast text file up to a long transcription
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Estimate from the buckets, interpolating linearly inside one."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lo = self.buckets[i - 1] if i > 0 else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lo + (hi - lo) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """Thread-safe store of counters, gauges and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Callable[["MetricsRegistry"], None]] = []
+
+    def describe(self, name: str, text: str) -> None:
+        self._help[name] = text
+
+    def inc(self, name: str, amount: float = 1.0, **labels) -> None:
+        key = _key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self._gauges.setdefault(name, {})[_key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = Histogram()
+            hist.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def add_collector(self, fn: Callable[["MetricsRegistry"], None]) -> None:
+        """`fn(registry)` runs before every snapshot/export, e.g. to set queue-depth gauges."""
+        with self._lock:
+            self._collectors.append(fn)
+
+    def remove_collector(self, fn: Callable[["MetricsRegistry"], None]) -> None:
+        with self._lock:
+            if fn in self._collectors:
+                self._collectors.remove(fn)
+
+    def _collect(self) -> None:
+        with self._lock:
+            collectors = list(self._collectors)
+        for fn in collectors:
+            try:
+                fn(self)
+            except Exception as e:
+                print(f"⚠️ Metrics collector failed: {e}")
+
+    def snapshot(self) -> List[dict]:
+        """Flat list of series: {name, kind, labels, value[, count, sum, p50, p95, buckets]}."""
+        self._collect()
+        out = []
+        with self._lock:
+            for kind, store in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in store.items():
+                    for key, value in series.items():
+                        out.append({"name": name, "kind": kind, "labels": dict(key),
+                                    "value": value})
+            for name, series in self._histograms.items():
+                for key, h in series.items():
+                    out.append({
+                        "name": name, "kind": "histogram", "labels": dict(key),
+                        "value": h.sum / h.count if h.count else 0.0,
+                        "count": h.count, "sum": h.sum,
+                        "p50": h.quantile(0.5), "p95": h.quantile(0.95),
+                        "buckets": list(zip(h.buckets, h.counts)),
+                    })
+        return out
+
+    def to_prometheus(self) -> str:
+        """Render the Prometheus text exposition format (version 0.0.4)."""
+        def fmt(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            pairs = key + extra
+            if not pairs:
+                return ""
+            body = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"'))
+                            for k, v in pairs)
+            return "{" + body + "}"
+
+        self._collect()
+        lines = []
+        with self._lock:
+            for kind, store in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(store.items()):
+                    if name in self._help:
+                        lines.append(f"# HELP {name} {self._help[name]}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for key, value in series.items():
+                        lines.append(f"{name}{fmt(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, h in series.items():
+                    cumulative = 0
+                    for bound, n in zip(h.buckets, h.counts):
+                        cumulative += n
+                        lines.append(f"{name}_bucket{fmt(key, (('le', str(bound)),))} {cumulative}")
+                    lines.append(f"{name}_bucket{fmt(key, (('le', '+Inf'),))} {h.count}")
+                    lines.append(f"{name}_sum{fmt(key)} {h.sum}")
+                    lines.append(f"{name}_count{fmt(key)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+
+REGISTRY = MetricsRegistry()
+REGISTRY.describe("qilife_stage_seconds", "Time spent per file in each pipeline stage")
+REGISTRY.describe("qilife_stage_processed_total", "Files completed per pipeline stage")
+REGISTRY.describe("qilife_stage_errors_total", "Files failed per pipeline stage")
+REGISTRY.describe("qilife_stage_queue_depth", "Files waiting in front of each stage")
+REGISTRY.describe("qilife_extract_seconds", "Text extraction time by content kind")
+REGISTRY.describe("qilife_llm_seconds", "Chat completion latency by model")
+REGISTRY.describe("qilife_llm_wait_seconds", "Time callers queued in the rate limiter before a request was sent")
+REGISTRY.describe("qilife_llm_requests_total", "Chat requests admitted by the rate limiter")
+REGISTRY.describe("qilife_llm_tokens_total", "Tokens reported by the API (prompt + completion)")
+REGISTRY.describe("qilife_llm_throttled_total", "429 responses despite client-side limiting")
+REGISTRY.describe("qilife_llm_cost_usd_today", "Estimated LLM spend since midnight")
+REGISTRY.describe("qilife_jobs", "Durable job queue rows by state")
+
+
+class MetricsFlusher:
+    """Background thread that appends registry snapshots to `metrics_samples`."""
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY, db_path: Path = DB_PATH,
+                 interval: float = 15.0, retention_hours: float = 72.0):
+        self.registry = registry
+        self.db_path = str(db_path)
+        self.interval = interval
+        self.retention_hours = retention_hours
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS metrics_samples (
+                    ts     REAL NOT NULL,
+                    name   TEXT NOT NULL,
+                    kind   TEXT NOT NULL,
+                    labels TEXT NOT NULL,
+                    value  REAL NOT NULL,
+                    count  INTEGER,
+                    sum    REAL,
+                    p50    REAL,
+                    p95    REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_metrics_name_ts ON metrics_samples (name, ts);
+                """
+            )
+
+    def flush(self) -> int:
+        now = time.time()
+        rows = [
+            (now, s["name"], s["kind"], json.dumps(s["labels"], sort_keys=True), s["value"],
+             s.get("count"), s.get("sum"), s.get("p50"), s.get("p95"))
+            for s in self.registry.snapshot()
+        ]
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            conn.executemany(
+                "INSERT INTO metrics_samples (ts, name, kind, labels, value, count, sum, p50, p95) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("DELETE FROM metrics_samples WHERE ts < ?",
+                         (now - self.retention_hours * 3600,))
+        return len(rows)
+
+    def start(self) -> "MetricsFlusher":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="metrics-flusher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Metrics flush failed: {e}")
+
+
+_flusher: Optional[MetricsFlusher] = None
+_flusher_lock = threading.Lock()
+
+
+def get_flusher() -> MetricsFlusher:
+    """The process's running flusher; Streamlit sessions share it instead of each starting one."""
+    global _flusher
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = MetricsFlusher().start()
+        return _flusher
+
+
+def start_metrics_server(port: int, registry: MetricsRegistry = REGISTRY,
+                         host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve `GET /metrics` in Prometheus text format from a daemon thread."""
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # keep scrapes out of the console
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"📈 Metrics at http://{host}:{port}/metrics")
+    return server
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_started = False
+_server_lock = threading.Lock()
+
+
+def get_metrics_server(port: int) -> Optional[ThreadingHTTPServer]:
+    """
+    start_metrics_server() once per process. A port that is already taken
+    (another app instance) is logged and leaves the app running without
+    an endpoint; returns None then.
+    """
+    global _server, _server_started
+    with _server_lock:
+        if not _server_started:
+            _server_started = True
+            try:
+                _server = start_metrics_server(port)
+            except OSError as e:
+                print(f"⚠️ Metrics endpoint disabled, port {port} unavailable: {e}")
+        return _server
+
+
+def load_history(name: str, since_seconds: float = 3600.0,
+                 db_path: Path = DB_PATH) -> List[dict]:
+    """Flushed samples of `name` from the last `since_seconds`, oldest first."""
+    try:
+        with sqlite3.connect(str(db_path)) as conn:
+            rows = conn.execute(
+                "SELECT ts, labels, value, count, p50, p95 FROM metrics_samples "
+                "WHERE name = ? AND ts >= ? ORDER BY ts",
+                (name, time.time() - since_seconds),
+            ).fetchall()
+    except sqlite3.OperationalError:
+        return []  # nothing flushed yet
+    return [{"ts": r[0], "labels": json.loads(r[1]), "value": r[2], "count": r[3],
+             "p50": r[4], "p95": r[5]} for r in rows]
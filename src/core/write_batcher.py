@@ -0,0 +1,172 @@
+"""
+src/core/write_batcher.py
+
+Group-commit writer for SQLite.
+
+Producers (pipeline stages, loggers, the vector store) hand rows to the
+batcher for their database file instead of committing one row at a time.
+A single writer thread per file collects them and commits every
+`max_rows` rows or `max_delay_ms` milliseconds, whichever comes first, in
+one transaction, so a backfill pays one fsync per batch instead of per row.
+
+`write(..., sync=True)` blocks until the row's batch has committed (and
+raises if it failed); the default returns immediately. Pending rows are
+flushed on `close()`, by `flush_all()` and at interpreter exit.
+
+    from src.core.write_batcher import get_batcher
+    get_batcher("qilife_db.sqlite").write("INSERT INTO t VALUES (?)", (1,))
+"""
+
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+MAX_ROWS = int(os.getenv("QILIFE_BATCH_ROWS", "500"))
+MAX_DELAY_MS = int(os.getenv("QILIFE_BATCH_MS", "200"))
+
+
+class _Write:
+    __slots__ = ("sql", "params", "done", "error")
+
+    def __init__(self, sql: str, params: Sequence, sync: bool):
+        self.sql = sql
+        self.params = params
+        self.done = threading.Event() if sync else None
+        self.error: Optional[BaseException] = None
+
+
+class WriteBatcher:
+    """Buffers INSERT/UPDATE/DELETE statements for one SQLite file and group-commits them."""
+
+    def __init__(self, db_path: str, max_rows: int = MAX_ROWS, max_delay_ms: int = MAX_DELAY_MS):
+        self.db_path = str(db_path)
+        self.max_rows = max_rows
+        self.max_delay = max_delay_ms / 1000.0
+        self._queue: "queue.Queue[Optional[_Write]]" = queue.Queue()
+        self._closed = False
+        self.batches = 0
+        self.rows = 0
+        self._thread = threading.Thread(target=self._run, name="write-batcher", daemon=True)
+        self._thread.start()
+
+    def write(self, sql: str, params: Sequence = (), sync: bool = False) -> None:
+        """Queue one statement; with sync=True wait until it is committed."""
+        if self._closed:
+            raise RuntimeError(f"write batcher for {self.db_path} is closed")
+        item = _Write(sql, params, sync)
+        self._queue.put(item)
+        if sync:
+            item.done.wait()
+            if item.error is not None:
+                raise item.error
+
+    def flush(self) -> None:
+        """Block until everything queued so far is committed."""
+        if self._closed or not self._thread.is_alive():
+            return
+        marker = _Write("", (), sync=True)
+        self._queue.put(marker)
+        marker.done.wait()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # WAL: fsync at checkpoints, still crash-safe
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            # a sync write or flush marker closes the batch so its caller isn't kept waiting
+            while len(batch) < self.max_rows and item.done is None:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._commit(conn, batch)
+        # drain anything queued behind the stop sentinel
+        rest: List[_Write] = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                rest.append(item)
+        if rest:
+            self._commit(conn, rest)
+        conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, batch: List[_Write]) -> None:
+        rows = [w for w in batch if w.sql]
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for w in rows:
+                conn.execute(w.sql, w.params)
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            # one bad row must not take the rest of the batch with it
+            for w in rows:
+                try:
+                    conn.execute(w.sql, w.params)
+                except sqlite3.Error as e:
+                    w.error = e
+                    if w.done is None:
+                        print(f"❌ Batched write failed ({self.db_path}): {e}")
+        self.batches += 1
+        self.rows += len(rows)
+        for w in batch:
+            if w.done is not None:
+                w.done.set()
+
+
+_batchers: Dict[str, WriteBatcher] = {}
+_lock = threading.Lock()
+
+
+def get_batcher(db_path: str) -> WriteBatcher:
+    """Shared batcher for `db_path` (one writer thread per database file)."""
+    key = os.path.abspath(str(db_path))
+    with _lock:
+        batcher = _batchers.get(key)
+        if batcher is None or batcher._closed:
+            batcher = _batchers[key] = WriteBatcher(key)
+        return batcher
+
+
+def flush_all() -> None:
+    with _lock:
+        batchers = list(_batchers.values())
+    for b in batchers:
+        b.flush()
+
+
+@atexit.register
+def close_all() -> None:
+    with _lock:
+        batchers = list(_batchers.values())
+        _batchers.clear()
+    for b in batchers:
+        b.close()
@@ -1,15 +1,21 @@
 #!/usr/bin/env python3
 # src/fileflow/file_renamer.py
 
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from rich import print
 
 from src.fileflow.content_extractor import extract_context
-from src.config.env import get_config
-from src.ai.chatgpt import ask_gpt  # we’ll define this shortly
+from src.qai.chatgpt import ask_gpt  # rate-limited via src.qai.rate_limiter
+from src.fileflow.rule_namer import THRESHOLD, RenameReport, suggest_name
+from src.qai.prompt_compactor import DEFAULT_BUDGET as PROMPT_TOKENS, compact_text
 
-def build_prompt(context: dict, metadata: dict) -> str:
-    text = context["text"][:3000]  # Snippet or preview
+def build_prompt(context: dict, metadata: dict, budget: int = PROMPT_TOKENS) -> str:
+    text = compact_text(context["text"], budget)  # most informative sentences, token-capped
     ext = metadata["extension"]
     return f"""
 You are a smart assistant. Based on this file's content and metadata, rename it using the following rules:
@@ -30,6 +36,184 @@ And metadata:
 {metadata}
 """
 
+# -- batch mode -------------------------------------------------------------
+
+BATCH_SIZE = 20
+BATCH_SNIPPET_TOKENS = 200  # per file; keeps a 20-file prompt well under the context
+MAX_ROUNDS = 3
+_NAME_RE = re.compile(r"^[a-z0-9]+(?:[_-][a-z0-9]+)*$")
+
+
+def validate_filename(name: str, extension: str) -> Optional[str]:
+    """Return why `name` is unusable, or None if it follows the naming rules."""
+    if not isinstance(name, str) or not name:
+        return "empty"
+    if "/" in name or "\\" in name:
+        return "contains a path separator"
+    if not name.lower().endswith(extension.lower()):
+        return f"extension is not {extension}"
+    stem = name[: len(name) - len(extension)] if extension else name
+    if len(stem) > 120:
+        return "too long"
+    if not _NAME_RE.match(stem):
+        return "disallowed characters"
+    return None
+
+
+def build_batch_prompt(items: List[Tuple[int, dict]]) -> str:
+    """One prompt for many files; the model answers with a JSON array keyed by id."""
+    blocks = []
+    for item_id, ctx in items:
+        meta = ctx["metadata"]
+        snippet = " ".join(compact_text(ctx["text"], BATCH_SNIPPET_TOKENS).split())
+        blocks.append(
+            f"### id={item_id}\n"
+            f"extension: {meta['extension']}\n"
+            f"created: {meta['created'][:10]}  modified: {meta['modified'][:10]}\n"
+            f"content: {snippet}"
+        )
+    files = "\n\n".join(blocks)
+    return f"""
+You are a smart assistant. Rename each file below using these rules:
+
+- Use format: [YYYYMMDD]_[summary_or_topic]_[source/author]<extension>
+- Be concise, lowercase, use underscores instead of spaces.
+- Do NOT include special characters.
+- Keep each file's own extension.
+- Use the creation or modification date if it makes sense.
+
+Answer with ONLY a JSON array, one object per file, e.g.
+[{{"id": 0, "filename": "20240712_legal_notice_zaitullah.pdf"}}]
+
+Files:
+
+{files}
+"""
+
+
+def parse_batch_response(text: str) -> Dict[int, str]:
+    """Pull {id: filename} out of the model's reply (tolerates code fences/prose)."""
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+    out = {}
+    for entry in data if isinstance(data, list) else []:
+        if isinstance(entry, dict) and "id" in entry:
+            try:
+                out[int(entry["id"])] = str(entry.get("filename", "")).strip()
+            except (TypeError, ValueError):
+                continue
+    return out
+
+
+def _ask_batch(items: List[Tuple[int, dict]], cache: bool = True) -> Dict[int, str]:
+    try:
+        return parse_batch_response(ask_gpt(build_batch_prompt(items), cache=cache))
+    except Exception as e:
+        print(f"[red]❌ Batch request failed:[/] {e}")
+        return {}
+
+
+def _try_extract_context(path: Path) -> Optional[dict]:
+    """extract_context(), or None (logged) if the file can't be read."""
+    try:
+        return extract_context(path)
+    except Exception as e:
+        print(f"[red]❌ Cannot read[/] {Path(path).name}: {type(e).__name__}: {e}")
+        return None
+
+
+def suggest_names_batch(paths: List[Path], batch_size: int = BATCH_SIZE,
+                        max_rounds: int = MAX_ROUNDS, workers: int = 4,
+                        threshold: float = THRESHOLD,
+                        report: Optional[RenameReport] = None) -> Dict[Path, Optional[str]]:
+    """
+    Suggest names for many files. The rule namer goes first; only files it
+    scores below `threshold` are sent to the LLM, one request per
+    `batch_size` files. Entries that are missing or fail validation are
+    retried (only those) for up to `max_rounds`; files still without a
+    valid name map to None, as do files that can't be read (the rest of
+    the batch carries on). Counts and LLM time go into `report`.
+    """
+    report = report if report is not None else RenameReport()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        contexts = list(pool.map(_try_extract_context, paths))
+
+    names: Dict[int, Optional[str]] = {i: None for i in range(len(paths))}
+    pending = []
+    taken = set()
+    unreadable = 0
+    for i, ctx in enumerate(contexts):
+        if ctx is None:
+            unreadable += 1
+            continue
+        guess = suggest_name(ctx)
+        if (guess.confidence >= threshold and guess.name not in taken
+                and validate_filename(guess.name, ctx["metadata"]["extension"]) is None):
+            names[i] = guess.name
+            taken.add(guess.name)
+        else:
+            pending.append(i)
+    report.rules += len(paths) - len(pending) - unreadable
+    report.failed += unreadable
+    llm_files = len(pending)
+
+    t0 = time.perf_counter()
+    for round_no in range(1, max_rounds + 1):
+        if not pending:
+            break
+        batches = [[(i, contexts[i]) for i in pending[k:k + batch_size]]
+                   for k in range(0, len(pending), batch_size)]
+        # requests run concurrently; the shared rate limiter paces them.
+        # Reruns over the same folder are answered from the response cache;
+        # retry rounds bypass it so a bad cached answer isn't replayed.
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            replies = list(pool.map(lambda b: _ask_batch(b, cache=round_no == 1), batches))
+
+        failed = []
+        for batch, reply in zip(batches, replies):
+            for i, ctx in batch:
+                name = reply.get(i, "")
+                problem = validate_filename(name, ctx["metadata"]["extension"])
+                if problem is None and name in taken:
+                    problem = "duplicate"
+                if problem:
+                    failed.append(i)
+                else:
+                    names[i] = name
+                    taken.add(name)
+        if failed:
+            print(f"[yellow]↻ Round {round_no}: {len(failed)} name(s) to retry[/]")
+        pending = failed
+
+    report.llm_seconds += time.perf_counter() - t0
+    report.llm += llm_files - len(pending)
+    report.failed += len(pending)
+    return {paths[i]: names[i] for i in names}
+
+
+def rename_batch(paths: List[Path], batch_size: int = BATCH_SIZE, dry_run: bool = False) -> int:
+    """Batch-suggest and apply names; returns how many files were renamed."""
+    renamed = 0
+    report = RenameReport()
+    for path, new_name in suggest_names_batch(paths, batch_size, report=report).items():
+        if new_name is None:
+            print(f"[red]❌ No valid filename for[/] {path.name}")
+        elif new_name != path.name and not path.with_name(new_name).exists():
+            if dry_run:
+                print(f"{path.name} → {new_name}")
+            else:
+                rename_file(path, new_name)
+            renamed += 1
+    report.publish()
+    print(f"📊 {report.summary()}")
+    return renamed
+
+
 def rename_file(path: Path, new_name: str):
     new_path = path.with_name(new_name)
     path.rename(new_path)
@@ -39,8 +223,19 @@ def main(file_path: Path):
     print(f"\n📄 [bold]Processing:[/] {file_path.name}")
 
     ctx = extract_context(file_path)
-    prompt = build_prompt(ctx, ctx["metadata"])
-    new_name = ask_gpt(prompt).strip()
+    report = RenameReport()
+    guess = suggest_name(ctx)
+    if guess.confidence >= THRESHOLD and validate_filename(guess.name, ctx["metadata"]["extension"]) is None:
+        print(f"📐 Named by rules (confidence {guess.confidence:.2f})")
+        new_name = guess.name
+        report.rules += 1
+    else:
+        prompt = build_prompt(ctx, ctx["metadata"])
+        t0 = time.perf_counter()
+        new_name = ask_gpt(prompt, cache=True).strip()
+        report.llm_seconds += time.perf_counter() - t0
+        report.llm += 1
+    report.publish()
 
     if not new_name or not new_name.endswith(ctx["metadata"]["extension"]):
         print("[red]❌ GPT did not return a valid filename[/]")
@@ -51,7 +246,7 @@ def main(file_path: Path):
 if __name__ == "__main__":
     import sys
     if len(sys.argv) != 2:
-        print("Usage: file_renamer.py path/to/file")
+        print("Usage: file_renamer.py path/to/file_or_folder")
         sys.exit(1)
 
     path = Path(sys.argv[1])
@@ -59,4 +254,8 @@ if __name__ == "__main__":
         print(f"[red]❌ File not found:[/] {path}")
         sys.exit(1)
 
-    main(path)
+    if path.is_dir():
+        files = sorted(p for p in path.iterdir() if p.is_file() and not p.name.startswith("."))
+        print(f"✅ Renamed {rename_batch(files)} of {len(files)} files")
+    else:
+        main(path)
@@ -3,23 +3,38 @@
 
 import sys
 import os
-import subprocess
+import io
+import csv
 from pathlib import Path
 from datetime import datetime
 
 # Text extraction
-import pytesseract            # pip install pytesseract
-from PIL import Image         # pip install Pillow
 import pdfplumber             # pip install pdfplumber
 import docx                   # pip install python-docx
 from pptx import Presentation # pip install python-pptx
 import pandas as pd           # pip install pandas
+import openpyxl               # pip install openpyxl
+try:
+    import xlrd               # pip install xlrd (legacy .xls only)
+except ImportError:
+    xlrd = None
 
-# Audio/video transcription (lazy OpenAI client)
-from openai import OpenAI     # pip install openai
+# Magic-byte routing
+from src.tools.utils.file_sniffer import effective_suffix
+
+# Image OCR (downsample + binarize, batched tesseract)
+from src.fileflow.image_ocr import IMAGE_EXTS, ocr_image
+
+# Audio/video transcription (pluggable engine, lazy OpenAI client)
+from src.fileflow.transcriber import transcribe_media
+
+# Spreadsheet caps (override via env for very large ledgers)
+SHEET_MAX_ROWS = int(os.getenv("QILIFE_SHEET_MAX_ROWS", "5000"))     # per sheet
+SHEET_MAX_CELLS = int(os.getenv("QILIFE_SHEET_MAX_CELLS", "200000")) # per file
 
 def extract_text(path: Path) -> str:
-    suffix = path.suffix.lower()
+    # route on content (magic bytes), not just the filename
+    suffix = effective_suffix(path)
 
     # 1. Plain text & code
     if suffix in {".txt", ".md", ".py", ".js", ".java", ".html", ".css", ".json", ".xml", ".eml", ".mhtml"}:
@@ -48,21 +63,13 @@ def extract_text(path: Path) -> str:
                     texts.append(shape.text)
         return "\n".join(texts)
 
-    # 5. Spreadsheets (.xls/.xlsx/.csv)
-    if suffix in {".xls", ".xlsx"}:
-        try:
-            df = pd.read_excel(path, engine="openpyxl")
-        except Exception:
-            df = pd.read_csv(path)
-        return df.to_csv(index=False)
-    if suffix == ".csv":
-        df = pd.read_csv(path)
-        return df.to_csv(index=False)
+    # 5. Spreadsheets (.xls/.xlsx/.csv) – streamed, every sheet
+    if suffix in {".xls", ".xlsx", ".csv"}:
+        return _extract_spreadsheet(path)
 
-    # 6. Images → OCR
-    if suffix in {".png", ".jpg", ".jpeg", ".tiff", ".bmp", ".gif"}:
-        img = Image.open(path)
-        return pytesseract.image_to_string(img)
+    # 6. Images → OCR (preprocessed; one file here, ocr_images() batches folders)
+    if suffix in IMAGE_EXTS:
+        return ocr_image(path)
 
     # 7. Audio → Whisper
     if suffix in {".wav", ".mp3", ".m4a", ".flac"}:
@@ -75,29 +82,72 @@ def extract_text(path: Path) -> str:
     # 9. Fallback → nothing
     return ""
 
-def _transcribe_audio(path: Path, is_video: bool = False) -> str:
+def _extract_spreadsheet(path: Path,
+                         max_rows: int = SHEET_MAX_ROWS,
+                         max_cells: int = SHEET_MAX_CELLS) -> str:
     """
-    Uses ffmpeg to convert/extract audio and Whisper for transcription.
-    Requires OPENAI_API_KEY in environment.
+    Streams every sheet row by row into CSV text, stopping at `max_rows`
+    per sheet and `max_cells` for the whole file.
     """
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        print("[yellow]⚠️ OPENAI_API_KEY not set – skipping transcription[/]")
+    suffix = effective_suffix(path)
+    wb = None
+    if suffix == ".csv":
+        sheets = [(None, _iter_csv_rows(path))]
+    elif suffix == ".xlsx":
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        sheets = [(ws.title, ws.iter_rows(values_only=True)) for ws in wb.worksheets]
+    elif xlrd is None:
+        # unsupported, like any unknown type: an ImportError would only be retried
+        print(f"⚠️ Skipping {path.name}: reading .xls needs xlrd (pip install xlrd)")
         return ""
+    else:
+        # legacy .xls isn't readable by openpyxl; pandas/xlrd with a row cap
+        frames = pd.read_excel(path, sheet_name=None, header=None, nrows=max_rows)
+        sheets = [(name, df.itertuples(index=False, name=None)) for name, df in frames.items()]
+
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    cells = 0
+    try:
+        for title, rows in sheets:
+            if cells >= max_cells:
+                break
+            if title is not None:
+                buf.write(f"## Sheet: {title}\n")
+            for i, row in enumerate(rows):
+                if i >= max_rows:
+                    buf.write(f"… truncated after {max_rows} rows\n")
+                    break
+                # `v != v` catches NaN padding from the pandas (.xls) path
+                values = ["" if v is None or v != v else str(v) for v in row]
+                while values and values[-1] == "":
+                    values.pop()
+                if not values:
+                    continue
+                values = values[:max_cells - cells]
+                writer.writerow(values)
+                cells += len(values)
+                if cells >= max_cells:
+                    buf.write(f"… truncated after {max_cells} cells\n")
+                    break
+    finally:
+        if wb is not None:
+            wb.close()
+    return buf.getvalue()
+
+def _iter_csv_rows(path: Path, chunk_size: int = 1 << 16):
+    """Yields CSV rows while reading the file in fixed-size chunks."""
+    with open(path, "r", encoding="utf-8-sig", errors="ignore", newline="",
+              buffering=chunk_size) as f:
+        yield from csv.reader(f)
 
-    # prepare wav
-    wav = path.with_suffix(".wav")
-    cmd = ["ffmpeg", "-y", "-i", str(path)]
-    if is_video:
-        cmd += ["-vn"]
-    cmd += ["-ar", "16000", "-ac", "1", str(wav)]
-    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-    # lazy-init client
-    client = OpenAI(api_key=api_key)
-    with open(wav, "rb") as f:
-        resp = client.audio.transcriptions.create(model="whisper-1", file=f)
-    return resp.text
+def _transcribe_audio(path: Path, is_video: bool = False) -> str:
+    """
+    Segments the audio with ffmpeg (in a temp dir) and transcribes the
+    segments concurrently. Engine comes from QILIFE_TRANSCRIBER (default
+    Whisper, which requires OPENAI_API_KEY in environment).
+    """
+    return transcribe_media(path, is_video=is_video)
 
 def extract_metadata(path: Path) -> dict:
     stat = path.stat()
@@ -109,14 +159,21 @@ def extract_metadata(path: Path) -> dict:
         "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
     }
 
-def extract_context(path: Path) -> dict:
+def extract_context(path: Path, guarded: bool = False) -> dict:
     """
     Returns:
       - 'text': extracted text or transcript
       - 'metadata': file metadata
+    With guarded=True extraction runs in a time/memory-limited worker
+    (see extract_guard) and a breach raises ExtractionLimitError.
     """
+    if guarded:
+        from src.fileflow.extract_guard import extract_text_limited
+        text = extract_text_limited(path)
+    else:
+        text = extract_text(path)
     return {
-        "text": extract_text(path),
+        "text": text,
         "metadata": extract_metadata(path)
     }
 
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# src/fileflow/extract_guard.py
+"""
+Per-file time and memory limits for text extraction.
+
+`GuardedExtractor` keeps one long-lived worker process and sends it one file
+at a time. The parent enforces a wall-clock limit and watches the worker's
+memory (worker + its tesseract/ffmpeg children, above the worker's idle
+size); on breach the whole process group is killed, the file is moved to
+the quarantine dir and a fresh worker is spawned for the next file. On
+POSIX the worker also caps RLIMIT_AS at its current address space plus the
+file's budget, so runaway allocations fail fast inside pdfplumber/PIL.
+A MemoryError on its own is reported as an ordinary extraction failure
+(the file stays put) and the worker is replaced.
+
+Limits are per file type and can be overridden with env vars, e.g.
+QILIFE_LIMIT_PDF_SECONDS=300 or QILIFE_LIMIT_VIDEO_MB=4096.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import signal
+import threading
+import multiprocessing as mp
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import resource  # POSIX only
+except ImportError:
+    resource = None
+
+try:
+    import psutil  # pip install psutil
+except ImportError:
+    psutil = None
+
+from src.tools.utils.file_sniffer import effective_suffix
+
+QUARANTINE_DIR = Path(os.getenv(
+    "QILIFE_QUARANTINE_DIR", str(Path.home() / ".qilife" / "quarantine")
+))
+_POLL_SECONDS = 0.25
+
+
+@dataclass(frozen=True)
+class Limit:
+    seconds: float
+    memory_mb: int
+
+
+_DEFAULT_LIMITS: Dict[str, Limit] = {
+    "text":        Limit(30, 512),
+    "pdf":         Limit(180, 1024),
+    "office":      Limit(120, 1024),
+    "spreadsheet": Limit(180, 1536),
+    "image":       Limit(90, 1024),
+    "audio":       Limit(900, 1024),
+    "video":       Limit(1800, 2048),
+    "default":     Limit(120, 1024),
+}
+
+_KIND_BY_SUFFIX = {
+    ".pdf": "pdf",
+    ".docx": "office", ".pptx": "office",
+    ".xls": "spreadsheet", ".xlsx": "spreadsheet", ".csv": "spreadsheet",
+    ".png": "image", ".jpg": "image", ".jpeg": "image", ".tiff": "image",
+    ".bmp": "image", ".gif": "image",
+    ".wav": "audio", ".mp3": "audio", ".m4a": "audio", ".flac": "audio",
+    ".mp4": "video", ".mov": "video", ".avi": "video", ".mkv": "video",
+    ".txt": "text", ".md": "text", ".html": "text", ".json": "text",
+    ".xml": "text", ".eml": "text", ".mhtml": "text",
+}
+
+
+def get_limit(kind: str) -> Limit:
+    base = _DEFAULT_LIMITS.get(kind, _DEFAULT_LIMITS["default"])
+    prefix = f"QILIFE_LIMIT_{kind.upper()}"
+    return Limit(
+        seconds=float(os.getenv(f"{prefix}_SECONDS", base.seconds)),
+        memory_mb=int(os.getenv(f"{prefix}_MB", base.memory_mb)),
+    )
+
+
+def kind_for(path: Path) -> str:
+    return _KIND_BY_SUFFIX.get(effective_suffix(path), "default")
+
+
+def limit_for(path: Path) -> Limit:
+    return get_limit(kind_for(path))
+
+
+class ExtractionLimitError(RuntimeError):
+    """Raised when a file breached its limits and was quarantined."""
+
+    def __init__(self, path: Path, reason: str, quarantined_to: Optional[Path]):
+        super().__init__(f"{path.name}: {reason}")
+        self.path = path
+        self.reason = reason
+        self.quarantined_to = quarantined_to
+
+
+def quarantine(path: Path, reason: str, quarantine_dir: Path = QUARANTINE_DIR) -> Optional[Path]:
+    """Move `path` out of the watched tree and leave a .reason.json next to it."""
+    if not path.exists():
+        return None
+    quarantine_dir.mkdir(parents=True, exist_ok=True)
+    target = quarantine_dir / path.name
+    i = 1
+    while target.exists():
+        target = quarantine_dir / f"{path.stem}_{i}{path.suffix}"
+        i += 1
+    shutil.move(str(path), str(target))
+    target.with_name(target.name + ".reason.json").write_text(json.dumps({
+        "source": str(path),
+        "reason": reason,
+        "quarantined_at": datetime.now().isoformat(),
+    }, indent=2), encoding="utf-8")
+    print(f"🚧 Quarantined {path.name} → {target} ({reason})")
+    return target
+
+
+def _vms_bytes() -> Optional[int]:
+    """This process's current virtual memory size, if it can be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().vms
+    return None
+
+
+def _cap_address_space(budget: int) -> None:
+    """RLIMIT_AS = what is already mapped (libraries, BLAS pools) + `budget`."""
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    vms = _vms_bytes()
+    if vms is None:
+        return  # no baseline: leave it to the parent's RSS polling
+    soft = vms + budget
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def _worker_main(conn) -> None:
+    """Worker loop: receive (path, memory_bytes), send back (status, payload)."""
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()  # own group, so killpg also takes tesseract/ffmpeg
+    from src.fileflow.content_extractor import extract_text
+    from src.fileflow.image_ocr import ImageTooLargeError
+
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            return
+        if msg is None:
+            return
+        path, mem_bytes = msg
+        if resource is not None and mem_bytes:
+            _cap_address_space(mem_bytes)
+        try:
+            conn.send(("ok", extract_text(Path(path))))
+        except MemoryError:
+            # could be the file, could be fragmentation left by earlier ones:
+            # not proof enough to quarantine. Exit so the next file gets a fresh worker.
+            conn.send(("oom", "out of memory while extracting"))
+            return
+        except ImageTooLargeError as e:
+            conn.send(("limit", str(e)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class GuardedExtractor:
+    """
+    One sandboxed extraction worker. Not thread-safe by design: give each
+    pipeline extraction thread its own instance.
+    """
+
+    def __init__(self, quarantine_dir: Path = QUARANTINE_DIR):
+        self.quarantine_dir = quarantine_dir
+        self._ctx = mp.get_context("spawn")
+        self._proc = None
+        self._conn = None
+
+    def _ensure_worker(self) -> None:
+        if self._proc is not None and self._proc.is_alive():
+            return
+        parent, child = self._ctx.Pipe()
+        self._proc = self._ctx.Process(target=_worker_main, args=(child,), daemon=True)
+        self._proc.start()
+        child.close()
+        self._conn = parent
+
+    def _kill_worker(self) -> None:
+        if self._proc is None:
+            return
+        pid = self._proc.pid
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(pid, signal.SIGKILL)
+            elif psutil is not None:
+                for c in psutil.Process(pid).children(recursive=True):
+                    c.kill()
+        except Exception:
+            pass  # group already gone, or worker died before setpgrp()
+        if self._proc.is_alive():
+            self._proc.kill()
+        self._proc.join(timeout=5)
+        self._proc = None
+        self._conn = None
+
+    def _rss_mb(self) -> float:
+        if psutil is None or self._proc is None:
+            return 0.0
+        try:
+            p = psutil.Process(self._proc.pid)
+            procs = [p] + p.children(recursive=True)
+            return sum(x.memory_info().rss for x in procs) / (1024 * 1024)
+        except psutil.Error:
+            return 0.0
+
+    def extract(self, path: Path, limit: Optional[Limit] = None) -> str:
+        """Extract text from `path` within its limits; raises ExtractionLimitError on breach."""
+        path = Path(path)
+        limit = limit or limit_for(path)
+        self._ensure_worker()
+        idle_mb = self._rss_mb()  # imports and buffers already held don't count against the file
+        self._conn.send((str(path), limit.memory_mb * 1024 * 1024))
+
+        deadline = time.monotonic() + limit.seconds
+        reason = None
+        while True:
+            if self._conn.poll(_POLL_SECONDS):
+                try:
+                    status, payload = self._conn.recv()
+                except EOFError:
+                    reason = "worker crashed"
+                    break
+                if status == "ok":
+                    return payload
+                if status == "limit":
+                    reason = payload
+                    break
+                if status == "oom":
+                    self._kill_worker()  # it exits anyway; don't send it the next file
+                    raise MemoryError(f"{path.name}: {payload}")
+                raise RuntimeError(payload)
+            if not self._proc.is_alive():
+                reason = "worker crashed"
+                break
+            if time.monotonic() > deadline:
+                reason = f"timed out after {limit.seconds:.0f}s"
+                break
+            if self._rss_mb() - idle_mb > limit.memory_mb:
+                reason = f"exceeded {limit.memory_mb} MB"
+                break
+
+        self._kill_worker()
+        moved = quarantine(path, reason, self.quarantine_dir)
+        raise ExtractionLimitError(path, reason, moved)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.send(None)
+            except (OSError, EOFError):
+                pass
+        if self._proc is not None:
+            self._proc.join(timeout=2)
+            if self._proc.is_alive():
+                self._kill_worker()
+        self._proc = None
+        self._conn = None
+
+
+_local = threading.local()
+
+
+def extract_text_limited(path: Path) -> str:
+    """Thread-local GuardedExtractor wrapper around content_extractor.extract_text."""
+    ex = getattr(_local, "extractor", None)
+    if ex is None:
+        ex = _local.extractor = GuardedExtractor()
+    return ex.extract(path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: extract_guard.py /path/to/file")
+        sys.exit(1)
+    ex = GuardedExtractor()
+    try:
+        print(ex.extract(Path(sys.argv[1]))[:2000])
+    except ExtractionLimitError as e:
+        print(f"❌ {e}")
+    finally:
+        ex.close()
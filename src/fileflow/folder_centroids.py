@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# src/fileflow/folder_centroids.py
+"""
+Nearest-centroid folder classifier over `folder_structure`.
+
+Each folder in folder_db's `folder_structure` table keeps the mean
+embedding of the files filed in it (table `folder_centroids`, same
+database). A new file is classified with one matrix-vector product
+against all unit-normalised centroids, well under a millisecond for
+thousands of folders. The pipeline stores the suggested folder_Id with
+each review; approving the file in File Review (or moving it there with
+auto_apply) folds its vector into that folder's centroid as a running mean:
+
+    mean += (vector - mean) / (count + 1)
+
+so there is never a retraining pass. `build()` seeds the centroids from
+the files already on disk.
+
+Embeddings come from sentence-transformers (QILIFE_EMBED_MODEL, default
+all-MiniLM-L6-v2) when it is installed, otherwise from a local hashing
+embedder. QILIFE_FOLDER_BASE is where folder_Path values live on disk.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.core.write_batcher import get_batcher
+from src.fileflow.folder_db import DB_PATH, TABLE_NAME
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+EMBED_MODEL = os.getenv("QILIFE_EMBED_MODEL", "all-MiniLM-L6-v2")
+FOLDER_BASE = os.getenv("QILIFE_FOLDER_BASE")
+EMBED_CHARS = 2000        # head of the document; enough to tell folders apart
+MIN_SCORE = 0.2           # below this cosine similarity a file isn't routed
+RECENT_VECTORS = 4096     # vectors kept from the pipeline for later approval
+
+_TOKEN_RE = re.compile(r"[a-z0-9]{2,}")
+
+
+class HashingEmbedder:
+    """Dependency-free fallback: signed feature hashing of log-scaled token counts."""
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def __call__(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        counts: Dict[str, int] = {}
+        for tok in _TOKEN_RE.findall(text.lower()):
+            counts[tok] = counts.get(tok, 0) + 1
+        for tok, n in counts.items():
+            h = zlib.crc32(tok.encode("utf-8"))
+            vec[h % self.dim] += (1.0 if h & 0x80000000 else -1.0) * (1.0 + np.log(n))
+        return vec
+
+
+def default_embedder() -> Callable[[str], np.ndarray]:
+    if SentenceTransformer is not None:
+        model = SentenceTransformer(EMBED_MODEL)
+        return lambda text: np.asarray(model.encode(text), dtype=np.float32)
+    return HashingEmbedder()
+
+
+def _unit(vec: np.ndarray) -> np.ndarray:
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm > 0 else vec
+
+
+class FolderCentroids:
+    """One running-mean embedding per folder_structure row, persisted in SQLite."""
+
+    def __init__(self, db_path: Path = DB_PATH, embed: Optional[Callable[[str], np.ndarray]] = None,
+                 base: Optional[Path] = None):
+        self.db_path = str(db_path)
+        self.base = Path(base) if base else (Path(FOLDER_BASE) if FOLDER_BASE else None)
+        self._embed = embed
+        self._lock = threading.Lock()
+        self._recent: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.writer = get_batcher(self.db_path)
+        self._init_table()
+        self.load()
+
+    @property
+    def embed(self) -> Callable[[str], np.ndarray]:
+        if self._embed is None:
+            self._embed = default_embedder()
+        return self._embed
+
+    def _init_table(self) -> None:
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS folder_centroids (
+                    folder_Id  INTEGER PRIMARY KEY,
+                    dim        INTEGER NOT NULL,
+                    count      INTEGER NOT NULL,
+                    vector     BLOB NOT NULL,
+                    updated_at REAL
+                )""")
+
+    def load(self) -> None:
+        """(Re)read folders and centroids into the in-memory matrix."""
+        with sqlite3.connect(self.db_path) as conn:
+            try:
+                folders = conn.execute(
+                    f"SELECT folder_Id, folder_Path FROM {TABLE_NAME} "
+                    "WHERE folder_Path IS NOT NULL AND folder_Path != ''").fetchall()
+            except sqlite3.OperationalError:
+                folders = []  # folder_db.init_db()/sync_from_excel() not run yet
+            stored = {fid: (dim, count, blob) for fid, dim, count, blob in
+                      conn.execute("SELECT folder_Id, dim, count, vector FROM folder_centroids")}
+
+        with self._lock:
+            self.paths: Dict[int, str] = {int(fid): path for fid, path in folders}
+            self._by_path = {path.strip("/").lower(): fid for fid, path in self.paths.items()}
+            self.means: Dict[int, np.ndarray] = {}
+            self.counts: Dict[int, int] = {}
+            for fid in self.paths:
+                if fid in stored:
+                    dim, count, blob = stored[fid]
+                    self.means[fid] = np.frombuffer(blob, dtype=np.float32, count=dim).copy()
+                    self.counts[fid] = count
+            self._rebuild_matrix()
+
+    def _rebuild_matrix(self) -> None:
+        dims = {v.shape[0] for v in self.means.values()}
+        dim = max(dims, key=lambda d: sum(v.shape[0] == d for v in self.means.values())) if dims else 0
+        # centroids from a different embedder (other dim) sit out until rebuilt
+        self._ids = np.array([fid for fid, v in self.means.items() if v.shape[0] == dim], dtype=np.int64)
+        self._matrix = (np.stack([_unit(self.means[fid]) for fid in self._ids])
+                        if len(self._ids) else np.zeros((0, dim), dtype=np.float32))
+        self._row = {int(fid): i for i, fid in enumerate(self._ids)}
+
+    # -- classification ----------------------------------------------------
+
+    def vector_for(self, text: str, name: str = "") -> np.ndarray:
+        return np.asarray(self.embed(f"{name}\n{text[:EMBED_CHARS]}"), dtype=np.float32)
+
+    def classify_vector(self, vector: np.ndarray, top_k: int = 3) -> List[Tuple[int, str, float]]:
+        """(folder_Id, folder_Path, cosine) for the `top_k` nearest centroids."""
+        with self._lock:
+            matrix, ids = self._matrix, self._ids
+        if not len(ids) or matrix.shape[1] != vector.shape[0]:
+            return []
+        scores = matrix @ _unit(vector)
+        k = min(top_k, len(ids))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(int(ids[i]), self.paths[int(ids[i])], float(scores[i])) for i in best]
+
+    def classify(self, text: str, name: str = "", top_k: int = 3) -> List[Tuple[int, str, float]]:
+        return self.classify_vector(self.vector_for(text, name), top_k)
+
+    # -- pipeline hooks ----------------------------------------------------
+
+    def remember(self, path: str, text: str) -> np.ndarray:
+        """Embed a pipeline file once and keep the vector for resolve()/approve()."""
+        vector = self.vector_for(text, Path(path).name)
+        with self._lock:
+            self._recent[path] = vector
+            self._recent.move_to_end(path)
+            while len(self._recent) > RECENT_VECTORS:
+                self._recent.popitem(last=False)
+        return vector
+
+    def suggest(self, job) -> Optional[int]:
+        """folder_Id of the nearest centroid to a pipeline job, if close enough."""
+        vector = self._recent.get(str(job.path))
+        if vector is None:
+            vector = self.remember(str(job.path), job.text)
+        best = self.classify_vector(vector, top_k=1)
+        if not best or best[0][2] < MIN_SCORE:
+            return None
+        return best[0][0]
+
+    def resolve(self, job) -> Optional[Path]:
+        """Pipeline destination_resolver: the suggested folder under `base`."""
+        if self.base is None:
+            return None
+        folder_id = job.folder_id if job.folder_id is not None else self.suggest(job)
+        if folder_id is None or folder_id not in self.paths:
+            return None
+        return self.base / self.paths[folder_id]
+
+    # -- learning ----------------------------------------------------------
+
+    def folder_for_path(self, path: str) -> Optional[int]:
+        """folder_Id whose folder_Path is the longest suffix of `path`'s directory."""
+        parts = [p.lower() for p in Path(path).parent.parts]
+        for i in range(len(parts)):
+            fid = self._by_path.get("/".join(parts[i:]))
+            if fid is not None:
+                return fid
+        return None
+
+    def update(self, folder_id: int, vector: np.ndarray) -> None:
+        """Fold one file's vector into the folder's centroid (running mean)."""
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            mean = self.means.get(folder_id)
+            count = self.counts.get(folder_id, 0)
+            if mean is None or mean.shape != vector.shape:
+                mean, count = vector.copy(), 0
+            mean += (vector - mean) / (count + 1)
+            self.means[folder_id], self.counts[folder_id] = mean, count + 1
+            row = self._row.get(folder_id)
+            if row is not None and self._matrix.shape[1] == vector.shape[0]:
+                matrix = self._matrix.copy()  # readers keep the matrix they already hold
+                matrix[row] = _unit(mean)
+                self._matrix = matrix
+            else:
+                self._rebuild_matrix()
+            blob = mean.tobytes()
+        self.writer.write(
+            "INSERT OR REPLACE INTO folder_centroids (folder_Id, dim, count, vector, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (folder_id, vector.shape[0], count + 1, blob, time.time()),
+        )
+
+    def approve(self, path: str, folder_id: Optional[int] = None,
+                text: Optional[str] = None) -> Optional[int]:
+        """
+        `path` was approved for `folder_id` (default: the folder it sits in):
+        learn from it. Returns the folder_Id, or None if there is none.
+        """
+        if folder_id is None:
+            folder_id = self.folder_for_path(path)
+        if folder_id is None or folder_id not in self.paths:
+            return None
+        with self._lock:
+            vector = self._recent.pop(path, None)
+        if vector is None:
+            if text is None:
+                from src.fileflow.content_extractor import extract_text
+                text = extract_text(Path(path))
+            vector = self.vector_for(text, Path(path).name)
+        self.update(folder_id, vector)
+        return folder_id
+
+    def approve_many(self, approved: Sequence[Tuple[str, Optional[int]]],
+                     background: bool = True) -> None:
+        """approve() each (path, folder_Id), by default on a worker thread so the UI doesn't wait."""
+        def run():
+            for p, folder_id in approved:
+                try:
+                    self.approve(p, folder_id)
+                except Exception as e:
+                    print(f"⚠️ Centroid update failed for {p}: {e}")
+        if background:
+            threading.Thread(target=run, name="centroid-update", daemon=True).start()
+        else:
+            run()
+
+    def build(self, base: Optional[Path] = None, max_files: int = 50) -> Dict[int, int]:
+        """Seed every centroid from up to `max_files` files already in its folder."""
+        from src.fileflow.content_extractor import extract_text
+        base = Path(base) if base else self.base
+        if base is None:
+            raise ValueError("build() needs a base directory (or QILIFE_FOLDER_BASE)")
+        seeded = {}
+        for fid, rel in list(self.paths.items()):
+            folder = base / rel
+            if not folder.is_dir():
+                continue
+            files = sorted(p for p in folder.iterdir() if p.is_file() and not p.name.startswith("."))
+            vectors = []
+            for p in files[:max_files]:
+                try:
+                    vectors.append(self.vector_for(extract_text(p), p.name))
+                except Exception as e:
+                    print(f"⚠️ Skipping {p}: {e}")
+            if not vectors:
+                continue
+            with self._lock:
+                self.means.pop(fid, None)
+                self.counts.pop(fid, None)
+            self.update(fid, np.mean(vectors, axis=0))
+            with self._lock:
+                self.counts[fid] = len(vectors)
+            self.writer.write("UPDATE folder_centroids SET count = ? WHERE folder_Id = ?",
+                              (len(vectors), fid))
+            seeded[fid] = len(vectors)
+        self.writer.flush()
+        print(f"🧭 Seeded {len(seeded)} folder centroid(s) from {base}")
+        return seeded
+
+
+_centroids: Optional[FolderCentroids] = None
+_centroids_lock = threading.Lock()
+
+
+def get_centroids() -> FolderCentroids:
+    global _centroids
+    with _centroids_lock:
+        if _centroids is None:
+            _centroids = FolderCentroids()
+        return _centroids
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# src/fileflow/image_ocr.py
+"""
+Batched image OCR.
+
+Every image is downsampled to OCR_TARGET_DPI, grayscaled and binarized
+(Otsu threshold in numpy), written to a temp PNG, and then many images are
+OCR'd by a single tesseract process using its file-list input. Tesseract
+separates pages with a form feed, which is how the output is split back
+per image.
+
+Batching pays off for folders (ocr_folder() and the CLI below). The file
+pipeline extracts one file per guarded worker, so content_extractor goes
+through ocr_image(), a batch of one. An image that can't be read or is too
+large is reported in its own OcrResult.error; the rest of the batch is
+still OCR'd.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np            # pip install numpy
+import pytesseract            # pip install pytesseract
+from PIL import Image         # pip install Pillow
+
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".tiff", ".bmp", ".gif"}
+
+OCR_TARGET_DPI = int(os.getenv("QILIFE_OCR_DPI", "300"))
+OCR_BATCH_SIZE = int(os.getenv("QILIFE_OCR_BATCH", "32"))
+OCR_LANG = os.getenv("QILIFE_OCR_LANG", "eng")
+# checked against the header in preprocess_image(); PIL's own (process-wide)
+# Image.MAX_IMAGE_PIXELS is left alone for the rest of the app
+MAX_IMAGE_PIXELS = int(os.getenv("QILIFE_MAX_IMAGE_PIXELS", "80000000"))
+
+# Phone photos rarely carry a real DPI, so assume the long edge is a letter page.
+_ASSUMED_PAGE_INCHES = 11.0
+
+
+class ImageTooLargeError(ValueError):
+    """Image dimensions exceed MAX_IMAGE_PIXELS; checked before decoding."""
+
+
+@dataclass
+class OcrResult:
+    path: Path
+    text: str
+    preprocess_seconds: float
+    ocr_seconds: float        # batch time amortized over the images in it
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def total_seconds(self) -> float:
+        return self.preprocess_seconds + self.ocr_seconds
+
+
+def _otsu_threshold(gray: "np.ndarray") -> int:
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = gray.size
+    levels = np.arange(256)
+    w0 = np.cumsum(hist)
+    w1 = total - w0
+    m0 = np.cumsum(hist * levels)
+    mt = m0[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (mt * w0 / total - m0) ** 2 / (w0 * w1)
+    between[~np.isfinite(between)] = 0
+    return int(np.argmax(between))
+
+
+def preprocess_image(path: Path, out: Path, target_dpi: int = OCR_TARGET_DPI) -> Path:
+    """Downsample, grayscale and binarize `path` into the PNG `out`."""
+    with Image.open(path) as img:
+        # only the header has been read so far
+        if img.width * img.height > MAX_IMAGE_PIXELS:
+            raise ImageTooLargeError(
+                f"{path.name} is {img.width}x{img.height}px (max {MAX_IMAGE_PIXELS} pixels)"
+            )
+        img.seek(0)  # first frame of GIF/TIFF
+        src_dpi = img.info.get("dpi", (0, 0))[0] or 0
+        if src_dpi > target_dpi:
+            scale = target_dpi / src_dpi
+        else:
+            scale = (target_dpi * _ASSUMED_PAGE_INCHES) / max(img.size)
+        gray = img.convert("L")
+        if scale < 1.0:
+            new_size = (max(1, int(img.width * scale)), max(1, int(img.height * scale)))
+            gray = gray.resize(new_size, Image.LANCZOS)
+
+    arr = np.asarray(gray, dtype=np.uint8)
+    binary = np.where(arr > _otsu_threshold(arr), 255, 0).astype(np.uint8)
+
+    Image.fromarray(binary).save(out, dpi=(target_dpi, target_dpi))
+    return out
+
+
+def _tesseract_batch(images: List[Path], work_dir: Path, lang: str) -> List[str]:
+    """Run one tesseract process over `images` via a file list."""
+    list_file = work_dir / f"batch_{time.monotonic_ns()}.txt"
+    list_file.write_text("\n".join(str(p) for p in images) + "\n", encoding="utf-8")
+    cmd = [pytesseract.pytesseract.tesseract_cmd, str(list_file), "stdout", "-l", lang]
+    proc = subprocess.run(cmd, check=True, capture_output=True)
+    pages = proc.stdout.decode("utf-8", errors="ignore").split("\f")
+    if len(pages) < len(images):
+        raise ValueError(f"tesseract returned {len(pages)} pages for {len(images)} images")
+    return pages[:len(images)]
+
+
+def _tesseract_each(images: List[Path], lang: str) -> List:
+    """One call per image: text, or the exception that image raised."""
+    out = []
+    for p in images:
+        try:
+            out.append(pytesseract.image_to_string(str(p), lang=lang))
+        except Exception as e:
+            out.append(e)
+    return out
+
+
+def ocr_images(paths: Iterable[Path], batch_size: int = OCR_BATCH_SIZE,
+               target_dpi: int = OCR_TARGET_DPI, lang: str = OCR_LANG) -> List[OcrResult]:
+    """OCR many images with one tesseract invocation per `batch_size` images."""
+    paths = [Path(p) for p in paths]
+    results: List[OcrResult] = []
+    with tempfile.TemporaryDirectory(prefix="qilife_ocr_") as tmp:
+        work = Path(tmp)
+        pre_dir = work / "pre"
+        pre_dir.mkdir()
+        for i in range(0, len(paths), batch_size):
+            batch = paths[i:i + batch_size]
+            slots: List[OcrResult] = []
+            prepared: List[Path] = []
+            for j, p in enumerate(batch, start=i):
+                t0 = time.perf_counter()
+                try:
+                    # OSError covers unreadable/unknown formats (PIL.UnidentifiedImageError)
+                    prepared.append(preprocess_image(p, pre_dir / f"{j:05d}.png", target_dpi))
+                    error = None
+                except (ImageTooLargeError, Image.DecompressionBombError, OSError, ValueError) as e:
+                    error = e
+                slots.append(OcrResult(p, "", time.perf_counter() - t0, 0.0, error))
+            if not prepared:
+                results.extend(slots)
+                continue
+
+            t0 = time.perf_counter()
+            try:
+                texts = _tesseract_batch(prepared, work, lang)
+            except (subprocess.CalledProcessError, ValueError):
+                # one bad page can fail the whole file list: retry image by image
+                texts = _tesseract_each(prepared, lang)
+            per_image = (time.perf_counter() - t0) / len(prepared)
+
+            pending = iter(texts)
+            for r in slots:
+                if r.ok:
+                    text = next(pending)
+                    r.ocr_seconds = per_image
+                    if isinstance(text, Exception):
+                        r.error = text
+                    else:
+                        r.text = text.strip()
+            results.extend(slots)
+    return results
+
+
+def ocr_image(path: Path, target_dpi: int = OCR_TARGET_DPI, lang: str = OCR_LANG) -> str:
+    """Text of a single image; raises what preprocessing or tesseract raised for it."""
+    result = ocr_images([path], batch_size=1, target_dpi=target_dpi, lang=lang)[0]
+    if result.error is not None:
+        raise result.error
+    return result.text
+
+
+def report_timings(results: List[OcrResult]) -> None:
+    """Print per-image timings and the batch average."""
+    if not results:
+        print("No images processed.")
+        return
+    for r in results:
+        if r.error is not None:
+            print(f"❌ {r.path.name}: {r.error}")
+            continue
+        print(f"🖼️ {r.path.name}: preprocess {r.preprocess_seconds:.3f}s, "
+              f"ocr {r.ocr_seconds:.3f}s, {len(r.text)} chars")
+    avg = sum(r.total_seconds for r in results) / len(results)
+    print(f"⏱ {len(results)} images, avg {avg:.3f}s per image")
+
+
+def ocr_folder(folder: Path, batch_size: int = OCR_BATCH_SIZE) -> List[OcrResult]:
+    images = sorted(p for p in folder.iterdir() if p.suffix.lower() in IMAGE_EXTS)
+    return ocr_images(images, batch_size=batch_size)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: image_ocr.py /path/to/image-or-folder")
+        sys.exit(1)
+    target = Path(sys.argv[1])
+    res = ocr_folder(target) if target.is_dir() else ocr_images([target])
+    report_timings(res)
@@ -0,0 +1,529 @@
+"""
+src/fileflow/job_queue.py
+
+Durable SQLite-backed job queue for file processing.
+
+Every detected file becomes a row in `jobs` keyed by (path, content hash),
+so re-detecting an unchanged file is a no-op. Workers claim jobs in batches
+under a lease; a crashed or restarted process simply lets its leases expire
+(or `recover_stale()` releases them immediately) and the work resumes where
+it stopped. Failures are retried with exponential backoff up to
+`max_attempts`.
+
+Claim order:
+  1. interactive jobs (priority > 0, e.g. files opened in File Review);
+  2. then per-root start-time fair queuing: each watched root advances a
+     virtual clock by cost / weight per job it is served, and the root with
+     the smallest clock goes next. Within a root the cheapest jobs (by
+     estimated cost from size and type) go first, and every
+     `fifo_every`-th pick takes the oldest job so big files still progress.
+Root weights come from `root_weights` or QILIFE_ROOT_WEIGHTS (JSON object
+of root path → weight).
+"""
+
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import psutil  # pip install psutil
+except ImportError:
+    psutil = None
+
+from src.core.metrics import REGISTRY
+
+DB_PATH = Path(__file__).parents[2] / "qilife_db.sqlite"
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+INTERACTIVE_PRIORITY = 10
+ERROR_BACKOFF_MAX = 60.0   # seconds the dispatcher waits after repeated errors
+
+# Rough extraction cost per kind: (base seconds, seconds per MB).
+COST_MODEL: Dict[str, Tuple[float, float]] = {
+    "text":        (0.2, 0.05),
+    "pdf":         (1.0, 0.5),
+    "office":      (1.0, 0.3),
+    "spreadsheet": (1.0, 0.5),
+    "image":       (2.0, 1.0),
+    "audio":       (5.0, 6.0),
+    "video":       (10.0, 2.0),
+    "default":     (1.0, 0.2),
+}
+
+
+@dataclass
+class Job:
+    id: int
+    path: str
+    content_hash: str
+    attempts: int
+    root: str = ""
+
+
+def content_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def estimate_cost(path: str, size: Optional[int] = None) -> float:
+    """Estimated processing seconds for `path`, from its type and size."""
+    from src.fileflow.extract_guard import kind_for
+    if size is None:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+    base, per_mb = COST_MODEL.get(kind_for(Path(path)), COST_MODEL["default"])
+    return base + per_mb * size / (1024 * 1024)
+
+
+def _env_root_weights() -> Dict[str, float]:
+    raw = os.getenv("QILIFE_ROOT_WEIGHTS")
+    if not raw:
+        return {}
+    try:
+        return {os.path.abspath(k): float(v) for k, v in json.loads(raw).items()}
+    except (ValueError, AttributeError) as e:
+        print(f"⚠️ Ignoring QILIFE_ROOT_WEIGHTS: {e}")
+        return {}
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue:
+    """Persistent job table with leases, retries, priorities and idempotent enqueue."""
+
+    def __init__(self, db_path: Path = DB_PATH, max_attempts: int = 5,
+                 backoff_base: float = 30.0, backoff_max: float = 3600.0,
+                 root_weights: Optional[Dict[str, float]] = None, fifo_every: int = 8):
+        self.db_path = str(db_path)
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.fifo_every = fifo_every
+        self.root_weights = {**_env_root_weights(),
+                             **{os.path.abspath(k): v for k, v in (root_weights or {}).items()}}
+        # fair-queuing state; in memory, a restart simply starts every root even
+        self._vtime: Dict[str, float] = {}
+        self._vclock = 0.0
+        self._served: Dict[str, int] = {}
+        self._local = threading.local()
+        self._init_tables()
+
+    # one connection per thread; WAL lets readers run beside the claimer
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self, mode: str = ""):
+        conn = self._conn()
+        conn.execute(f"BEGIN {mode}")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _init_tables(self) -> None:
+        conn = self._conn()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id            INTEGER PRIMARY KEY AUTOINCREMENT,
+                path          TEXT NOT NULL,
+                content_hash  TEXT NOT NULL,
+                idem_key      TEXT NOT NULL UNIQUE,
+                state         TEXT NOT NULL DEFAULT 'pending',
+                attempts      INTEGER NOT NULL DEFAULT 0,
+                lease_owner   TEXT,
+                lease_expires REAL,
+                available_at  REAL NOT NULL,
+                last_error    TEXT,
+                created_at    REAL NOT NULL,
+                updated_at    REAL NOT NULL
+            );
+            """
+        )
+        have = {r[1] for r in conn.execute("PRAGMA table_info(jobs)")}
+        for col, ddl in (("root", "TEXT NOT NULL DEFAULT ''"),
+                         ("cost", "REAL NOT NULL DEFAULT 1.0"),
+                         ("priority", "INTEGER NOT NULL DEFAULT 0")):
+            if col not in have:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {col} {ddl}")
+        conn.executescript(
+            """
+            CREATE INDEX IF NOT EXISTS idx_jobs_state_available
+                ON jobs (state, available_at);
+            CREATE INDEX IF NOT EXISTS idx_jobs_state_lease
+                ON jobs (state, lease_expires);
+            CREATE INDEX IF NOT EXISTS idx_jobs_root_cost
+                ON jobs (state, root, priority DESC, cost, id);
+            CREATE INDEX IF NOT EXISTS idx_jobs_root_age
+                ON jobs (state, root, id);
+            CREATE INDEX IF NOT EXISTS idx_jobs_interactive
+                ON jobs (priority DESC, id) WHERE state = 'pending' AND priority > 0;
+            """
+        )
+
+    def set_root_weight(self, root: str, weight: float) -> None:
+        self.root_weights[os.path.abspath(root)] = weight
+
+    # -- producer ----------------------------------------------------------
+
+    def enqueue(self, path: str, root: Optional[str] = None, priority: int = 0,
+                size: Optional[int] = None) -> Optional[int]:
+        """
+        Add `path` as a pending job; returns None if this exact content is
+        already known or the file can't be read (see try_enqueue()).
+        `root` is the watched folder it belongs to (fair-share unit).
+        """
+        return self.try_enqueue(path, root, priority, size)[0]
+
+    def try_enqueue(self, path: str, root: Optional[str] = None, priority: int = 0,
+                    size: Optional[int] = None) -> Tuple[Optional[int], bool]:
+        """enqueue(), plus whether the file was read: (job id or None, readable)."""
+        path = str(path)
+        try:
+            digest = content_hash(path)
+        except OSError as e:
+            print(f"⚠️ Cannot enqueue {path}: {e}")
+            return None, False
+        now = time.time()
+        cur = self._conn().execute(
+            "INSERT OR IGNORE INTO jobs (path, content_hash, idem_key, state, root, cost, "
+            "priority, available_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, 'pending', ?, ?, ?, ?, ?, ?)",
+            (path, digest, f"{path}|{digest}", os.path.abspath(root) if root else "",
+             estimate_cost(path, size), priority, now, now, now),
+        )
+        return (cur.lastrowid if cur.rowcount else None), True
+
+    def prioritize(self, paths: Iterable[str], priority: int = INTERACTIVE_PRIORITY) -> int:
+        """Move pending jobs for `paths` to the front (user is looking at them)."""
+        now = time.time()
+        with self._transaction() as conn:
+            n = 0
+            for p in paths:
+                n += conn.execute(
+                    "UPDATE jobs SET priority = MAX(priority, ?), "
+                    "available_at = MIN(available_at, ?), updated_at = ? "
+                    "WHERE path = ? AND state = 'pending'",
+                    (priority, now, now, str(p)),
+                ).rowcount
+        return n
+
+    def cancel_pending(self, root: str) -> List[str]:
+        """Drop pending jobs of a root that is no longer watched; returns their paths."""
+        root = os.path.abspath(root)
+        with self._transaction() as conn:
+            paths = [p for (p,) in conn.execute(
+                "SELECT path FROM jobs WHERE state = 'pending' AND root = ?", (root,))]
+            conn.execute("DELETE FROM jobs WHERE state = 'pending' AND root = ?", (root,))
+        return paths
+
+    def pending_jobs(self, limit: int = 50) -> List[dict]:
+        """Pending jobs in roughly the order they will be claimed."""
+        rows = self._conn().execute(
+            "SELECT id, path, root, cost, priority FROM jobs WHERE state = 'pending' "
+            "ORDER BY priority DESC, cost, id LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [{"id": r[0], "path": r[1], "root": r[2], "cost": round(r[3], 2),
+                 "priority": r[4]} for r in rows]
+
+    # -- consumer ----------------------------------------------------------
+
+    def claim(self, worker_id: str, batch_size: int = 8,
+              lease_seconds: float = 600.0) -> List[Job]:
+        """Atomically lease up to `batch_size` runnable jobs: interactive first, then fair share."""
+        now = time.time()
+        with self._transaction("IMMEDIATE") as conn:
+            # expired leases go back to pending so one ordered query covers them
+            conn.execute(
+                "UPDATE jobs SET state = 'pending', lease_owner = NULL, lease_expires = NULL "
+                "WHERE state = 'running' AND lease_expires < ?",
+                (now,),
+            )
+            rows = conn.execute(
+                "SELECT id, path, content_hash, attempts, root FROM jobs "
+                "WHERE state = 'pending' AND priority > 0 AND available_at <= ? "
+                "ORDER BY priority DESC, id LIMIT ?",
+                (now, batch_size),
+            ).fetchall()
+            if len(rows) < batch_size:
+                rows += self._fair_pick(conn, now, batch_size - len(rows), {r[0] for r in rows})
+            if rows:
+                conn.executemany(
+                    "UPDATE jobs SET state = 'running', lease_owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    [(worker_id, now + lease_seconds, now, r[0]) for r in rows],
+                )
+        return [Job(r[0], r[1], r[2], r[3] + 1, r[4]) for r in rows]
+
+    def _fair_pick(self, conn: sqlite3.Connection, now: float, n: int, taken: set) -> list:
+        roots = [r for (r,) in conn.execute(
+            "SELECT DISTINCT root FROM jobs WHERE state = 'pending' AND available_at <= ?",
+            (now,),
+        )]
+        for r in roots:
+            self._vtime[r] = max(self._vtime.get(r, 0.0), self._vclock)
+        cheap: Dict[str, list] = {}
+        oldest: Dict[str, list] = {}
+        picked = []
+        while roots and len(picked) < n:
+            root = min(roots, key=self._vtime.__getitem__)
+            served = self._served.get(root, 0)
+            by_age = self.fifo_every > 0 and served % self.fifo_every == self.fifo_every - 1
+            cache = oldest if by_age else cheap
+            if root not in cache:
+                order = "id" if by_age else "priority DESC, cost, id"
+                cache[root] = conn.execute(
+                    "SELECT id, path, content_hash, attempts, root, cost FROM jobs "
+                    f"WHERE state = 'pending' AND root = ? AND available_at <= ? "
+                    f"ORDER BY {order} LIMIT ?",
+                    (root, now, n + len(taken)),
+                ).fetchall()
+            rows = cache[root]
+            while rows and rows[0][0] in taken:
+                rows.pop(0)
+            if not rows:
+                roots.remove(root)
+                continue
+            row = rows.pop(0)
+            taken.add(row[0])
+            picked.append(row[:5])
+            self._served[root] = served + 1
+            self._vclock = self._vtime[root]
+            self._vtime[root] += max(row[5], 0.1) / self.root_weights.get(root, 1.0)
+        return picked
+
+    def extend_lease(self, job_ids: Iterable[int], worker_id: str,
+                     lease_seconds: float = 600.0) -> None:
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+                "WHERE id = ? AND state = 'running' AND lease_owner = ?",
+                [(now + lease_seconds, now, jid, worker_id) for jid in job_ids],
+            )
+
+    def complete(self, job_ids: Iterable[int]) -> None:
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE jobs SET state = 'done', lease_owner = NULL, lease_expires = NULL, "
+                "last_error = NULL, updated_at = ? WHERE id = ?",
+                [(now, jid) for jid in job_ids],
+            )
+
+    def fail(self, job_id: int, error: str, retry: bool = True) -> None:
+        """Record a failure; retried with exponential backoff until max_attempts."""
+        conn = self._conn()
+        row = conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return
+        attempts = row[0]
+        now = time.time()
+        if retry and attempts < self.max_attempts:
+            delay = min(self.backoff_base * (2 ** (attempts - 1)), self.backoff_max)
+            conn.execute(
+                "UPDATE jobs SET state = 'pending', available_at = ?, lease_owner = NULL, "
+                "lease_expires = NULL, last_error = ?, updated_at = ? WHERE id = ?",
+                (now + delay, error, now, job_id),
+            )
+        else:
+            conn.execute(
+                "UPDATE jobs SET state = 'failed', lease_owner = NULL, lease_expires = NULL, "
+                "last_error = ?, updated_at = ? WHERE id = ?",
+                (error, now, job_id),
+            )
+
+    def release(self, job_ids: Iterable[int]) -> None:
+        """Hand claimed-but-unstarted jobs back without counting an attempt."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE jobs SET state = 'pending', lease_owner = NULL, lease_expires = NULL, "
+                "attempts = MAX(attempts - 1, 0), updated_at = ? WHERE id = ? AND state = 'running'",
+                [(now, jid) for jid in job_ids],
+            )
+
+    def recover_stale(self) -> int:
+        """
+        Release leases held by dead processes on this host so their jobs are
+        claimable right away instead of after lease expiry.
+        """
+        if psutil is None:
+            return 0  # can't tell live owners from dead ones; wait for expiry
+        host = socket.gethostname()
+        conn = self._conn()
+        rows = conn.execute(
+            "SELECT DISTINCT lease_owner FROM jobs WHERE state = 'running' AND lease_owner LIKE ?",
+            (f"{host}:%",),
+        ).fetchall()
+        released = 0
+        for (owner,) in rows:
+            try:
+                pid = int(owner.rsplit(":", 1)[1].split("/", 1)[0])
+            except (ValueError, IndexError):
+                continue
+            if pid == os.getpid() or psutil.pid_exists(pid):
+                continue
+            cur = conn.execute(
+                "UPDATE jobs SET state = 'pending', lease_owner = NULL, lease_expires = NULL, "
+                "attempts = MAX(attempts - 1, 0), updated_at = ? "
+                "WHERE state = 'running' AND lease_owner = ?",
+                (time.time(), owner),
+            )
+            released += cur.rowcount
+        if released:
+            print(f"♻️ Released {released} interrupted job(s)")
+        return released
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        out = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        out.update({state: n for state, n in rows})
+        return out
+
+
+class JobDispatcher:
+    """
+    Claims jobs in batches and feeds them to a mover.Pipeline, keeping the
+    leases of in-flight jobs alive and settling them when the pipeline's
+    record stage reports back. With `router`, each job goes to
+    `router(job)` instead; pipelines it can return must be `attach()`ed.
+    """
+
+    def __init__(self, job_queue: JobQueue, pipeline, worker_id: Optional[str] = None,
+                 batch_size: int = 8, lease_seconds: float = 600.0, idle_wait: float = 1.0,
+                 router: Optional[Callable[[Job], object]] = None):
+        self.queue = job_queue
+        self.pipeline = pipeline
+        self.router = router
+        self.worker_id = worker_id or f"{default_worker_id()}/{id(self):x}"
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.idle_wait = idle_wait
+        self._inflight: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.attach(pipeline)
+
+    def attach(self, pipeline) -> None:
+        """Settle jobs finished by `pipeline` (needed for every pipeline the router returns)."""
+        pipeline.add_done_callback(self._on_done)
+
+    def _collect_metrics(self, registry) -> None:
+        for state, n in self.queue.counts().items():
+            registry.set("qilife_jobs", n, state=state)
+
+    def notify(self) -> None:
+        """Wake the dispatcher (e.g. right after enqueue)."""
+        self._wake.set()
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="job-dispatcher", daemon=True)
+        self._thread.start()
+        REGISTRY.add_collector(self._collect_metrics)
+
+    def stop(self) -> None:
+        REGISTRY.remove_collector(self._collect_metrics)
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _on_done(self, job) -> None:
+        if job.job_id is None:
+            return
+        with self._lock:
+            self._inflight.pop(job.job_id, None)
+        if job.error is None:
+            self.queue.complete([job.job_id])
+        else:
+            # quarantined/missing files won't get better by retrying
+            permanent = job.error.startswith(("quarantined", "skipped"))
+            self.queue.fail(job.job_id, job.error, retry=not permanent)
+        self._wake.set()
+
+    def _heartbeat(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            due = [jid for jid, t in self._inflight.items() if now - t > self.lease_seconds / 3]
+        if due:
+            self.queue.extend_lease(due, self.worker_id, self.lease_seconds)
+            with self._lock:
+                for jid in due:
+                    if jid in self._inflight:
+                        self._inflight[jid] = now
+
+    def _run(self) -> None:
+        failures = 0
+        while not self._stop.is_set():
+            try:
+                self._dispatch_once()
+                failures = 0
+            except Exception as e:
+                # a locked database or a pipeline closed under us must not kill the thread
+                failures += 1
+                delay = min(ERROR_BACKOFF_MAX, self.idle_wait * 2 ** min(failures, 8))
+                REGISTRY.inc("qilife_dispatcher_errors_total")
+                print(f"⚠️ Job dispatcher: {type(e).__name__}: {e} (retrying in {delay:.0f}s)")
+                self._stop.wait(delay)
+
+    def _dispatch_once(self) -> None:
+        self._heartbeat()
+        jobs = self.queue.claim(self.worker_id, self.batch_size, self.lease_seconds)
+        if not jobs:
+            self._wake.wait(self.idle_wait)
+            self._wake.clear()
+            return
+        for i, job in enumerate(jobs):
+            if self._stop.is_set():
+                self.queue.release(j.id for j in jobs[i:])
+                return
+            with self._lock:
+                self._inflight[job.id] = time.monotonic()
+            try:
+                target = self.router(job) if self.router is not None else self.pipeline
+                target.submit(job.path, job_id=job.id)  # blocks under backpressure
+            except Exception as e:
+                with self._lock:
+                    self._inflight.pop(job.id, None)
+                self._settle_unsubmitted(job, jobs[i + 1:], f"dispatch: {type(e).__name__}: {e}")
+                raise
+            self._heartbeat()
+
+    def _settle_unsubmitted(self, job: Job, rest: List[Job], error: str) -> None:
+        """`job` could not be handed over: retry it later; give the rest back untouched."""
+        try:
+            self.queue.fail(job.id, error)
+            if rest:
+                self.queue.release(j.id for j in rest)
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not settle claimed jobs, their leases will expire: {e}")
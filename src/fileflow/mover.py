@@ -2,20 +2,378 @@
 src/fileflow/mover.py
 
 Handles the main file processing pipeline: context, rename, move, and record vectors.
+
+Files flow through five stages, each with its own worker threads and a
+bounded queue in front of it:
+
+    extract → embed → classify/rename → move → record
+
+When a slow stage (OCR, LLM) falls behind, its inbound queue fills up and
+`put()` blocks the stage before it, all the way back to `submit()`, so
+memory stays bounded by the queue sizes instead of growing with the backlog.
+
+Files the pipeline renames or moves are remembered (path, size, mtime), so
+a watcher seeing them land can skip them with `is_own_write()` instead of
+ingesting them again under their new name.
 """
 
-def run_full_pipeline(filepath: str, db_manager, context_memory, vector_storage):
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from src.core.metrics import REGISTRY
+from src.tools.fileops.smart_file_renamer import generate_new_name
+
+STAGES = ("extract", "embed", "classify", "move", "record")
+DEFAULT_WORKERS = {"extract": 2, "embed": 1, "classify": 2, "move": 1, "record": 1}
+DEFAULT_QUEUE_SIZE = int(os.getenv("QILIFE_PIPELINE_QUEUE", "8"))
+OWN_WRITES_KEPT = 4096
+
+_STOP = object()
+_own_writes: "OrderedDict[str, tuple]" = OrderedDict()
+_own_writes_lock = threading.Lock()
+
+
+def _stat_key(path: Union[str, os.PathLike]) -> Optional[tuple]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _note_own_write(path: Path) -> None:
+    key = _stat_key(path)
+    if key is None:
+        return
+    with _own_writes_lock:
+        _own_writes[os.path.abspath(path)] = key
+        _own_writes.move_to_end(os.path.abspath(path))
+        while len(_own_writes) > OWN_WRITES_KEPT:
+            _own_writes.popitem(last=False)
+
+
+def is_own_write(path: Union[str, os.PathLike]) -> bool:
+    """True if a pipeline put `path` where it is and it hasn't changed since."""
+    with _own_writes_lock:
+        key = _own_writes.get(os.path.abspath(path))
+    return key is not None and key == _stat_key(path)
+
+
+@dataclass
+class FileJob:
+    path: Path
+    text: str = ""
+    metadata: dict = field(default_factory=dict)
+    suggested_name: Optional[str] = None
+    destination: Optional[Path] = None
+    final_path: Optional[Path] = None
+    error: Optional[str] = None
+    job_id: Optional[int] = None  # JobQueue row, when fed by a JobDispatcher
+    folder_id: Optional[int] = None  # folder_structure row suggested by the centroids
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    processed: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0
+    started: float = field(default_factory=time.monotonic)
+
+    def snapshot(self, queue_depth: int) -> dict:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        done = self.processed + self.errors
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "processed": self.processed,
+            "errors": self.errors,
+            "queue_depth": queue_depth,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "avg_seconds": round(self.busy_seconds / done, 4) if done else 0.0,
+            "throughput_per_s": round(self.processed / elapsed, 3),
+        }
+
+
+def _default_namer(job: FileJob) -> str:
+    return generate_new_name(str(job.path), {
+        "timestamp": job.metadata.get("modified", datetime.now().isoformat()),
+        "text": job.text,
+    })
+
+
+def _unique_path(path: Path) -> Path:
+    candidate, i = path, 1
+    while candidate.exists():
+        candidate = path.with_name(f"{path.stem}_{i}{path.suffix}")
+        i += 1
+    return candidate
+
+
+class Pipeline:
+    """
+    Long-lived staged pipeline. `submit()` blocks while the extract queue is
+    full; `close()` drains every stage in order and joins the workers.
+
+    :param workers: per-stage worker counts, merged over DEFAULT_WORKERS.
+    :param namer: job → suggested filename (defaults to smart_file_renamer).
+    :param destination_resolver: job → target folder, or None to stay put.
+    :param auto_apply: rename/move immediately instead of queueing for review.
+    :param guarded: run extraction in time/memory-limited workers.
+    :param centroids: FolderCentroids; embeds each file once, records the
+        nearest folder with its review so approvals can learn from it, and
+        routes files to that folder when no destination_resolver is given.
+    """
+
+    def __init__(self, db_manager, context_memory, vector_storage,
+                 workers: Optional[Dict[str, int]] = None,
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 namer: Callable[[FileJob], str] = _default_namer,
+                 destination_resolver: Optional[Callable[[FileJob], Optional[Path]]] = None,
+                 auto_apply: bool = False,
+                 guarded: bool = True,
+                 centroids=None):
+        self.db_manager = db_manager
+        self.context_memory = context_memory
+        self.vector_storage = vector_storage
+        # ContextMemory is created without a store in env_manager; give it ours
+        if context_memory is not None and getattr(context_memory, "vector_store", None) is None:
+            context_memory.vector_store = vector_storage
+        self.namer = namer
+        self.centroids = centroids
+        if destination_resolver is None and centroids is not None:
+            destination_resolver = centroids.resolve
+        self.destination_resolver = destination_resolver
+        self.auto_apply = auto_apply
+        self.guarded = guarded
+
+        counts = {**DEFAULT_WORKERS, **(workers or {})}
+        self._queues = {s: queue.Queue(maxsize=queue_size) for s in STAGES}
+        self._stats = {s: StageStats(s, max(1, counts[s])) for s in STAGES}
+        self._alive = {s: self._stats[s].workers for s in STAGES}
+        self._handlers = {
+            "extract": self._extract,
+            "embed": self._embed,
+            "classify": self._classify,
+            "move": self._move,
+            "record": self._record,
+        }
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._started = False
+        self._closed = False
+        self._done_callbacks: List[Callable[[FileJob], None]] = []
+
+    def _collect_metrics(self, registry) -> None:
+        for stage in STAGES:
+            registry.set("qilife_stage_queue_depth", self._queues[stage].qsize(), stage=stage)
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self) -> "Pipeline":
+        if self._started:
+            return self
+        for stage in STAGES:
+            for i in range(self._stats[stage].workers):
+                t = threading.Thread(target=self._worker, args=(stage,),
+                                     name=f"pipeline-{stage}-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+        self._started = True
+        REGISTRY.add_collector(self._collect_metrics)
+        return self
+
+    def submit(self, path: Union[str, os.PathLike], job_id: Optional[int] = None) -> None:
+        """Queue one file; blocks while downstream stages are saturated."""
+        if self._closed:
+            raise RuntimeError("pipeline is closed")
+        self.start()
+        self._queues["extract"].put(FileJob(Path(path), job_id=job_id))
+
+    def add_done_callback(self, fn: Callable[[FileJob], None]) -> None:
+        """Call `fn(job)` from the record stage for every finished job, ok or failed."""
+        self._done_callbacks.append(fn)
+
+    def submit_many(self, paths: Iterable[Union[str, os.PathLike]]) -> None:
+        for p in paths:
+            self.submit(p)
+
+    def close(self) -> None:
+        """Stop intake, let every stage drain, and join the workers."""
+        if self._closed:
+            return
+        self._closed = True
+        self.start()
+        for _ in range(self._stats["extract"].workers):
+            self._queues["extract"].put(_STOP)
+        for t in self._threads:
+            t.join()
+        REGISTRY.remove_collector(self._collect_metrics)
+
+    def __enter__(self) -> "Pipeline":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def stats(self) -> List[dict]:
+        """Per-stage throughput, latency and current queue depth."""
+        return [self._stats[s].snapshot(self._queues[s].qsize()) for s in STAGES]
+
+    # -- plumbing ----------------------------------------------------------
+
+    def _next(self, stage: str) -> Optional[str]:
+        i = STAGES.index(stage)
+        return STAGES[i + 1] if i + 1 < len(STAGES) else None
+
+    def _worker(self, stage: str) -> None:
+        inbox = self._queues[stage]
+        nxt = self._next(stage)
+        handler = self._handlers[stage]
+        local: dict = {}
+        stats = self._stats[stage]
+        try:
+            while True:
+                job = inbox.get()
+                if job is _STOP:
+                    break
+                t0 = time.perf_counter()
+                upstream_error = job.error is not None  # only ever seen by `record`
+                try:
+                    if not upstream_error or nxt is None:
+                        handler(job, local)
+                    new_error = job.error is not None and not upstream_error
+                except Exception as e:
+                    job.error = f"{stage}: {type(e).__name__}: {e}"
+                    new_error = True
+                elapsed = time.perf_counter() - t0
+                counted_error = new_error and not job.error.startswith("skipped")
+                with self._lock:
+                    stats.busy_seconds += elapsed
+                    if new_error:
+                        if counted_error:
+                            stats.errors += 1
+                    else:
+                        stats.processed += 1
+                REGISTRY.observe("qilife_stage_seconds", elapsed, stage=stage)
+                if counted_error:
+                    REGISTRY.inc("qilife_stage_errors_total", stage=stage)
+                elif not new_error:
+                    REGISTRY.inc("qilife_stage_processed_total", stage=stage)
+                if nxt is not None:
+                    # failed jobs skip straight to `record`, which always drains
+                    self._queues[nxt if job.error is None else "record"].put(job)
+        finally:
+            extractor = local.get("extractor")
+            if extractor is not None:
+                extractor.close()
+            with self._lock:
+                self._alive[stage] -= 1
+                last = self._alive[stage] == 0
+            if last and nxt is not None:
+                for _ in range(self._stats[nxt].workers):
+                    self._queues[nxt].put(_STOP)
+
+    # -- stages ------------------------------------------------------------
+
+    def _extract(self, job: FileJob, local: dict) -> None:
+        from src.fileflow.extract_guard import kind_for
+        if not job.path.is_file():
+            job.error = "skipped: file no longer exists"
+            return
+        with REGISTRY.timer("qilife_extract_seconds", kind=kind_for(job.path)):
+            self._extract_text(job, local)
+
+    def _extract_text(self, job: FileJob, local: dict) -> None:
+        from src.fileflow.content_extractor import extract_metadata, extract_text
+        if self.guarded:
+            from src.fileflow.extract_guard import ExtractionLimitError, GuardedExtractor
+            extractor = local.setdefault("extractor", GuardedExtractor())
+            job.metadata = extract_metadata(job.path)
+            try:
+                job.text = extractor.extract(job.path)
+            except ExtractionLimitError as e:
+                job.error = f"quarantined: {e.reason}"
+        else:
+            job.metadata = extract_metadata(job.path)
+            job.text = extract_text(job.path)
+
+    def _embed(self, job: FileJob, local: dict) -> None:
+        if self.context_memory is not None and job.text:
+            self.context_memory.store_context(str(job.path), job.text)
+        if self.centroids is not None and job.text:
+            self.centroids.remember(str(job.path), job.text)
+
+    def _classify(self, job: FileJob, local: dict) -> None:
+        job.suggested_name = self.namer(job)
+        if self.centroids is not None and job.text:
+            job.folder_id = self.centroids.suggest(job)
+        if self.destination_resolver is not None:
+            job.destination = self.destination_resolver(job)
+
+    def _move(self, job: FileJob, local: dict) -> None:
+        if not self.auto_apply:
+            return  # review mode: the suggestion is recorded, the file stays put
+        folder = job.destination or job.path.parent
+        target = folder / (job.suggested_name or job.path.name)
+        if target == job.path:
+            job.final_path = job.path  # already named and filed as suggested
+            return
+        folder.mkdir(parents=True, exist_ok=True)
+        target = _unique_path(target)
+        shutil.move(str(job.path), str(target))
+        _note_own_write(target)
+        job.final_path = target
+        print(f"📦 Moved {job.path.name} → {target}")
+
+    def _record(self, job: FileJob, local: dict) -> None:
+        # finished jobs aren't kept: a long-lived pipeline would hold every text it ever read
+        try:
+            if job.error:
+                icon = "⏭" if job.error.startswith("skipped") else "❌"
+                print(f"{icon} Pipeline {job.path}: {job.error}")
+            elif self.db_manager is not None:
+                self.db_manager.add_review(
+                    str(job.path),
+                    job.path.name,
+                    job.final_path.name if job.final_path else job.suggested_name,
+                    status="approved" if job.final_path else "pending",
+                    folder_id=job.folder_id,
+                )
+            if job.final_path and self.centroids is not None:
+                # auto_apply filed it: learn from the folder it actually landed in
+                landed = self.centroids.folder_for_path(str(job.final_path))
+                if landed is not None:
+                    self.centroids.approve(str(job.path), landed, text=job.text)
+        except Exception as e:
+            job.error = f"record: {type(e).__name__}: {e}"
+            raise
+        finally:
+            for fn in self._done_callbacks:
+                fn(job)
+
+
+def run_full_pipeline(filepath: Union[str, os.PathLike, Iterable[Union[str, os.PathLike]]],
+                      db_manager, context_memory, vector_storage, **options) -> List[dict]:
     """
-    Stub orchestrator for full file processing.
-    :param filepath: Path to the file to process.
+    Run one file or an iterable of files through the staged pipeline and
+    return the per-stage stats once everything has drained.
+    :param filepath: Path to the file to process, or an iterable of paths.
     :param db_manager: Instance of DatabaseManager for logging reviews.
     :param context_memory: Instance of ContextMemory for embeddings.
     :param vector_storage: Instance of VectorStorage for storing vectors.
+    :param options: forwarded to Pipeline (workers, queue_size, auto_apply, ...).
     """
-    print(f"🔄 Running full pipeline for {filepath}")
-    # TODO: Implement actual pipeline steps:
-    # 1. Extract text or metadata (use ContentExtractor)
-    # 2. Store context embeddings via context_memory
-    # 3. Determine new filename and rename (use rename_rules or fileflow logic)
-    # 4. Move file to target folder
-    # 5. Log entry in database and vector store
+    paths = [filepath] if isinstance(filepath, (str, os.PathLike)) else filepath
+    with Pipeline(db_manager, context_memory, vector_storage, **options) as pipeline:
+        pipeline.submit_many(paths)
+    return pipeline.stats()
@@ -1,16 +1,34 @@
 # TODO
 import sqlite3
-from typing import List, Dict
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.core.write_batcher import get_batcher
 
 class DatabaseManager:
     """
     Stub database manager using SQLite.
     """
 
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",      # readers don't block the writer (and vice versa)
+        "PRAGMA synchronous=NORMAL",    # fsync at checkpoints, not every commit; safe under WAL
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-16000",     # ~16 MB page cache
+        "PRAGMA mmap_size=134217728",   # 128 MB memory-mapped reads
+        "PRAGMA busy_timeout=5000",
+    )
+
     def __init__(self, db_path: str = "qilife_db.sqlite"):
         self.db_path = db_path
-        self.conn = sqlite3.connect(self.db_path)
+        # shared by the Streamlit thread and the pipeline's record stage
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for pragma in self.PRAGMAS:
+            self.conn.execute(pragma)
+        self._lock = threading.Lock()
         self._init_tables()
+        # writes are group-committed; reads go through self.conn
+        self.writer = get_batcher(self.db_path)
 
     def _init_tables(self):
         cursor = self.conn.cursor()
@@ -24,47 +42,115 @@ class DatabaseManager:
             )
             """
         )
+        # folder_Id the centroid classifier suggested (folder_centroids), learned from on approval
+        if "folder_id" not in {r[1] for r in cursor.execute("PRAGMA table_info(reviews)")}:
+            cursor.execute("ALTER TABLE reviews ADD COLUMN folder_id INTEGER")
+        # keyset pages walk (status, rowid) straight off this index
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_reviews_status ON reviews (status)")
+        # per-status row counts kept current by triggers, so stats never scan reviews
+        fresh = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='review_stats'"
+        ).fetchone() is None
+        cursor.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS review_stats (
+                status TEXT PRIMARY KEY,
+                n INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TRIGGER IF NOT EXISTS trg_reviews_insert AFTER INSERT ON reviews BEGIN
+                INSERT INTO review_stats (status, n) VALUES (IFNULL(NEW.status, ''), 1)
+                    ON CONFLICT(status) DO UPDATE SET n = n + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_reviews_delete AFTER DELETE ON reviews BEGIN
+                UPDATE review_stats SET n = n - 1 WHERE status = IFNULL(OLD.status, '');
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_reviews_status AFTER UPDATE OF status ON reviews
+            WHEN OLD.status IS NOT NEW.status BEGIN
+                UPDATE review_stats SET n = n - 1 WHERE status = IFNULL(OLD.status, '');
+                INSERT INTO review_stats (status, n) VALUES (IFNULL(NEW.status, ''), 1)
+                    ON CONFLICT(status) DO UPDATE SET n = n + 1;
+            END;
+            """
+        )
+        if fresh:
+            # existing database: seed the counters once
+            cursor.execute("DELETE FROM review_stats")
+            cursor.execute(
+                "INSERT INTO review_stats (status, n) "
+                "SELECT IFNULL(status, ''), COUNT(*) FROM reviews GROUP BY IFNULL(status, '')"
+            )
         self.conn.commit()
 
     def get_database_stats(self) -> Dict[str, int]:
         cursor = self.conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM reviews")
-        total = cursor.fetchone()[0]
-        cursor.execute("SELECT COUNT(*) FROM reviews WHERE status='pending'")
-        pending = cursor.fetchone()[0]
+        counts = dict(cursor.execute("SELECT status, n FROM review_stats").fetchall())
         # embeddings count stub
         return {
-            "total_files": total,
-            "pending_reviews": pending,
+            "total_files": sum(counts.values()),
+            "pending_reviews": counts.get("pending", 0),
             "total_embeddings": 0
         }
 
-    def get_pending_reviews(self) -> List[Dict]:
+    def get_pending_reviews(self, limit: Optional[int] = None, after: int = 0) -> List[Dict]:
+        """
+        Pending reviews in arrival order. With `limit`, one keyset page:
+        pass the last row's `seq` as `after` to get the next page, so a
+        page costs the same however deep into the backlog it is.
+        """
         cursor = self.conn.cursor()
-        cursor.execute(
-            "SELECT id, original_name, suggested_name FROM reviews WHERE status='pending'"
-        )
+        sql = ("SELECT rowid, id, original_name, suggested_name, folder_id FROM reviews "
+               "WHERE status='pending' AND rowid > ? ORDER BY rowid")
+        params: tuple = (after,)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        cursor.execute(sql, params)
         rows = cursor.fetchall()
         return [
-            {"id": r[0], "original_name": r[1], "suggested_name": r[2]}
+            {"seq": r[0], "id": r[1], "original_name": r[2], "suggested_name": r[3],
+             "folder_id": r[4]}
             for r in rows
         ]
 
-    def approve_file_rename(self, file_id: str, new_name: str) -> None:
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "UPDATE reviews SET status='approved', suggested_name=? WHERE id=?",
-            (new_name, file_id)
+    def add_review(self, file_id: str, original_name: str,
+                   suggested_name: str, status: str = "pending", sync: bool = False,
+                   folder_id: Optional[int] = None) -> None:
+        # an upsert, not INSERT OR REPLACE: REPLACE's implicit delete skips the stats triggers
+        self.writer.write(
+            "INSERT INTO reviews (id, original_name, suggested_name, status, folder_id) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET original_name=excluded.original_name, "
+            "suggested_name=excluded.suggested_name, status=excluded.status, "
+            "folder_id=excluded.folder_id",
+            (file_id, original_name, suggested_name, status, folder_id),
+            sync=sync,
         )
-        self.conn.commit()
+
+    def apply_review_actions(self, batch: Iterable[Tuple[str, str, Optional[str]]]) -> int:
+        """
+        Apply many review decisions in one transaction. `batch` holds
+        (file_id, "approve" | "reject", new_name) tuples; new_name is only
+        used for approvals. Returns the number of reviews updated.
+        """
+        batch = list(batch)
+        approve = [(name, fid) for fid, action, name in batch if action == "approve"]
+        reject = [(fid,) for fid, action, _ in batch if action == "reject"]
+        # queued add_review() rows first, so a decision can't be overwritten by them
+        self.writer.flush()
+        with self._lock, self.conn:
+            cursor = self.conn.cursor()
+            cursor.executemany(
+                "UPDATE reviews SET status='approved', suggested_name=? WHERE id=?", approve)
+            updated = cursor.rowcount
+            cursor.executemany("UPDATE reviews SET status='rejected' WHERE id=?", reject)
+            updated += cursor.rowcount
+        return updated
+
+    def approve_file_rename(self, file_id: str, new_name: str) -> None:
+        self.apply_review_actions([(file_id, "approve", new_name)])
 
     def reject_file_rename(self, file_id: str) -> None:
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "UPDATE reviews SET status='rejected' WHERE id=?",
-            (file_id,)
-        )
-        self.conn.commit()
+        self.apply_review_actions([(file_id, "reject", None)])
 
     def export_logs(self) -> List[Dict]:
         cursor = self.conn.cursor()
@@ -76,6 +162,4 @@ class DatabaseManager:
         ]
 
     def clear_all_data(self) -> None:
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM reviews")
-        self.conn.commit()
+        self.writer.write("DELETE FROM reviews", sync=True)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# src/fileflow/transcriber.py
+"""
+Chunked audio/video transcription.
+
+ffmpeg cuts the source into short mono 16 kHz WAV segments inside a temp
+dir (never next to the source file), the segments are transcribed
+concurrently and the text is stitched back together in segment order.
+Each segment's transcript is cached by content hash, so re-running a
+recording only pays for the parts that were never transcribed.
+
+Engines are pluggable: set QILIFE_TRANSCRIBER=dummy (or pass
+`engine=DummyTranscriber()`) to run without network access.
+"""
+
+import os
+import sys
+import hashlib
+import tempfile
+import subprocess
+from abc import ABC, abstractmethod
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Type
+
+SEGMENT_SECONDS = int(os.getenv("QILIFE_TRANSCRIBE_SEGMENT_SECONDS", "300"))
+MAX_WORKERS = int(os.getenv("QILIFE_TRANSCRIBE_WORKERS", "4"))
+CACHE_DIR = Path(os.getenv(
+    "QILIFE_TRANSCRIPT_CACHE",
+    str(Path.home() / ".cache" / "qilife" / "transcripts"),
+))
+
+
+class Transcriber(ABC):
+    """Base engine: turns one short audio segment into text."""
+
+    name = "base"
+
+    def available(self) -> bool:
+        return True
+
+    @abstractmethod
+    def transcribe(self, segment: Path) -> str:
+        """Text of one segment (engines must implement this)."""
+
+
+class WhisperTranscriber(Transcriber):
+    """OpenAI Whisper. Requires OPENAI_API_KEY in environment."""
+
+    name = "whisper-1"
+
+    def __init__(self, api_key: Optional[str] = None, model: str = "whisper-1"):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.model = model
+        self.name = model
+        self._client = None
+
+    def available(self) -> bool:
+        return bool(self.api_key)
+
+    def transcribe(self, segment: Path) -> str:
+        if self._client is None:
+            from openai import OpenAI  # pip install openai
+            # retries belong to limited_call, not the SDK
+            self._client = OpenAI(api_key=self.api_key, max_retries=0)
+        from src.qai.rate_limiter import limited_call
+
+        def call():
+            with open(segment, "rb") as f:  # reopened on every retry
+                return self._client.audio.transcriptions.create(model=self.model, file=f)
+
+        # same limiter (and 429 backoff) as the chat calls
+        return limited_call(self.model, 1, call).text
+
+
+class DummyTranscriber(Transcriber):
+    """Local stand-in: deterministic text per segment, no network."""
+
+    name = "dummy"
+
+    def transcribe(self, segment: Path) -> str:
+        return f"[{segment.stem}: {segment.stat().st_size} bytes]"
+
+
+_ENGINES: Dict[str, Type[Transcriber]] = {
+    "whisper": WhisperTranscriber,
+    "dummy": DummyTranscriber,
+}
+
+
+def register_transcriber(key: str, engine_cls: Type[Transcriber]) -> None:
+    """Make an engine selectable via QILIFE_TRANSCRIBER=<key>."""
+    _ENGINES[key] = engine_cls
+
+
+def get_transcriber(key: Optional[str] = None) -> Transcriber:
+    key = (key or os.getenv("QILIFE_TRANSCRIBER", "whisper")).lower()
+    if key not in _ENGINES:
+        raise ValueError(f"Unknown transcriber '{key}'. Options: {', '.join(_ENGINES)}")
+    return _ENGINES[key]()
+
+
+def split_media(path: Path, out_dir: Path, is_video: bool = False,
+                segment_seconds: int = SEGMENT_SECONDS) -> List[Path]:
+    """Cut `path` into mono 16 kHz WAV segments under `out_dir`, in order."""
+    cmd = ["ffmpeg", "-y", "-i", str(path)]
+    if is_video:
+        cmd += ["-vn"]
+    cmd += [
+        "-ar", "16000", "-ac", "1",
+        "-f", "segment", "-segment_time", str(segment_seconds),
+        "-reset_timestamps", "1",
+        str(out_dir / "seg_%05d.wav"),
+    ]
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return sorted(out_dir.glob("seg_*.wav"))
+
+
+def _segment_key(engine: Transcriber, segment: Path) -> str:
+    h = hashlib.sha256()
+    with open(segment, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return f"{engine.name}-{h.hexdigest()}"
+
+
+def _transcribe_cached(engine: Transcriber, segment: Path,
+                       cache_dir: Optional[Path]) -> str:
+    if cache_dir is None:
+        return engine.transcribe(segment)
+
+    cached = cache_dir / f"{_segment_key(engine, segment)}.txt"
+    if cached.exists():
+        return cached.read_text(encoding="utf-8")
+
+    text = engine.transcribe(segment)
+    # a private temp file per writer: two jobs can transcribe the same segment at once
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, prefix=cached.stem, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, cached)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return text
+
+
+def transcribe_media(path: Path, is_video: bool = False,
+                     engine: Optional[Transcriber] = None,
+                     segment_seconds: int = SEGMENT_SECONDS,
+                     max_workers: int = MAX_WORKERS,
+                     cache_dir: Optional[Path] = CACHE_DIR) -> str:
+    """
+    Transcribe an audio or video file segment by segment.
+    Pass `cache_dir=None` to skip the per-segment cache.
+    """
+    engine = engine or get_transcriber()
+    if not engine.available():
+        print(f"⚠️ Transcriber '{engine.name}' unavailable – skipping {path.name}")
+        return ""
+
+    if cache_dir is not None:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(prefix="qilife_asr_") as tmp:
+        segments = split_media(path, Path(tmp), is_video, segment_seconds)
+        if not segments:
+            return ""
+        workers = max(1, min(max_workers, len(segments)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # map() yields results in submission order → segment order
+            texts = list(pool.map(
+                lambda seg: _transcribe_cached(engine, seg, cache_dir), segments
+            ))
+
+    return "\n".join(t.strip() for t in texts if t and t.strip())
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: transcriber.py /path/to/media [engine]")
+        sys.exit(1)
+    p = Path(sys.argv[1])
+    video = p.suffix.lower() in {".mp4", ".mov", ".avi", ".mkv"}
+    eng = get_transcriber(sys.argv[2]) if len(sys.argv) > 2 else None
+    print(transcribe_media(p, is_video=video, engine=eng))
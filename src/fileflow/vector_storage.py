@@ -3,6 +3,7 @@ import json
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 import sqlite3
+import threading
 from datetime import datetime
 
 # Try importing numpy with fallback
@@ -25,6 +26,7 @@ except ImportError:
     faiss = None
 
 from a_core.e_utils.ae02_logging_utils import LoggingUtils
+from src.core.write_batcher import get_batcher
 
 class VectorStorage:
     """Vector database for semantic storage and search"""
@@ -39,6 +41,9 @@ class VectorStorage:
         self.collection = None
         self.faiss_index = None
         self.metadata_db = None
+        self.metadata_db_path = None
+        # keeps FAISS positions and vector_metadata row order in step
+        self._write_lock = threading.Lock()
         
         self._initialize_storage()
     
@@ -93,6 +98,7 @@ class VectorStorage:
             
             # Create metadata database
             metadata_db_path = self.storage_path / "metadata.db"
+            self.metadata_db_path = str(metadata_db_path)
             self.metadata_db = sqlite3.connect(str(metadata_db_path), check_same_thread=False)
             
             # Create metadata table
@@ -126,6 +132,7 @@ class VectorStorage:
         """Initialize SQLite fallback for vector storage"""
         try:
             db_path = self.storage_path / "vectors.db"
+            self.metadata_db_path = str(db_path)
             self.metadata_db = sqlite3.connect(str(db_path), check_same_thread=False)
             
             cursor = self.metadata_db.cursor()
@@ -151,8 +158,8 @@ class VectorStorage:
             raise Exception(f"SQLite fallback initialization failed: {str(e)}")
     
     def store_embedding(self, embedding: List[float], content: str, 
-                       metadata: Dict[str, Any]) -> str:
-        """Store an embedding with its content and metadata"""
+                       metadata: Dict[str, Any], sync: bool = False) -> str:
+        """Store an embedding with its content and metadata (rows are group-committed)"""
         try:
             vector_id = f"vec_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
             
@@ -168,36 +175,31 @@ class VectorStorage:
                 # Add to FAISS index
                 if NUMPY_AVAILABLE and np is not None:
                     embedding_array = np.array([embedding], dtype=np.float32)
-                    self.faiss_index.add(embedding_array)
                 else:
                     # If numpy not available, fall back to SQLite storage
-                    cursor = self.metadata_db.cursor()
-                    cursor.execute("""
+                    get_batcher(self.metadata_db_path).write("""
                         INSERT INTO vectors (vector_id, embedding, content, metadata)
                         VALUES (?, ?, ?, ?)
-                    """, (vector_id, json.dumps(embedding), content, json.dumps(metadata)))
-                    self.metadata_db.commit()
+                    """, (vector_id, json.dumps(embedding), content, json.dumps(metadata)), sync=sync)
                     return vector_id
                 
-                # Store metadata
-                cursor = self.metadata_db.cursor()
-                cursor.execute("""
-                    INSERT INTO vector_metadata (vector_id, content, metadata)
-                    VALUES (?, ?, ?)
-                """, (vector_id, content, json.dumps(metadata)))
-                self.metadata_db.commit()
+                # Store metadata (search maps FAISS positions to rows by id order)
+                with self._write_lock:
+                    self.faiss_index.add(embedding_array)
+                    get_batcher(self.metadata_db_path).write("""
+                        INSERT INTO vector_metadata (vector_id, content, metadata)
+                        VALUES (?, ?, ?)
+                    """, (vector_id, content, json.dumps(metadata)), sync=sync)
                 
                 # Save FAISS index
                 index_path = self.storage_path / "faiss_index.bin"
                 faiss.write_index(self.faiss_index, str(index_path))
                 
             else:  # SQLite fallback
-                cursor = self.metadata_db.cursor()
-                cursor.execute("""
+                get_batcher(self.metadata_db_path).write("""
                     INSERT INTO vectors (vector_id, embedding, content, metadata)
                     VALUES (?, ?, ?, ?)
-                """, (vector_id, json.dumps(embedding), content, json.dumps(metadata)))
-                self.metadata_db.commit()
+                """, (vector_id, json.dumps(embedding), content, json.dumps(metadata)), sync=sync)
             
             self.logger.log_activity(
                 "embedding_stored",
@@ -367,10 +369,12 @@ class VectorStorage:
             elif self.faiss_index is not None:
                 # Reset FAISS index
                 self.faiss_index = faiss.IndexFlatL2(1536)
+                get_batcher(self.metadata_db_path).flush()
                 cursor = self.metadata_db.cursor()
                 cursor.execute("DELETE FROM vector_metadata")
                 self.metadata_db.commit()
             else:
+                get_batcher(self.metadata_db_path).flush()
                 cursor = self.metadata_db.cursor()
                 cursor.execute("DELETE FROM vectors")
                 self.metadata_db.commit()
@@ -1,54 +1,111 @@
 ## File: file_review.py
+import pandas as pd
 import streamlit as st
 
+from src.fileflow.folder_centroids import get_centroids
+
 class FileReview:
     """Component for reviewing and approving file rename suggestions"""
 
+    PAGE_SIZES = (50, 100, 250)
+    ACTIONS = ["✅ Approve", "❌ Reject"]
+
     def __init__(self, db_manager):
         self.db = db_manager
 
     def render(self):
         st.header("🔍 File Review & Approval")
-        pending = self.db.get_pending_reviews()
+        self._render_queue()
+
+        # keyset cursors of the pages visited so far; only the current page is loaded
+        if 'review_cursors' not in st.session_state:
+            st.session_state.review_cursors = [0]
+            st.session_state.review_generation = 0
+        cursors = st.session_state.review_cursors
+        page_size = st.selectbox("Rows per page", self.PAGE_SIZES, key="review_page_size")
+        # one extra row tells us whether there is a next page
+        rows = self.db.get_pending_reviews(limit=page_size + 1, after=cursors[-1])
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
 
-        if not pending:
+        if not rows:
+            if len(cursors) > 1:
+                # the rest of this page was handled; step back
+                cursors.pop()
+                st.rerun()
             st.info("✅ No files pending review")
             return
 
-        # Bulk selection
-        if 'selected_files' not in st.session_state:
-            st.session_state.selected_files = set()
-
-        for file in pending:
-            fid = file['id']
-            cols = st.columns([0.2, 2, 2, 1])
-            sel = cols[0].checkbox("", key=f"sel_{fid}", value=(fid in st.session_state.selected_files))
-            if sel:
-                st.session_state.selected_files.add(fid)
-            else:
-                st.session_state.selected_files.discard(fid)
-
-            cols[1].write(f"**{file['original_name']}**")
-            cols[2].text_input(
-                "New Name",
-                value=file['suggested_name'],
-                key=f"name_{fid}",
-                label_visibility="collapsed"
-            )
-            action = cols[3].radio(
-                "",
-                options=["✅ Approve", "❌ Reject"],
-                key=f"act_{fid}",
-                label_visibility="collapsed"
-            )
+        pending = self.db.get_database_stats()["pending_reviews"]
+        st.caption(f"Page {len(cursors)} · {len(rows)} shown · {pending} pending")
+
+        df = pd.DataFrame({
+            "select": False,
+            "original_name": [r["original_name"] for r in rows],
+            "suggested_name": [r["suggested_name"] for r in rows],
+            "action": self.ACTIONS[0],
+        }, index=[r["id"] for r in rows])
+        edited = st.data_editor(
+            df,
+            # edits are stored by row position: a new key per page/apply drops stale ones
+            key=f"review_grid_{st.session_state.review_generation}_{cursors[-1]}_{page_size}",
+            hide_index=True,
+            use_container_width=True,
+            disabled=["original_name"],
+            column_config={
+                "select": st.column_config.CheckboxColumn("✔", width="small"),
+                "original_name": st.column_config.TextColumn("Original"),
+                "suggested_name": st.column_config.TextColumn("New Name"),
+                "action": st.column_config.SelectboxColumn("Action", options=self.ACTIONS, required=True),
+            },
+        )
 
-        if st.button("Apply Actions"):
-            for fid in list(st.session_state.selected_files):
-                choice = st.session_state.get(f"act_{fid}")
-                new_name = st.session_state.get(f"name_{fid}")
-                if choice == "✅ Approve":
-                    self.db.approve_file_rename(fid, new_name)
-                else:
-                    self.db.reject_file_rename(fid)
-            st.success("Actions applied")
-            st.experimental_rerun()
+        cols = st.columns(4)
+        folders = {r["id"]: r["folder_id"] for r in rows}
+        if cols[0].button("Apply Actions"):
+            self._apply(edited[edited["select"]], folders)
+        if cols[1].button("Approve page"):
+            self._apply(edited.assign(action=self.ACTIONS[0]), folders)
+        if cols[2].button("⬅ Previous", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+        if cols[3].button("Next ➡", disabled=not has_next):
+            cursors.append(rows[-1]["seq"])
+            st.rerun()
+
+    def _apply(self, selection: "pd.DataFrame", folders: dict):
+        if selection.empty:
+            st.warning("Select at least one file")
+            return
+        batch = [(fid, "approve" if row["action"] == self.ACTIONS[0] else "reject", row["suggested_name"])
+                 for fid, row in selection.iterrows()]
+        self.db.apply_review_actions(batch)  # one transaction for the whole selection
+        approved = [(fid, folders.get(fid)) for fid, action, _ in batch
+                    if action == "approve" and folders.get(fid) is not None]
+        if approved:
+            # approved files teach their suggested folder's centroid (running mean, no retraining)
+            get_centroids().approve_many(approved)
+        st.session_state.review_generation += 1
+        st.success("Actions applied")
+        st.rerun()
+
+    def _render_queue(self):
+        """Files still waiting for processing; selected ones jump the queue."""
+        service = st.session_state.get("monitoring_service")
+        job_queue = getattr(service, "job_queue", None)
+        if job_queue is None:
+            return
+        queued = job_queue.pending_jobs(limit=200)
+        if not queued:
+            return
+        with st.expander(f"⏳ Queued for processing ({len(queued)})"):
+            picks = st.multiselect(
+                "Process these first",
+                options=[j["path"] for j in queued],
+                key="queue_priority",
+            )
+            if picks and st.button("Prioritize"):
+                n = job_queue.prioritize(picks)
+                if service.dispatcher is not None:
+                    service.dispatcher.notify()
+                st.success(f"Moved {n} file(s) to the front of the queue")
@@ -3,7 +3,7 @@
 import streamlit as st
 import os
 from pathlib import Path
-from src.monitor.file_event_monitor import FileMonitor
+from src.tools.utils.file_sniffer import effective_suffix
 
 class FolderSelector:
     """Component for selecting and managing folder monitoring"""
@@ -27,21 +27,15 @@ class FolderSelector:
                 st.success(f"✅ Valid folder: {folder}")
                 self._show_folder_stats(folder)
 
-                if not st.session_state.monitoring_active:
+                service = st.session_state.monitoring_service
+                if service.get_root(folder) is None:
                     if st.button("Start Monitoring"):
-                        monitor = FileMonitor(
-                            folder,
-                            st.session_state.db_manager,
-                            st.session_state.context_memory,
-                            st.session_state.vector_storage
-                        )
-                        monitor.start()
-                        st.session_state.file_monitor = monitor
+                        service.add_root(folder)
                         st.session_state.monitoring_active = True
                         st.session_state.selected_folder = folder
                         st.success(f"Started monitoring: {folder}")
                 else:
-                    st.info("🟢 Monitoring is already active")
+                    st.info("🟢 This folder is already being monitored")
 
             elif folder:
                 st.error("❌ Invalid folder path or not a directory")
@@ -51,28 +45,50 @@ class FolderSelector:
                 if p.exists():
                     if st.button(f"📁 {p.name}", key=f"quick_{p.name}"):
                         st.session_state.selected_folder = str(p)
-                        st.experimental_rerun()
+                        st.rerun()
 
         with col2:
             st.subheader("Status")
-            if st.session_state.monitoring_active:
-                st.success("🟢 Active")
+            service = st.session_state.monitoring_service
+            roots = [r for r in service.roots() if r.on_ready is None]
+            if roots:
+                st.success(f"🟢 Active ({len(roots)} folder{'s' if len(roots) > 1 else ''})")
+                for i, root in enumerate(roots):
+                    st.write(f"📁 `{root.path}`" + (" · polling" if root.polling else ""))
+                    backfill = root.backfill_stats
+                    if backfill:
+                        st.caption(f"Backfill: {backfill['changed']} new/changed of "
+                                   f"{backfill['scanned']} files ({backfill['seconds']}s)")
+                    else:
+                        st.caption("Backfill: scanning existing files…")
+                    if st.button("Remove", key=f"remove_root_{i}"):
+                        service.remove_root(root.path)
+                        st.rerun()
                 if st.button("Stop Monitoring"):
-                    st.session_state.file_monitor.stop()
+                    service.stop()
                     st.session_state.monitoring_active = False
                     st.success("Stopped monitoring")
             else:
+                st.session_state.monitoring_active = False
                 st.info("🔴 Inactive")
 
             st.subheader("Supported File Types")
             st.write(", ".join(sorted(self.SUPPORTED_EXTS)).upper())
 
     def _show_folder_stats(self, folder: str):
-        """Inline folder statistics without external utils."""
-        p = Path(folder)
-        total = sum(1 for _ in p.rglob('*') if _.is_file())
-        supported = sum(1 for _ in p.rglob('*') if _.suffix.lower() in self.SUPPORTED_EXTS)
-        size = sum(f.stat().st_size for f in p.rglob('*') if f.is_file())
+        """Inline folder statistics (single walk; sniffs only unknown suffixes)."""
+        total = supported = size = 0
+        for root, _, files in os.walk(folder):
+            for name in files:
+                fp = os.path.join(root, name)
+                try:
+                    size += os.stat(fp).st_size
+                except OSError:
+                    continue
+                total += 1
+                if (Path(name).suffix.lower() in self.SUPPORTED_EXTS
+                        or effective_suffix(fp) in self.SUPPORTED_EXTS):
+                    supported += 1
 
         col1, col2, col3 = st.columns(3)
         col1.metric("Total Files", total)
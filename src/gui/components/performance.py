@@ -0,0 +1,95 @@
+import pandas as pd
+import streamlit as st
+
+from src.core.metrics import REGISTRY, load_history
+
+
+class PerformancePanel:
+    """Component charting ingest latency, queue depth and throughput per stage"""
+
+    def render(self):
+        st.header("📈 Ingest Performance")
+        snapshot = REGISTRY.snapshot()
+
+        stages = [s for s in snapshot if s["name"] == "qilife_stage_seconds"]
+        if not stages:
+            st.info("No files processed in this session yet")
+        else:
+            self._render_stage_table(snapshot, stages)
+
+        kinds = [s for s in snapshot if s["name"] in ("qilife_extract_seconds", "qilife_llm_seconds")]
+        if kinds:
+            st.subheader("Extraction & LLM latency")
+            st.dataframe(pd.DataFrame([{
+                "metric": s["name"].replace("qilife_", "").replace("_seconds", ""),
+                "label": next(iter(s["labels"].values()), ""),
+                "calls": s["count"],
+                "mean (s)": round(s["value"], 3),
+                "p95 (s)": round(s["p95"], 3),
+            } for s in kinds]), use_container_width=True)
+
+        renames = {s["labels"].get("source"): s["value"] for s in snapshot
+                   if s["name"] == "qilife_rename_total"}
+        if sum(renames.values()):
+            saved = next((s["value"] for s in snapshot
+                          if s["name"] == "qilife_rename_seconds_saved_total"), 0.0)
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Named by rules", int(renames.get("rules", 0)))
+            col2.metric("LLM share", f"{renames.get('llm', 0) / sum(renames.values()):.0%}")
+            col3.metric("LLM time saved", f"{saved:.0f}s")
+
+        self._render_history()
+
+        st.download_button(
+            "Export Prometheus metrics",
+            REGISTRY.to_prometheus(),
+            file_name="qilife_metrics.prom",
+            mime="text/plain",
+        )
+
+    def _render_stage_table(self, snapshot, stages):
+        def by_stage(name):
+            return {s["labels"].get("stage"): s["value"] for s in snapshot if s["name"] == name}
+
+        processed = by_stage("qilife_stage_processed_total")
+        errors = by_stage("qilife_stage_errors_total")
+        depth = by_stage("qilife_stage_queue_depth")
+        df = pd.DataFrame([{
+            "stage": s["labels"]["stage"],
+            "processed": int(processed.get(s["labels"]["stage"], 0)),
+            "errors": int(errors.get(s["labels"]["stage"], 0)),
+            "queue": int(depth.get(s["labels"]["stage"], 0)),
+            "mean (s)": round(s["value"], 3),
+            "p50 (s)": round(s["p50"], 3),
+            "p95 (s)": round(s["p95"], 3),
+            "busy (s)": round(s["sum"], 1),
+        } for s in stages])
+        df["error rate"] = (df["errors"] / (df["processed"] + df["errors"]).clip(lower=1)).round(3)
+
+        st.subheader("Pipeline stages")
+        st.dataframe(df, use_container_width=True)
+        # the stage with the most busy time is the bottleneck
+        st.bar_chart(df.set_index("stage")["busy (s)"])
+
+    def _render_history(self):
+        window = st.selectbox("History", ["1 hour", "6 hours", "24 hours"], key="perf_window")
+        seconds = {"1 hour": 3600, "6 hours": 6 * 3600, "24 hours": 24 * 3600}[window]
+
+        done = load_history("qilife_stage_processed_total", seconds)
+        if done:
+            df = pd.DataFrame([{"ts": r["ts"], "stage": r["labels"].get("stage"), "value": r["value"]}
+                               for r in done])
+            df = df.pivot_table(index="ts", columns="stage", values="value").sort_index()
+            rate = df.diff().div(df.index.to_series().diff(), axis=0).clip(lower=0)
+            rate.index = pd.to_datetime(rate.index, unit="s")
+            st.subheader("Throughput (files/s)")
+            st.line_chart(rate.dropna(how="all"))
+
+        depth = load_history("qilife_stage_queue_depth", seconds)
+        if depth:
+            df = pd.DataFrame([{"ts": r["ts"], "stage": r["labels"].get("stage"), "value": r["value"]}
+                               for r in depth])
+            df = df.pivot_table(index="ts", columns="stage", values="value").sort_index()
+            df.index = pd.to_datetime(df.index, unit="s")
+            st.subheader("Queue depth")
+            st.line_chart(df)
@@ -0,0 +1,193 @@
+"""
+src/monitor/backfill.py
+
+Initial backfill for a monitored folder.
+
+Walks the tree with os.scandir across a thread pool and compares each
+file's (size, mtime) with the `file_manifest` table. Only new or changed
+files are enqueued on the JobQueue, so re-scanning a large folder that
+was already ingested costs a directory walk and one manifest read.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.core.write_batcher import get_batcher
+from src.fileflow.job_queue import DB_PATH, JobQueue
+
+Entry = Tuple[str, int, int]  # path, size, mtime_ns
+
+
+def _create_manifest(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS file_manifest (
+            path      TEXT PRIMARY KEY,
+            size      INTEGER NOT NULL,
+            mtime_ns  INTEGER NOT NULL,
+            seen_at   REAL NOT NULL
+        )
+        """
+    )
+
+
+class BackfillScanner:
+    """Enqueue files under `root` that are missing from, or differ from, the manifest."""
+
+    def __init__(self, root: str, job_queue: JobQueue, db_path: Path = DB_PATH,
+                 workers: int = 8, skip: Optional[Callable[[str], bool]] = None):
+        self.root = os.path.abspath(root)
+        self.job_queue = job_queue
+        self.db_path = str(db_path)
+        self.workers = workers
+        self.skip = skip
+        self._init_tables()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _init_tables(self) -> None:
+        with self._connect() as conn:
+            _create_manifest(conn)
+
+    def _load_manifest(self) -> Dict[str, Tuple[int, int]]:
+        prefix = self.root.rstrip(os.sep) + os.sep
+        # prefix range scan on the primary key instead of LIKE
+        hi = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT path, size, mtime_ns FROM file_manifest WHERE path >= ? AND path < ?",
+                (prefix, hi),
+            ).fetchall()
+        return {p: (s, m) for p, s, m in rows}
+
+    def _scan_dir(self, path: str) -> Tuple[List[Entry], List[str]]:
+        files: List[Entry] = []
+        dirs: List[str] = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.name.startswith("."):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            if self.skip is not None and self.skip(entry.path):
+                                continue
+                            st = entry.stat(follow_symlinks=False)
+                            files.append((entry.path, st.st_size, st.st_mtime_ns))
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"⚠️ Backfill cannot read {path}: {e}")
+        return files, dirs
+
+    def walk(self) -> List[Entry]:
+        """Parallel directory walk; returns every regular file under root."""
+        found: List[Entry] = []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = {pool.submit(self._scan_dir, self.root)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    files, dirs = fut.result()
+                    found.extend(files)
+                    pending.update(pool.submit(self._scan_dir, d) for d in dirs)
+        return found
+
+    def run(self) -> dict:
+        """Scan, enqueue new/changed files and refresh the manifest."""
+        t0 = time.perf_counter()
+        manifest = self._load_manifest()
+        entries = self.walk()
+        changed = [e for e in entries if manifest.get(e[0]) != (e[1], e[2])]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(
+                lambda e: self.job_queue.try_enqueue(e[0], root=self.root, size=e[1]), changed))
+        enqueued = sum(1 for jid, _ in results if jid is not None)
+        # unreadable/locked files stay out of the manifest so the next scan retries them
+        recorded = [e for e, (_, readable) in zip(changed, results) if readable]
+
+        seen = {e[0] for e in entries}
+        removed = [p for p in manifest if p not in seen]
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO file_manifest (path, size, mtime_ns, seen_at) "
+                "VALUES (?, ?, ?, ?)",
+                [(p, s, m, now) for p, s, m in recorded],
+            )
+            conn.executemany("DELETE FROM file_manifest WHERE path = ?", [(p,) for p in removed])
+
+        stats = {
+            "root": self.root,
+            "scanned": len(entries),
+            "changed": len(changed),
+            "enqueued": enqueued,
+            "unreadable": len(changed) - len(recorded),
+            "removed": len(removed),
+            "seconds": round(time.perf_counter() - t0, 2),
+        }
+        print(f"🗂 Backfill {self.root}: {stats['scanned']} files, "
+              f"{stats['changed']} new/changed, {stats['enqueued']} queued "
+              f"in {stats['seconds']}s")
+        return stats
+
+    def run_in_background(self, on_done: Optional[Callable[[dict], None]] = None) -> threading.Thread:
+        def _target():
+            try:
+                stats = self.run()
+            except Exception as e:
+                print(f"❌ Backfill failed for {self.root}: {e}")
+                return
+            if on_done is not None:
+                on_done(stats)
+
+        t = threading.Thread(target=_target, name=f"backfill-{os.path.basename(self.root)}",
+                             daemon=True)
+        t.start()
+        return t
+
+
+def forget_manifest(paths, db_path: Path = DB_PATH) -> None:
+    """Drop manifest rows so the next backfill treats these files as new."""
+    try:
+        with sqlite3.connect(str(db_path), timeout=30) as conn:
+            conn.executemany("DELETE FROM file_manifest WHERE path = ?", [(p,) for p in paths])
+    except sqlite3.OperationalError:
+        pass  # no backfill has run against this database yet
+
+
+def init_manifest(db_path: Path = DB_PATH) -> None:
+    """Create the manifest table, for writers that may run before any backfill."""
+    with sqlite3.connect(str(db_path), timeout=30) as conn:
+        _create_manifest(conn)
+
+
+def record_manifest(paths, db_path: Path = DB_PATH) -> None:
+    """
+    Upsert the current (size, mtime) of `paths`, so the next backfill skips
+    files the pipeline has already handled (watcher jobs, auto_apply moves).
+    Files that are gone by now are left out.
+    """
+    now = time.time()
+    batcher = get_batcher(str(db_path))
+    for p in paths:
+        try:
+            st = os.stat(p)
+        except OSError:
+            continue
+        batcher.write(
+            "INSERT OR REPLACE INTO file_manifest (path, size, mtime_ns, seen_at) "
+            "VALUES (?, ?, ?, ?)",
+            (str(p), st.st_size, st.st_mtime_ns, now),
+        )
@@ -1,46 +1,141 @@
+import os
+import threading
 import time
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-from src.fileflow.mover import run_full_pipeline
+from typing import Callable, Dict, Optional
+
+
+# Partial-download names that will be renamed once complete (→ on_moved).
+TEMP_SUFFIXES = (".crdownload", ".part", ".partial", ".download", ".tmp", ".swp")
+TEMP_PREFIXES = ("~$", ".~lock", ".goutputstream")
+
+
+def is_temp_file(path: str) -> bool:
+    name = os.path.basename(path).lower()
+    return name.endswith(TEMP_SUFFIXES) or name.startswith(TEMP_PREFIXES)
+
+
+class EventCoalescer:
+    """
+    Merges bursts of created/modified/moved events per path and releases a
+    path once its size and mtime have been stable for `stable_checks`
+    consecutive polls after `quiet_seconds` without events. Only stat() is
+    used, the file is never opened while it is still being written.
+    """
+
+    def __init__(self, on_ready: Callable[[str], None], quiet_seconds: float = 2.0,
+                 poll_interval: float = 0.5, stable_checks: int = 2):
+        self.on_ready = on_ready
+        self.quiet_seconds = quiet_seconds
+        self.poll_interval = poll_interval
+        self.stable_checks = stable_checks
+        # path → [last_event, size, mtime_ns, stable_count]
+        self._pending: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def touch(self, path: str) -> None:
+        """Record an event for `path` (cheap; safe from the observer thread)."""
+        with self._lock:
+            entry = self._pending.get(path)
+            if entry is None:
+                self._pending[path] = [time.monotonic(), -1, -1, 0]
+            else:
+                entry[0] = time.monotonic()
+                entry[3] = 0
+
+    def discard(self, path: str) -> None:
+        with self._lock:
+            self._pending.pop(path, None)
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="event-coalescer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            for path in self._poll():
+                try:
+                    self.on_ready(path)
+                except Exception as e:
+                    print(f"❌ Dispatch error for {path}: {e}")
+
+    def _poll(self) -> list:
+        now = time.monotonic()
+        with self._lock:
+            due = [(p, e) for p, e in self._pending.items() if now - e[0] >= self.quiet_seconds]
+        ready = []
+        for path, entry in due:
+            try:
+                st = os.stat(path)
+            except OSError:
+                self.discard(path)  # deleted or moved away before settling
+                continue
+            with self._lock:
+                if self._pending.get(path) is not entry:
+                    continue
+                if (st.st_size, st.st_mtime_ns) == (entry[1], entry[2]):
+                    entry[3] += 1
+                else:
+                    entry[1], entry[2], entry[3] = st.st_size, st.st_mtime_ns, 0
+                if entry[3] >= self.stable_checks:
+                    del self._pending[path]
+                    ready.append(path)
+        return ready
+
 
 class FileMonitor:
     """
-    Watches a folder for new files and triggers the fileflow pipeline on each.
+    Watches one folder and feeds new files to the fileflow pipeline.
+
+    Thin single-root wrapper over MonitoringService: events are coalesced
+    until files settle, persisted in the JobQueue and processed by a
+    long-lived Pipeline; existing files are backfilled on start(). To watch
+    several folders, add roots to `monitoring_service.get_service()` instead.
     """
 
-    def __init__(self, folder_path: str, db_manager, context_memory, vector_storage):
+    def __init__(self, folder_path: str, db_manager, context_memory, vector_storage,
+                 quiet_seconds: float = 2.0, pipeline_options: Optional[dict] = None,
+                 job_queue=None, backfill: bool = True, polling: Optional[bool] = None):
+        from src.monitor.monitoring_service import MonitoringService
         self.folder_path = folder_path
-        self.db_manager = db_manager
-        self.context_memory = context_memory
-        self.vector_storage = vector_storage
-        self.observer = Observer()
+        self.polling = polling
+        self.service = MonitoringService(db_manager, context_memory, vector_storage,
+                                         job_queue=job_queue, quiet_seconds=quiet_seconds,
+                                         pipeline_options=pipeline_options, backfill=backfill)
+        self.root = None
+
+    @property
+    def job_queue(self):
+        return self.service.job_queue
+
+    @property
+    def dispatcher(self):
+        return self.service.dispatcher
+
+    @property
+    def pipeline(self):
+        return self.service.pipeline
+
+    @property
+    def backfill_stats(self) -> Optional[dict]:
+        return self.root.backfill_stats if self.root is not None else None
 
     def start(self):
-        handler = self._EventHandler(self)
-        self.observer.schedule(handler, self.folder_path, recursive=True)
-        self.observer.start()
+        self.root = self.service.add_root(self.folder_path, polling=self.polling)
         print(f"📁 Started monitoring: {self.folder_path}")
 
     def stop(self):
-        self.observer.stop()
-        self.observer.join()
+        self.service.stop()
         print(f"🛑 Stopped monitoring: {self.folder_path}")
-
-    class _EventHandler(FileSystemEventHandler):
-        def __init__(self, monitor):
-            self.monitor = monitor
-
-        def on_created(self, event):
-            if not event.is_directory:
-                filepath = event.src_path
-                print(f"🆕 Detected file: {filepath}")
-                try:
-                    run_full_pipeline(
-                        filepath,
-                        self.monitor.db_manager,
-                        self.monitor.context_memory,
-                        self.monitor.vector_storage
-                    )
-                except Exception as e:
-                    print(f"❌ Pipeline error for {filepath}: {e}")
-# TODO
@@ -0,0 +1,345 @@
+"""
+src/monitor/monitoring_service.py
+
+One monitoring service for every watched folder.
+
+A single native watchdog Observer (plus one AdaptivePollingObserver, only
+if some root needs polling) serves all roots, and one EventCoalescer,
+JobQueue and JobDispatcher sit behind them. Each root brings its own
+rules (include/exclude globs), and either a callback or the ingest
+pipeline: roots share one Pipeline unless they ask for their own
+`pipeline_options`. Roots can be added and removed while running, so
+watching another folder adds a watch, not another set of threads.
+
+    service = get_service()
+    service.attach_stores(db_manager, context_memory, vector_storage)
+    service.add_root("/home/me/Downloads")
+    service.add_root(str(Path.home() / "My Drive"), weight=0.5)   # polled
+"""
+
+import fnmatch
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from src.core.write_batcher import flush_all
+from src.fileflow.job_queue import Job, JobDispatcher, JobQueue
+from src.fileflow.mover import Pipeline, is_own_write
+from src.monitor.backfill import BackfillScanner, forget_manifest, init_manifest, record_manifest
+from src.monitor.file_event_monitor import EventCoalescer, is_temp_file
+from src.monitor.polling_observer import AdaptivePollingObserver, needs_polling
+
+
+@dataclass(frozen=True)
+class RootRules:
+    """Which files under a root are of interest; globs match the file name."""
+    include: Sequence[str] = ()
+    exclude: Sequence[str] = ()
+
+    def accepts(self, path: str) -> bool:
+        name = os.path.basename(path)
+        if is_temp_file(path):
+            return False
+        if self.include and not any(fnmatch.fnmatch(name, p) for p in self.include):
+            return False
+        return not any(fnmatch.fnmatch(name, p) for p in self.exclude)
+
+
+class WatchedRoot:
+    """Handle returned by add_root(); `stop()` removes the root again."""
+
+    def __init__(self, service: "MonitoringService", path: str, rules: RootRules,
+                 recursive: bool, polling: bool,
+                 on_ready: Optional[Callable[[str], None]], pipeline: Optional[Pipeline]):
+        self.service = service
+        self.path = path
+        self.rules = rules
+        self.recursive = recursive
+        self.polling = polling
+        self.on_ready = on_ready
+        self.pipeline = pipeline  # None → shared pipeline (or callback root)
+        self.backfill_stats: Optional[dict] = None
+        self.watch = None
+
+    def stop(self) -> None:
+        self.service.remove_root(self.path)
+
+    def __repr__(self) -> str:
+        kind = "callback" if self.on_ready else "pipeline"
+        return f"WatchedRoot({self.path!r}, {kind}, polling={self.polling})"
+
+
+class _RootHandler(FileSystemEventHandler):
+    def __init__(self, service: "MonitoringService", root: WatchedRoot):
+        self.service = service
+        self.root = root
+
+    def _track(self, path: str):
+        if self.root.rules.accepts(path):
+            self.service.coalescer.touch(path)
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._track(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._track(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.service.coalescer.discard(event.src_path)
+            self._track(event.dest_path)
+
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self.service.coalescer.discard(event.src_path)
+
+
+class MonitoringService:
+    """Shared observers, coalescer, job queue and pipeline(s) for many roots."""
+
+    def __init__(self, db_manager=None, context_memory=None, vector_storage=None,
+                 job_queue: Optional[JobQueue] = None, quiet_seconds: float = 2.0,
+                 pipeline_options: Optional[dict] = None, backfill: bool = True):
+        self.db_manager = db_manager
+        self.context_memory = context_memory
+        self.vector_storage = vector_storage
+        self.pipeline_options = pipeline_options or {}
+        self.backfill = backfill
+        self.job_queue = job_queue
+        self.pipeline: Optional[Pipeline] = None
+        self.dispatcher: Optional[JobDispatcher] = None
+        self.coalescer = EventCoalescer(self._on_ready, quiet_seconds=quiet_seconds)
+        # enqueue() hashes the whole file; keep that off the coalescer thread
+        self._enqueuer = ThreadPoolExecutor(max_workers=2, thread_name_prefix="enqueue")
+        self._observer = None
+        self._poller: Optional[AdaptivePollingObserver] = None
+        self._roots: Dict[str, WatchedRoot] = {}
+        self._lock = threading.RLock()
+        self._started = False
+
+    def attach_stores(self, db_manager, context_memory, vector_storage) -> None:
+        """Set the stores pipeline roots write to (before the first pipeline root)."""
+        self.db_manager = db_manager
+        self.context_memory = context_memory
+        self.vector_storage = vector_storage
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self) -> "MonitoringService":
+        """
+        Start the coalescer and, once stores are attached, the pipeline and
+        dispatcher, so jobs left in the queue by a previous run resume
+        before any root is added again.
+        """
+        with self._lock:
+            if not self._started:
+                self.coalescer.start()
+                self._started = True
+            if self.db_manager is not None:
+                self._ensure_pipeline()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stop every pipeline root and drain the pipelines; add_root() starts
+        them up again and queued jobs are kept. Callback roots (such as the
+        folder_rules.json watch) keep running: the observers and the
+        coalescer only stop once no root is left.
+        """
+        with self._lock:
+            roots = [r for r in self._roots.values() if r.on_ready is None]
+            for root in roots:
+                del self._roots[root.path]
+            idle = not self._roots
+            observers = [o for o in (self._observer, self._poller) if o is not None]
+            if idle:
+                self._observer = self._poller = None
+        if idle:
+            for o in observers:
+                o.stop()
+            for o in observers:
+                o.join()
+            if self._started:
+                self.coalescer.stop()
+                self._started = False
+        else:
+            for root in roots:
+                observer = self._poller if root.polling else self._observer
+                if observer is not None and root.watch is not None:
+                    observer.unschedule(root.watch)
+        if self.dispatcher is not None:
+            self.dispatcher.stop()
+        for root in roots:
+            if root.pipeline is not None:
+                root.pipeline.close()
+        if self.pipeline is not None:
+            self.pipeline.close()
+        self.pipeline = self.dispatcher = None
+        flush_all()
+        print(f"🛑 Monitoring service stopped ({len(roots)} root(s))")
+
+    # -- roots -------------------------------------------------------------
+
+    def roots(self) -> List[WatchedRoot]:
+        with self._lock:
+            return list(self._roots.values())
+
+    def get_root(self, path: str) -> Optional[WatchedRoot]:
+        return self._roots.get(os.path.abspath(path))
+
+    def add_root(self, path: str, rules: Optional[RootRules] = None, recursive: bool = True,
+                 on_ready: Optional[Callable[[str], None]] = None,
+                 pipeline_options: Optional[dict] = None, polling: Optional[bool] = None,
+                 weight: Optional[float] = None, backfill: Optional[bool] = None) -> WatchedRoot:
+        """
+        Start watching `path`. Settled files are passed to `on_ready(path)` if
+        given, otherwise queued for the ingest pipeline (the shared one, or a
+        dedicated one built from `pipeline_options`).
+        """
+        path = os.path.abspath(path)
+        if not os.path.isdir(path):
+            raise ValueError(f"Not a directory: {path}")
+        self.start()
+        with self._lock:
+            if path in self._roots:
+                raise ValueError(f"Already watching: {path}")
+            if polling is None:
+                polling = needs_polling(path)
+            dedicated = None
+            if on_ready is None:
+                self._ensure_pipeline()
+                if pipeline_options:
+                    dedicated = Pipeline(self.db_manager, self.context_memory, self.vector_storage,
+                                         **{**self.pipeline_options, **pipeline_options}).start()
+                    dedicated.add_done_callback(self._on_job_done)
+                    self.dispatcher.attach(dedicated)
+                if weight is not None:
+                    self.job_queue.set_root_weight(path, weight)
+            root = WatchedRoot(self, path, rules or RootRules(), recursive, polling,
+                               on_ready, dedicated)
+            root.watch = self._observer_for(polling).schedule(
+                _RootHandler(self, root), path, recursive=recursive)
+            self._roots[path] = root
+
+        print(f"📁 Watching {path}{' (polling)' if polling else ''}")
+        if on_ready is None and (self.backfill if backfill is None else backfill):
+            skip = lambda p: not root.rules.accepts(p)
+            BackfillScanner(path, self.job_queue, skip=skip).run_in_background(
+                lambda stats: self._on_backfill_done(root, stats))
+        return root
+
+    def remove_root(self, path: str, cancel_pending: bool = True) -> None:
+        """Stop watching `path`; its queued-but-unstarted jobs are dropped by default."""
+        path = os.path.abspath(path)
+        with self._lock:
+            root = self._roots.pop(path, None)
+            if root is None:
+                return
+            observer = self._poller if root.polling else self._observer
+        if observer is not None and root.watch is not None:
+            observer.unschedule(root.watch)
+        if root.on_ready is None and cancel_pending and self.job_queue is not None:
+            # so a later add_root() backfills them again
+            forget_manifest(self.job_queue.cancel_pending(path), self.job_queue.db_path)
+        if root.pipeline is not None:
+            root.pipeline.close()
+        print(f"🛑 Stopped watching {path}")
+
+    # -- internals ---------------------------------------------------------
+
+    def _observer_for(self, polling: bool):
+        if polling:
+            if self._poller is None:
+                self._poller = AdaptivePollingObserver()
+                self._poller.start()
+            return self._poller
+        if self._observer is None:
+            self._observer = Observer()
+            self._observer.start()
+        return self._observer
+
+    def _ensure_pipeline(self) -> None:
+        if self.pipeline is not None:
+            return
+        self.job_queue = self.job_queue or JobQueue()
+        self.job_queue.recover_stale()
+        init_manifest(self.job_queue.db_path)
+        self.pipeline = Pipeline(self.db_manager, self.context_memory, self.vector_storage,
+                                 **self.pipeline_options).start()
+        self.pipeline.add_done_callback(self._on_job_done)
+        self.dispatcher = JobDispatcher(self.job_queue, self.pipeline, router=self._route)
+        self.dispatcher.start()
+
+    def _root_for(self, path: str) -> Optional[WatchedRoot]:
+        """Innermost root that watches `path`: under it, within its depth, accepted by its rules."""
+        best = None
+        with self._lock:
+            for root in self._roots.values():
+                if root.recursive:
+                    inside = path.startswith(root.path.rstrip(os.sep) + os.sep)
+                else:
+                    inside = os.path.dirname(path) == root.path
+                if inside and root.rules.accepts(path) \
+                        and (best is None or len(root.path) > len(best.path)):
+                    best = root
+        return best
+
+    def _route(self, job: Job) -> Pipeline:
+        root = self._roots.get(job.root)
+        return root.pipeline if root is not None and root.pipeline is not None else self.pipeline
+
+    def _on_ready(self, path: str) -> None:
+        root = self._root_for(path)
+        if root is None:
+            return  # root removed while the file was settling
+        if root.on_ready is not None:
+            root.on_ready(path)
+        elif is_own_write(path):
+            return  # a pipeline renamed/moved it here; it was ingested under its old name
+        else:
+            self._enqueuer.submit(self._enqueue, path, root.path)
+
+    def _enqueue(self, path: str, root: str) -> None:
+        if self.job_queue.enqueue(path, root=root) is not None:
+            print(f"🆕 Queued: {path}")
+            dispatcher = self.dispatcher
+            if dispatcher is not None:  # stopped meanwhile: the job waits in the queue
+                dispatcher.notify()
+
+    def _on_job_done(self, job) -> None:
+        # keep the backfill manifest current, or a restart would rehash every
+        # watcher-queued file and re-ingest whatever auto_apply moved
+        if job.job_id is None:
+            return
+        db_path = self.job_queue.db_path
+        if job.final_path is not None:
+            record_manifest([job.final_path], db_path)
+            if job.final_path != job.path:
+                forget_manifest([str(job.path)], db_path)
+        elif job.error is None:
+            record_manifest([job.path], db_path)
+
+    def _on_backfill_done(self, root: WatchedRoot, stats: dict) -> None:
+        root.backfill_stats = stats
+        if self.dispatcher is not None:
+            self.dispatcher.notify()
+
+
+_service: Optional[MonitoringService] = None
+_service_lock = threading.Lock()
+
+
+def get_service() -> MonitoringService:
+    """Process-wide service shared by the UI and config.rules.watch_rules."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = MonitoringService()
+        return _service
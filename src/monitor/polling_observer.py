@@ -0,0 +1,296 @@
+"""
+src/monitor/polling_observer.py
+
+Adaptive polling observer for folders where native change notifications are
+unreliable (Google Drive / "My Drive", OneDrive, SMB and NFS mounts).
+
+Drop-in for watchdog's Observer (schedule / start / stop / join) that
+dispatches the same watchdog events to the same handlers. Each poll costs
+one stat() per directory; only directories whose mtime changed are listed
+again, so the work grows with churn rather than with the number of files.
+Files that changed recently stay "hot" and are re-stat'ed every poll until
+they settle, and a full re-stat runs every `full_scan_every` polls to catch
+in-place edits that don't touch the directory mtime.
+
+The interval drops to `min_interval` after any change and backs off towards
+`max_interval` while the tree is idle.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from watchdog.events import (
+    FileCreatedEvent,
+    FileDeletedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+)
+
+try:
+    import psutil  # pip install psutil
+except ImportError:
+    psutil = None
+
+# Path fragments of sync clients whose virtual drives drop or delay events.
+CLOUD_MARKERS = ("My Drive", "Google Drive", "GoogleDrive", "CloudStorage",
+                 "OneDrive", "Shared drives")
+NETWORK_FSTYPES = ("nfs", "nfs4", "cifs", "smbfs", "smb3", "afpfs", "webdav",
+                   "davfs", "fuse", "fuseblk", "9p")
+
+FileStat = Tuple[int, int, int]  # size, mtime_ns, inode
+
+
+def needs_polling(path: str) -> bool:
+    """
+    True if `path` should be polled instead of watched natively.
+    QILIFE_POLLING=1/0 forces the choice.
+    """
+    forced = os.getenv("QILIFE_POLLING")
+    if forced is not None:
+        return forced.strip().lower() in ("1", "true", "yes")
+    path = os.path.abspath(path)
+    if any(m in path for m in CLOUD_MARKERS):
+        return True
+    if psutil is None:
+        return False
+    best, fstype = "", ""
+    for part in psutil.disk_partitions(all=True):
+        mp = part.mountpoint
+        if path.startswith(mp) and len(mp) > len(best):
+            best, fstype = mp, part.fstype.lower()
+    return fstype.startswith(NETWORK_FSTYPES) or path.startswith("\\\\")
+
+
+class _Snapshot:
+    """Incremental stat snapshot of one watched tree."""
+
+    def __init__(self, root: str, recursive: bool = True):
+        self.root = os.path.abspath(root)
+        self.recursive = recursive
+        self.dirs: Dict[str, int] = {}                # dir → mtime_ns
+        self.files: Dict[str, FileStat] = {}
+        self.children: Dict[str, Set[str]] = {}       # dir → file paths
+        self.subdirs: Dict[str, Set[str]] = {}        # dir → dir paths
+        self.hot: Dict[str, float] = {}               # file → last change (monotonic)
+        self._add_tree(self.root, [])
+
+    @staticmethod
+    def _stat(path: str) -> Optional[FileStat]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns, st.st_ino
+
+    def _list(self, d: str) -> Tuple[Dict[str, FileStat], List[str]]:
+        files: Dict[str, FileStat] = {}
+        dirs: List[str] = []
+        try:
+            with os.scandir(d) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.recursive:
+                                dirs.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            st = entry.stat(follow_symlinks=False)
+                            files[entry.path] = (st.st_size, st.st_mtime_ns, st.st_ino)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return files, dirs
+
+    def _add_tree(self, d: str, created: List[str]) -> None:
+        try:
+            self.dirs[d] = os.stat(d).st_mtime_ns
+        except OSError:
+            return
+        files, dirs = self._list(d)
+        self.files.update(files)
+        self.children[d] = set(files)
+        self.subdirs[d] = set(dirs)
+        created.extend(files)
+        for sub in dirs:
+            self._add_tree(sub, created)
+
+    def _drop_tree(self, d: str, deleted: Dict[str, Optional[FileStat]]) -> None:
+        self.dirs.pop(d, None)
+        for f in self.children.pop(d, ()):
+            self.hot.pop(f, None)
+            deleted[f] = self.files.pop(f, None)
+        for sub in self.subdirs.pop(d, ()):
+            self._drop_tree(sub, deleted)
+
+    def poll(self, full: bool = False, hot_seconds: float = 30.0):
+        """
+        Return (created, deleted, modified) since the last poll: lists of
+        paths, except `deleted`, which maps each path to its last known stat
+        (the caller pairs inodes to spot renames).
+        """
+        created: List[str] = []
+        deleted: Dict[str, Optional[FileStat]] = {}
+        modified: List[str] = []
+
+        changed = []
+        for d, mtime in list(self.dirs.items()):
+            try:
+                now_mtime = os.stat(d).st_mtime_ns
+            except OSError:
+                continue  # gone; its parent's mtime changed too and handles it
+            if now_mtime != mtime:
+                changed.append(d)
+
+        for d in changed:
+            if d not in self.dirs:
+                continue  # dropped with an ancestor earlier in this loop
+            try:
+                self.dirs[d] = os.stat(d).st_mtime_ns
+            except OSError:
+                continue
+            files, dirs = self._list(d)
+            old_files = self.children.get(d, set())
+            for f in old_files - files.keys():
+                self.hot.pop(f, None)
+                deleted[f] = self.files.pop(f, None)
+            for f, st in files.items():
+                prev = self.files.get(f)
+                if prev is None:
+                    created.append(f)
+                elif prev != st:
+                    modified.append(f)
+                self.files[f] = st
+            self.children[d] = set(files)
+            old_dirs = self.subdirs.get(d, set())
+            for sub in old_dirs - set(dirs):
+                self._drop_tree(sub, deleted)
+            for sub in set(dirs) - old_dirs:
+                self._add_tree(sub, created)
+            self.subdirs[d] = set(dirs)
+
+        now = time.monotonic()
+        seen = set(created) | set(modified) | set(deleted)
+        recheck = self.files if full else [f for f, t in self.hot.items()
+                                           if now - t < hot_seconds]
+        for f in list(recheck):
+            if f in seen:
+                continue
+            st = self._stat(f)
+            if st is None:
+                continue  # deletion shows up through the directory listing
+            if st != self.files.get(f):
+                self.files[f] = st
+                modified.append(f)
+
+        for f in created + modified:
+            self.hot[f] = now
+        for f in [f for f, t in self.hot.items() if now - t >= hot_seconds]:
+            del self.hot[f]
+        return created, deleted, modified
+
+
+class _Watch:
+    def __init__(self, handler, path: str, recursive: bool):
+        self.handler = handler
+        self.path = path
+        self.recursive = recursive
+        self.snapshot: Optional[_Snapshot] = None   # built on the observer thread
+
+
+class AdaptivePollingObserver(threading.Thread):
+    """watchdog-compatible observer that polls incremental stat snapshots."""
+
+    def __init__(self, min_interval: float = 1.0, max_interval: float = 30.0,
+                 backoff: float = 1.5, full_scan_every: int = 20,
+                 hot_seconds: float = 30.0):
+        super().__init__(name="polling-observer", daemon=True)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.full_scan_every = full_scan_every
+        self.hot_seconds = hot_seconds
+        self.interval = min_interval
+        self.polls = 0
+        self._watches: List[_Watch] = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._wake = threading.Event()
+
+    def schedule(self, event_handler, path: str, recursive: bool = False) -> _Watch:
+        """Add a watch; its baseline (no events for existing files) is walked on the observer thread."""
+        watch = _Watch(event_handler, os.path.abspath(path), recursive)
+        with self._lock:
+            self._watches.append(watch)
+        self._wake.set()
+        return watch
+
+    def unschedule(self, watch: _Watch) -> None:
+        with self._lock:
+            if watch in self._watches:
+                self._watches.remove(watch)
+
+    def unschedule_all(self) -> None:
+        with self._lock:
+            self._watches.clear()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+
+    def _build_baselines(self, watches: List[_Watch]) -> None:
+        for watch in watches:
+            if watch.snapshot is None:
+                try:
+                    watch.snapshot = _Snapshot(watch.path, watch.recursive)
+                except Exception as e:
+                    print(f"❌ Polling error for {watch.path}: {e}")
+
+    def run(self) -> None:
+        while True:
+            woken = self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+            with self._lock:
+                watches = list(self._watches)
+            self._build_baselines(watches)
+            if woken:
+                continue  # a new watch, not a poll tick
+            watches = [w for w in watches if w.snapshot is not None]
+            self.polls += 1
+            full = self.full_scan_every > 0 and self.polls % self.full_scan_every == 0
+            activity = False
+            for watch in watches:
+                try:
+                    activity |= self._poll_watch(watch, full)
+                except Exception as e:
+                    print(f"❌ Polling error for {watch.path}: {e}")
+            if activity:
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.interval * self.backoff, self.max_interval)
+
+    def _poll_watch(self, watch: _Watch, full: bool) -> bool:
+        snap = watch.snapshot
+        created, deleted, modified = snap.poll(full=full, hot_seconds=self.hot_seconds)
+        if not (created or deleted or modified):
+            return False
+
+        # a delete and a create of the same inode in one poll is a rename
+        by_inode = {st[2]: f for f, st in deleted.items() if st and st[2]}
+        events = []
+        for f in created:
+            src = by_inode.pop(snap.files[f][2], None) if f in snap.files else None
+            if src is not None:
+                events.append(FileMovedEvent(src, f))
+            else:
+                events.append(FileCreatedEvent(f))
+        moved_from = {e.src_path for e in events if isinstance(e, FileMovedEvent)}
+        events = [FileDeletedEvent(f) for f in deleted if f not in moved_from] + events
+        events += [FileModifiedEvent(f) for f in modified]
+
+        for event in events:
+            watch.handler.dispatch(event)
+        return True
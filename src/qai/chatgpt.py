@@ -1,14 +1,101 @@
 # src/ai/chatgpt.py
+"""
+Shared OpenAI clients for chat calls.
 
-from openai import OpenAI
-from src.config.env import get_config
+Clients are built on first use (importing this module does no config I/O
+and needs no key) and reuse one pooled HTTP connection pool each, with
+request timeouts. `ask_gpt_async` lets many rename/digest calls run
+concurrently from one event loop; the shared rate limiter still paces them.
 
-client = OpenAI(api_key=get_config().get("OPENAI_API_KEY"))
+QILIFE_LLM_TIMEOUT (seconds, default 60) and QILIFE_LLM_POOL (connections,
+default 20) tune the clients.
+"""
 
-def ask_gpt(prompt: str, model="gpt-4", temp=0.3) -> str:
-    response = client.chat.completions.create(
-        model=model,
-        messages=[{"role": "user", "content": prompt}],
+import asyncio
+import os
+import threading
+import weakref
+from typing import Callable, Optional
+
+from src.qai.response_cache import cached_chat, cached_chat_async
+
+TIMEOUT = float(os.getenv("QILIFE_LLM_TIMEOUT", "60"))
+CONNECT_TIMEOUT = 10.0
+POOL_SIZE = int(os.getenv("QILIFE_LLM_POOL", "20"))
+
+_client = None
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_client_lock = threading.Lock()
+
+
+def _api_key() -> Optional[str]:
+    from src.config.env import get_value
+    return get_value("OPENAI_API_KEY") or get_value("OPENAI_API_KEY_MAIN") or None
+
+
+def _http_options():
+    import httpx  # installed with openai
+    timeout = httpx.Timeout(TIMEOUT, connect=CONNECT_TIMEOUT)
+    limits = httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+    return httpx, timeout, limits
+
+
+def get_client():
+    """Process-wide OpenAI client, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from openai import OpenAI
+            httpx, timeout, limits = _http_options()
+            # max_retries=0: 429s go back to rate_limiter.limited_call, whose buckets count them
+            _client = OpenAI(api_key=_api_key(), timeout=timeout, max_retries=0,
+                             http_client=httpx.Client(timeout=timeout, limits=limits))
+        return _client
+
+
+def get_async_client():
+    """AsyncOpenAI client for the running event loop (async pools can't cross loops)."""
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            from openai import AsyncOpenAI
+            httpx, timeout, limits = _http_options()
+            client = _async_clients[loop] = AsyncOpenAI(
+                api_key=_api_key(), timeout=timeout, max_retries=0,
+                http_client=httpx.AsyncClient(timeout=timeout, limits=limits))
+        return client
+
+
+def ask_gpt(prompt: str, model="gpt-4", temp=0.3, cache: Optional[bool] = None) -> str:
+    """cache: None caches temperature-0 calls only, True always, False bypasses."""
+    response = cached_chat(
+        get_client(),
+        model,
+        [{"role": "user", "content": prompt}],
+        cache=cache,
+        temperature=temp,
+    )
+    return response.choices[0].message.content
+
+
+async def ask_gpt_async(prompt: str, model="gpt-4", temp=0.3, cache: Optional[bool] = None,
+                        stream: bool = False,
+                        on_token: Optional[Callable[[str], object]] = None) -> str:
+    """
+    Async ask_gpt(). With stream=True, `on_token` (sync or async) receives
+    each piece of the answer as it arrives; the full text is returned.
+
+        names = await asyncio.gather(*(ask_gpt_async(p) for p in prompts))
+    """
+    kwargs = {"stream": True} if stream else {}
+    response = await cached_chat_async(
+        get_async_client(),
+        model,
+        [{"role": "user", "content": prompt}],
+        cache=cache,
+        on_token=on_token,
         temperature=temp,
+        **kwargs,
     )
     return response.choices[0].message.content
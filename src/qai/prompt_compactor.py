@@ -0,0 +1,134 @@
+"""
+src/qai/prompt_compactor.py
+
+Fits extracted file text into a token budget for LLM prompts.
+
+Instead of the first N characters, the compactor
+  1. normalises whitespace and drops repeated lines (page headers/footers,
+     signatures, separator rules);
+  2. if that is still over budget, scores every sentence by TF-IDF against
+     the rest of the document (with a small bonus for the opening lines,
+     where titles live) and keeps the best ones, in document order, until
+     the budget is full.
+
+Tokens are counted with tiktoken (a listed requirement). Without it the
+count falls back to ~4 characters per token, which undercounts digits,
+non-English text and code, so budgets are then only approximate.
+
+    from src.qai.prompt_compactor import compact_text
+    snippet = compact_text(ctx["text"], budget=600)
+"""
+
+import math
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import List
+
+try:
+    import tiktoken  # in requirements; the fallback below is only an estimate
+except ImportError:
+    tiktoken = None
+
+DEFAULT_BUDGET = int(os.getenv("QILIFE_PROMPT_TOKENS", "600"))
+MAX_INPUT_CHARS = 200_000   # scoring a whole book isn't worth it; the head is enough
+LEAD_SENTENCES = 3          # opening sentences get a bonus (titles, subjects)
+LEAD_BONUS = 1.5
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+_WORD_RE = re.compile(r"[a-z][a-z0-9]+|\d{2,}")
+_NOISE_RE = re.compile(r"^[\W_]+$")   # "-----", "====", "* * *"
+_STOPWORDS = frozenset("""
+a an and are as at be been but by can did do does for from had has have he her his how i if in
+into is it its me my no not of on or our she so that the their them then there these they this
+to was we were what when which who will with you your page
+""".split())
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    if tiktoken is not None:
+        return len(_encoding(model).encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def dedupe_lines(text: str) -> List[str]:
+    """Whitespace-normalised lines, without blanks, separator rules or repeats."""
+    seen = set()
+    lines = []
+    for raw in text.splitlines():
+        line = " ".join(raw.split())
+        if not line or _NOISE_RE.match(line):
+            continue
+        key = line.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        lines.append(line)
+    return lines
+
+
+def split_sentences(lines: List[str]) -> List[str]:
+    sentences = []
+    for line in lines:
+        sentences.extend(s for s in _SENTENCE_RE.split(line) if s)
+    return sentences
+
+
+def _terms(sentence: str) -> List[str]:
+    return [w for w in _WORD_RE.findall(sentence.lower()) if w not in _STOPWORDS]
+
+
+def score_sentences(sentences: List[str]) -> List[float]:
+    """TF-IDF salience of each sentence, length-normalised so long lines don't win by size."""
+    terms = [_terms(s) for s in sentences]
+    df = Counter(t for ts in terms for t in set(ts))
+    n = len(sentences)
+    scores = []
+    for i, ts in enumerate(terms):
+        if not ts:
+            scores.append(0.0)
+            continue
+        tf = Counter(ts)
+        weight = sum((c / len(ts)) * (math.log((1 + n) / (1 + df[t])) + 1) for t, c in tf.items())
+        # distinct informative terms matter more than one term repeated
+        score = weight * math.sqrt(len(tf))
+        if i < LEAD_SENTENCES:
+            score *= LEAD_BONUS
+        scores.append(score)
+    return scores
+
+
+def compact_text(text: str, budget: int = DEFAULT_BUDGET, model: str = "gpt-4") -> str:
+    """The most informative part of `text` that fits in `budget` tokens."""
+    lines = dedupe_lines(text[:MAX_INPUT_CHARS])
+    joined = "\n".join(lines)
+    if count_tokens(joined, model) <= budget:
+        return joined
+
+    sentences = split_sentences(lines)
+    scores = score_sentences(sentences)
+    chosen = []
+    used = 0
+    for i in sorted(range(len(sentences)), key=lambda i: -scores[i]):
+        if scores[i] <= 0:
+            break
+        cost = count_tokens(sentences[i], model) + 1
+        if used + cost > budget:
+            continue  # a shorter sentence further down may still fit
+        chosen.append(i)
+        used += cost
+        if budget - used < 8:
+            break
+    if not chosen:
+        # one huge "sentence" (e.g. a CSV dump): fall back to its head
+        return joined[: budget * 4]
+    return "\n".join(sentences[i] for i in sorted(chosen))
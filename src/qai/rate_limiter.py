@@ -0,0 +1,323 @@
+"""
+src/qai/rate_limiter.py
+
+Shared client-side limits for OpenAI calls.
+
+Every chat call goes through one process-wide RateLimiter:
+  - a bounded semaphore caps concurrent requests;
+  - per-model token buckets for requests/min and tokens/min make callers
+    wait (queue) instead of getting 429s;
+  - spend is tracked from reported usage against a daily USD cap.
+A 429 that still slips through empties the model's buckets, so every
+caller backs off together instead of retrying into the same wall.
+
+Wait times, request counts and today's spend go to the metrics registry
+(see src/core/metrics.py and its Prometheus endpoint).
+
+Limits can be overridden with QILIFE_RATE_LIMITS, a JSON object like
+{"gpt-4": {"rpm": 500, "tpm": 10000}}; QILIFE_LLM_CONCURRENCY and
+QILIFE_DAILY_COST_CAP (USD, 0 = no cap) set the rest.
+"""
+
+import asyncio
+import inspect
+import json
+import os
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from datetime import date
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+from src.core.metrics import REGISTRY
+
+
+@dataclass(frozen=True)
+class ModelLimits:
+    rpm: int
+    tpm: int
+    usd_per_1m_in: float
+    usd_per_1m_out: float
+
+
+DEFAULT_LIMITS: Dict[str, ModelLimits] = {
+    "gpt-4":         ModelLimits(500, 10_000, 30.0, 60.0),
+    "gpt-4o":        ModelLimits(500, 30_000, 2.5, 10.0),
+    "gpt-4o-mini":   ModelLimits(500, 200_000, 0.15, 0.6),
+    "gpt-3.5-turbo": ModelLimits(3_500, 200_000, 0.5, 1.5),
+    "whisper-1":     ModelLimits(50, 1_000_000, 0.0, 0.0),
+}
+FALLBACK = DEFAULT_LIMITS["gpt-4"]  # unknown models get the strictest limits
+
+CONCURRENCY = int(os.getenv("QILIFE_LLM_CONCURRENCY", "4"))
+DAILY_COST_CAP = float(os.getenv("QILIFE_DAILY_COST_CAP", "10"))
+MAX_RETRIES = 5
+
+
+class DailyBudgetExceeded(RuntimeError):
+    """Raised instead of calling the API once today's spend reached the cap."""
+
+
+def estimate_tokens(messages: List[dict], max_tokens: Optional[int] = None) -> int:
+    """~4 chars per token for the prompt, plus the completion allowance."""
+    chars = sum(len(str(m.get("content", ""))) for m in messages)
+    return chars // 4 + 4 * len(messages) + (max_tokens or 256)
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, per_second: float):
+        self.capacity = capacity
+        self.per_second = per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.per_second)
+        self.updated = now
+
+    def wait_time(self, n: float, now: float) -> float:
+        self._refill(now)
+        n = min(n, self.capacity)
+        return 0.0 if self.tokens >= n else (n - self.tokens) / self.per_second
+
+    def take(self, n: float) -> None:
+        self.tokens -= min(n, self.capacity)
+
+    def give_back(self, n: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + n)
+
+    def drain(self) -> None:
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+
+
+def _load_limits() -> Dict[str, ModelLimits]:
+    limits = dict(DEFAULT_LIMITS)
+    raw = os.getenv("QILIFE_RATE_LIMITS")
+    if raw:
+        try:
+            for model, cfg in json.loads(raw).items():
+                base = limits.get(model, FALLBACK)
+                limits[model] = ModelLimits(
+                    int(cfg.get("rpm", base.rpm)), int(cfg.get("tpm", base.tpm)),
+                    float(cfg.get("usd_per_1m_in", base.usd_per_1m_in)),
+                    float(cfg.get("usd_per_1m_out", base.usd_per_1m_out)),
+                )
+        except (ValueError, AttributeError) as e:
+            print(f"⚠️ Ignoring QILIFE_RATE_LIMITS: {e}")
+    return limits
+
+
+class Lease:
+    """Returned by RateLimiter.limit(); report actual usage through `record()`."""
+
+    def __init__(self, limiter: "RateLimiter", model: str, estimated_tokens: int):
+        self.limiter = limiter
+        self.model = model
+        self.estimated_tokens = estimated_tokens
+        self.recorded = False
+
+    def record(self, usage) -> None:
+        """`usage` is the response's usage object (or a dict with the same keys)."""
+        if usage is None or self.recorded:
+            return
+        get = usage.get if isinstance(usage, dict) else lambda k: getattr(usage, k, 0)
+        self.limiter._settle(self.model, self.estimated_tokens,
+                             get("prompt_tokens") or 0, get("completion_tokens") or 0)
+        self.recorded = True
+
+
+class RateLimiter:
+    def __init__(self, limits: Optional[Dict[str, ModelLimits]] = None,
+                 concurrency: int = CONCURRENCY, daily_cost_cap: float = DAILY_COST_CAP):
+        self.limits = limits or _load_limits()
+        self.daily_cost_cap = daily_cost_cap
+        self._sem = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, tuple] = {}
+        self._spend_day = date.today()
+        self.spent_today = 0.0
+
+    def _limits_for(self, model: str) -> ModelLimits:
+        if model in self.limits:
+            return self.limits[model]
+        # dated snapshots ("gpt-4o-2024-08-06") share their family's limits
+        family = max((m for m in self.limits if model.startswith(m)), key=len, default=None)
+        return self.limits[family] if family else FALLBACK
+
+    def _buckets_for(self, model: str) -> tuple:
+        pair = self._buckets.get(model)
+        if pair is None:
+            lim = self._limits_for(model)
+            pair = self._buckets[model] = (TokenBucket(lim.rpm, lim.rpm / 60.0),
+                                           TokenBucket(lim.tpm, lim.tpm / 60.0))
+        return pair
+
+    def _check_budget(self) -> None:
+        if self._spend_day != date.today():
+            self._spend_day, self.spent_today = date.today(), 0.0
+        if self.daily_cost_cap and self.spent_today >= self.daily_cost_cap:
+            raise DailyBudgetExceeded(
+                f"daily LLM budget of ${self.daily_cost_cap:.2f} reached "
+                f"(${self.spent_today:.2f} spent)")
+
+    @contextmanager
+    def limit(self, model: str, estimated_tokens: int):
+        """Block until a request of ~`estimated_tokens` may be sent to `model`."""
+        t0 = time.perf_counter()
+        with self._lock:
+            self._check_budget()
+        self._sem.acquire()
+        try:
+            while True:
+                with self._lock:
+                    self._check_budget()
+                    requests, tokens = self._buckets_for(model)
+                    now = time.monotonic()
+                    wait = max(requests.wait_time(1, now), tokens.wait_time(estimated_tokens, now))
+                    if wait <= 0:
+                        requests.take(1)
+                        tokens.take(estimated_tokens)
+                        break
+                time.sleep(min(wait, 5.0))
+            waited = time.perf_counter() - t0
+            REGISTRY.observe("qilife_llm_wait_seconds", waited, model=model)
+            REGISTRY.inc("qilife_llm_requests_total", model=model)
+            yield Lease(self, model, estimated_tokens)
+        finally:
+            self._sem.release()
+
+    @asynccontextmanager
+    async def limit_async(self, model: str, estimated_tokens: int):
+        """limit() for coroutines: the wait happens in a worker thread, not on the loop."""
+        cm = self.limit(model, estimated_tokens)
+        lease = await asyncio.to_thread(cm.__enter__)
+        try:
+            yield lease
+        finally:
+            cm.__exit__(None, None, None)
+
+    def _settle(self, model: str, estimated: int, prompt_tokens: int, completion_tokens: int) -> None:
+        lim = self._limits_for(model)
+        cost = (prompt_tokens * lim.usd_per_1m_in + completion_tokens * lim.usd_per_1m_out) / 1e6
+        with self._lock:
+            _, tokens = self._buckets_for(model)
+            used = prompt_tokens + completion_tokens
+            if used < estimated:
+                tokens.give_back(estimated - used)
+            else:
+                tokens.take(used - estimated)
+            self.spent_today += cost
+            spent = self.spent_today
+        REGISTRY.inc("qilife_llm_tokens_total", prompt_tokens + completion_tokens, model=model)
+        REGISTRY.set("qilife_llm_cost_usd_today", round(spent, 6))
+
+    def throttled(self, model: str) -> None:
+        """The API answered 429 anyway: empty the buckets so all callers back off."""
+        with self._lock:
+            for bucket in self._buckets_for(model):
+                bucket.drain()
+        REGISTRY.inc("qilife_llm_throttled_total", model=model)
+
+
+def _is_rate_limit(exc: Exception) -> bool:
+    return getattr(exc, "status_code", None) == 429 or type(exc).__name__ == "RateLimitError"
+
+
+def limited_call(model: str, estimated_tokens: int, call: Callable[[], object]):
+    """
+    Run `call()` (one API request for `model`) under the shared limiter,
+    retrying 429s with jittered exponential backoff. `call` must be safe
+    to repeat, e.g. reopen any file it uploads.
+    """
+    limiter = get_limiter()
+    for attempt in range(MAX_RETRIES + 1):
+        with limiter.limit(model, estimated_tokens) as lease:
+            try:
+                with REGISTRY.timer("qilife_llm_seconds", model=model):
+                    response = call()
+            except Exception as e:
+                if not _is_rate_limit(e) or attempt == MAX_RETRIES:
+                    raise
+                limiter.throttled(model)
+                delay = min(60.0, 2 ** attempt) * (0.5 + random.random())
+            else:
+                lease.record(getattr(response, "usage", None))
+                return response
+        print(f"⏳ {model} rate limited, retrying in {delay:.1f}s")
+        time.sleep(delay)
+
+
+def limited_chat(client, model: str, messages: List[dict], **kwargs):
+    """`client.chat.completions.create(...)` through limited_call()."""
+    return limited_call(
+        model, estimate_tokens(messages, kwargs.get("max_tokens")),
+        lambda: client.chat.completions.create(model=model, messages=messages, **kwargs))
+
+
+async def _collect_stream(stream, on_token: Optional[Callable[[str], object]]):
+    """Assemble streamed chunks into a response shaped like a ChatCompletion."""
+    parts, usage, finish = [], None, None
+    async for chunk in stream:
+        if getattr(chunk, "usage", None):
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        finish = choice.finish_reason or finish
+        delta = choice.delta.content if choice.delta else None
+        if delta:
+            parts.append(delta)
+            if on_token is not None:
+                result = on_token(delta)
+                if inspect.isawaitable(result):
+                    await result
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content="".join(parts)), finish_reason=finish)],
+        usage=usage,
+    )
+
+
+async def limited_chat_async(client, model: str, messages: List[dict],
+                             on_token: Optional[Callable[[str], object]] = None, **kwargs):
+    """
+    limited_chat() for an AsyncOpenAI client. With stream=True each text
+    delta is passed to `on_token` (sync or async) and the assembled
+    response is returned (pass stream_options={"include_usage": True} on
+    openai>=1.26 to get usage, and so spend tracking, for streams).
+    """
+    limiter = get_limiter()
+    estimate = estimate_tokens(messages, kwargs.get("max_tokens"))
+    for attempt in range(MAX_RETRIES + 1):
+        async with limiter.limit_async(model, estimate) as lease:
+            try:
+                with REGISTRY.timer("qilife_llm_seconds", model=model):
+                    response = await client.chat.completions.create(
+                        model=model, messages=messages, **kwargs)
+                    if kwargs.get("stream"):
+                        response = await _collect_stream(response, on_token)
+            except Exception as e:
+                if not _is_rate_limit(e) or attempt == MAX_RETRIES:
+                    raise
+                limiter.throttled(model)
+                delay = min(60.0, 2 ** attempt) * (0.5 + random.random())
+            else:
+                lease.record(getattr(response, "usage", None))
+                return response
+        print(f"⏳ {model} rate limited, retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> RateLimiter:
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
@@ -0,0 +1,223 @@
+"""
+src/qai/response_cache.py
+
+Persistent cache for chat completions.
+
+Responses are stored in SQLite under sha256(model, temperature, messages
+and the other request parameters). Entries expire after a TTL and the
+least recently used ones are evicted once the cache outgrows its size
+budget. By default only deterministic calls (temperature 0) are cached;
+pass cache=True to opt a call in, cache=False to bypass the cache.
+
+QILIFE_LLM_CACHE (path), QILIFE_LLM_CACHE_TTL_DAYS and QILIFE_LLM_CACHE_MB
+configure it.
+"""
+
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, List, Optional
+
+from src.core.metrics import REGISTRY
+from src.qai.rate_limiter import limited_chat, limited_chat_async
+
+CACHE_PATH = Path(os.getenv("QILIFE_LLM_CACHE", str(Path(__file__).parents[2] / "llm_cache.sqlite")))
+TTL_SECONDS = float(os.getenv("QILIFE_LLM_CACHE_TTL_DAYS", "30")) * 86400
+MAX_BYTES = int(float(os.getenv("QILIFE_LLM_CACHE_MB", "100")) * 1024 * 1024)
+
+
+def cache_key(model: str, messages: List[dict], temperature: Optional[float] = None, **params) -> str:
+    payload = {"model": model, "temperature": temperature, "messages": messages, **params}
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, db_path: Path = CACHE_PATH, ttl_seconds: float = TTL_SECONDS,
+                 max_bytes: int = MAX_BYTES):
+        self.db_path = str(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key        TEXT PRIMARY KEY,
+                model      TEXT NOT NULL,
+                content    TEXT NOT NULL,
+                usage      TEXT,
+                size       INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_hit   REAL NOT NULL,
+                hits       INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_last_hit ON llm_cache (last_hit);
+            """
+        )
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, usage, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl_seconds and now - row[2] > self.ttl_seconds:
+                self._delete(key)
+                return None
+            self._conn.execute(
+                "UPDATE llm_cache SET last_hit = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        return {"content": row[0], "usage": json.loads(row[1]) if row[1] else None}
+
+    def put(self, key: str, model: str, content: str, usage: Optional[dict] = None) -> None:
+        now = time.time()
+        usage_json = json.dumps(usage) if usage else None
+        size = len(content.encode("utf-8")) + len(key) + len(usage_json or "")
+        with self._lock:
+            self._delete(key)
+            self._conn.execute(
+                "INSERT INTO llm_cache (key, model, content, usage, size, created_at, last_hit) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, content, usage_json, size, now, now),
+            )
+            self._bytes += size
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _delete(self, key: str) -> None:
+        row = self._conn.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row:
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._bytes -= row[0]
+
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones down to 90% of the budget."""
+        conn = self._conn
+        conn.execute("BEGIN")
+        if self.ttl_seconds:
+            conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        self._bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        target = int(self.max_bytes * 0.9)
+        if self._bytes > target:
+            freed = 0
+            doomed = []
+            for key, size in conn.execute("SELECT key, size FROM llm_cache ORDER BY last_hit"):
+                if self._bytes - freed <= target:
+                    break
+                doomed.append((key,))
+                freed += size
+            conn.executemany("DELETE FROM llm_cache WHERE key = ?", doomed)
+            self._bytes -= freed
+        conn.execute("COMMIT")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            n, hits = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM llm_cache").fetchone()
+        return {"entries": n, "hits": hits, "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+
+def _as_response(content: str, usage: Optional[dict]):
+    """Minimal stand-in for a ChatCompletion so callers read it the same way."""
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+        usage=usage,
+        cached=True,
+    )
+
+
+def _usage_dict(usage) -> Optional[dict]:
+    if usage is None:
+        return None
+    if isinstance(usage, dict):
+        return usage
+    return {k: getattr(usage, k, 0) for k in ("prompt_tokens", "completion_tokens", "total_tokens")}
+
+
+def _key_for(model: str, messages: List[dict], cache: Optional[bool], kwargs: dict) -> Optional[str]:
+    """Cache key for this call, or None if it shouldn't be cached."""
+    temperature = kwargs.get("temperature")
+    use = (temperature == 0) if cache is None else cache
+    if not use:
+        return None
+    # streaming only changes delivery, not the answer
+    params = {k: v for k, v in kwargs.items()
+              if k not in ("temperature", "stream", "stream_options")}
+    return cache_key(model, messages, temperature, **params)
+
+
+def cached_chat(client, model: str, messages: List[dict], cache: Optional[bool] = None, **kwargs):
+    """
+    limited_chat() behind the response cache.
+    :param cache: None → cache only temperature-0 calls; True → always; False → bypass.
+    """
+    key = None if kwargs.get("stream") else _key_for(model, messages, cache, kwargs)
+    if key is None:
+        return limited_chat(client, model, messages, **kwargs)
+
+    store = get_cache()
+    hit = store.get(key)
+    if hit is not None:
+        REGISTRY.inc("qilife_llm_cache_hits_total", model=model)
+        return _as_response(hit["content"], hit["usage"])
+
+    REGISTRY.inc("qilife_llm_cache_misses_total", model=model)
+    response = limited_chat(client, model, messages, **kwargs)
+    content = response.choices[0].message.content
+    if content:
+        store.put(key, model, content, _usage_dict(getattr(response, "usage", None)))
+    return response
+
+
+async def cached_chat_async(client, model: str, messages: List[dict], cache: Optional[bool] = None,
+                            on_token: Optional[Callable[[str], object]] = None, **kwargs):
+    """cached_chat() for an AsyncOpenAI client; a streamed hit is replayed as one token."""
+    key = _key_for(model, messages, cache, kwargs)
+    if key is None:
+        return await limited_chat_async(client, model, messages, on_token=on_token, **kwargs)
+
+    store = get_cache()
+    hit = await asyncio.to_thread(store.get, key)
+    if hit is not None:
+        REGISTRY.inc("qilife_llm_cache_hits_total", model=model)
+        if on_token is not None and kwargs.get("stream"):
+            result = on_token(hit["content"])
+            if inspect.isawaitable(result):
+                await result
+        return _as_response(hit["content"], hit["usage"])
+
+    REGISTRY.inc("qilife_llm_cache_misses_total", model=model)
+    response = await limited_chat_async(client, model, messages, on_token=on_token, **kwargs)
+    content = response.choices[0].message.content
+    if content:
+        await asyncio.to_thread(store.put, key, model, content,
+                                _usage_dict(getattr(response, "usage", None)))
+    return response
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
@@ -8,6 +8,8 @@ from time import sleep
 from pathlib import Path
 from dotenv import load_dotenv
 
+from src.qai.response_cache import cached_chat
+
 # --- Load Environment Variables ---
 dotenv_path = Path(__file__).resolve().parents[2] / ".env"
 load_dotenv(dotenv_path=dotenv_path)
@@ -55,14 +57,17 @@ else:
 def generate_slug(service_name):
     prompt = f"Create a short, lowercase, hyphen-separated slug for this service name: '{service_name}'. Only return the slug. No punctuation, no quotes."
     try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
+        # same service name → same slug, so reruns come from the cache
+        response = cached_chat(
+            client,
+            "gpt-4",
+            [
                 {"role": "system", "content": "You generate clean slugs from service names."},
                 {"role": "user", "content": prompt}
             ],
             max_tokens=20,
-            temperature=0.3
+            temperature=0.3,
+            cache=True
         )
         content = response.choices[0].message.content
         if content:
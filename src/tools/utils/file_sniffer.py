@@ -0,0 +1,161 @@
+"""
+src/tools/utils/file_sniffer.py
+
+Fast content sniffing for file routing. Reads only the first few KB of a
+file, maps the magic bytes to a canonical extension and caches the answer
+per (path, size, mtime) so repeated lookups cost a stat().
+"""
+
+import os
+import stat
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Union
+
+try:
+    import filetype  # pip install filetype
+except ImportError:
+    filetype = None
+
+SNIFF_BYTES = 8192
+
+# Minimal table used when `filetype` isn't installed (prefix → extension).
+_MAGIC = [
+    (b"%PDF-", ".pdf"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+    (b"II*\x00", ".tiff"),
+    (b"MM\x00*", ".tiff"),
+    (b"ID3", ".mp3"),
+    (b"\xff\xfb", ".mp3"),
+    (b"fLaC", ".flac"),
+    (b"\x1a\x45\xdf\xa3", ".mkv"),
+    (b"Rar!\x1a\x07", ".rar"),
+    (b"7z\xbc\xaf\x27\x1c", ".7z"),
+    (b"\x1f\x8b", ".gz"),
+]
+
+# Containers whose real type is better told by a matching suffix
+# (.docx/.xlsx/.pptx are zips, .doc/.xls are OLE compound files).
+_CONTAINERS = {
+    ".zip": {".docx", ".xlsx", ".pptx", ".odt", ".epub"},
+    ".cfb": {".doc", ".xls", ".ppt", ".msg"},
+}
+
+# What _text_guess() can return. Text formats carry no magic number, so
+# these are heuristics (.svg, .rtf, .c all look like text): they only name
+# files that have no suffix of their own.
+_TEXT_KINDS = {".txt", ".html", ".xml", ".json", ".eml"}
+
+# filetype's spelling → the one used by the routers
+_ALIASES = {".tif": ".tiff", ".jpeg": ".jpg"}
+
+
+def _fallback_guess(head: bytes) -> Optional[str]:
+    for magic, ext in _MAGIC:
+        if head.startswith(magic):
+            return ext
+    if head[:2] == b"BM" and head[6:10] == b"\x00\x00\x00\x00":
+        return ".bmp"
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return ".wav"
+    if head[:4] == b"RIFF" and head[8:12] == b"AVI ":
+        return ".avi"
+    if head[4:8] == b"ftyp":
+        brand = head[8:12]
+        if brand.startswith(b"M4A"):
+            return ".m4a"
+        if brand.startswith(b"qt"):
+            return ".mov"
+        return ".mp4"
+    if head.startswith(b"PK\x03\x04"):
+        if b"word/" in head:
+            return ".docx"
+        if b"xl/" in head:
+            return ".xlsx"
+        if b"ppt/" in head:
+            return ".pptx"
+        return ".zip"
+    if head.startswith(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"):
+        return ".cfb"
+    return None
+
+
+def _text_guess(head: bytes) -> Optional[str]:
+    """Recognise a few text formats that have no magic number."""
+    if not head or b"\x00" in head:
+        return None
+    try:
+        text = head.decode("utf-8")
+    except UnicodeDecodeError:
+        # a multi-byte char may be cut at the buffer edge
+        try:
+            text = head[:-3].decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+    lower = text.lstrip("\ufeff \t\r\n").lower()
+    if lower.startswith(("<!doctype html", "<html")):
+        return ".html"
+    if lower.startswith("<?xml"):
+        return ".xml"
+    if lower.startswith(("{", "[")):
+        return ".json"
+    if lower.startswith(("from:", "received:", "return-path:", "mime-version:", "delivered-to:")):
+        return ".eml"
+    return ".txt"
+
+
+@lru_cache(maxsize=65536)
+def _sniff_cached(path: str, size: int, mtime_ns: int) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            head = f.read(SNIFF_BYTES)
+    except OSError:
+        return None
+
+    if filetype is not None:
+        kind = filetype.guess(head)
+        ext = _ALIASES.get(f".{kind.extension}", f".{kind.extension}") if kind else None
+        if ext == ".zip" or ext is None:
+            # filetype doesn't flag OLE files and may miss office zips
+            ext = _fallback_guess(head) or ext
+    else:
+        ext = _fallback_guess(head)
+    return ext or _text_guess(head)
+
+
+def sniff_type(path: Union[str, Path]) -> Optional[str]:
+    """
+    Return the canonical extension (e.g. ".pdf") implied by the file's
+    leading bytes, or None if unreadable/unknown.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None  # never block on FIFOs/devices
+    return _sniff_cached(str(path), st.st_size, st.st_mtime_ns)
+
+
+def effective_suffix(path: Union[str, Path]) -> str:
+    """
+    Extension to route on: the type implied by a binary signature, unless
+    the file's own suffix is a more specific member of the same container
+    family. Text content (no signature) keeps the file's own suffix.
+    """
+    suffix = Path(path).suffix.lower()
+    sniffed = sniff_type(path)
+    if sniffed is None:
+        return suffix
+    if sniffed in _TEXT_KINDS:
+        return suffix or sniffed
+    if suffix in _CONTAINERS.get(sniffed, ()):
+        return suffix
+    return sniffed
+
+
+def clear_cache() -> None:
+    _sniff_cached.cache_clear()
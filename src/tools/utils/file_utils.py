@@ -6,6 +6,8 @@ from typing import Optional, Dict, Any
 from datetime import datetime
 import mimetypes
 
+from src.tools.utils.file_sniffer import effective_suffix
+
 class FileUtils:
     """Utility functions for file operations"""
     
@@ -197,8 +199,8 @@ class FileUtils:
     
     @staticmethod
     def get_file_category(file_path: str) -> str:
-        """Get file category based on extension"""
-        ext = Path(file_path).suffix.lower()
+        """Get file category based on content type (falls back to extension)"""
+        ext = effective_suffix(file_path)
         
         if ext in {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp', '.svg'}:
             return 'image'
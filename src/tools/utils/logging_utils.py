@@ -6,6 +6,8 @@ from typing import Dict, Any, Optional
 import threading
 import logging
 
+from src.core.write_batcher import get_batcher
+
 class LoggingUtils:
     """Centralized logging utility for the Second Brain system"""
     
@@ -35,8 +37,8 @@ class LoggingUtils:
             pass
     
     def log_activity(self, activity_type: str, description: str, 
-                    metadata: Optional[Dict[str, Any]] = None):
-        """Log an activity to the database and console"""
+                    metadata: Optional[Dict[str, Any]] = None, sync: bool = False):
+        """Log an activity to the database and console (group-committed unless sync)"""
         try:
             timestamp = datetime.now().isoformat()
             
@@ -46,19 +48,15 @@ class LoggingUtils:
                 print(f"  Metadata: {json.dumps(metadata, indent=2)}")
             
             # Database logging
-            with self._lock:
-                with sqlite3.connect(str(self.db_path)) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        INSERT INTO activity_log (activity_type, description, metadata, timestamp)
-                        VALUES (?, ?, ?, ?)
-                    """, (
-                        activity_type,
-                        description,
-                        json.dumps(metadata) if metadata else None,
-                        timestamp
-                    ))
-                    conn.commit()
+            get_batcher(str(self.db_path)).write("""
+                INSERT INTO activity_log (activity_type, description, metadata, timestamp)
+                VALUES (?, ?, ?, ?)
+            """, (
+                activity_type,
+                description,
+                json.dumps(metadata) if metadata else None,
+                timestamp
+            ), sync=sync)
                     
         except Exception as e:
             # Fallback to console only if database logging fails
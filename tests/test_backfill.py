@@ -0,0 +1,69 @@
+import sqlite3
+
+from src.fileflow import job_queue
+from src.fileflow.job_queue import JobQueue
+from src.core.write_batcher import flush_all
+from src.monitor.backfill import BackfillScanner, init_manifest, record_manifest
+
+
+def _manifest(db):
+    with sqlite3.connect(db) as conn:
+        return {p for (p,) in conn.execute("SELECT path FROM file_manifest")}
+
+
+def test_unreadable_files_are_retried_next_scan(tmp_path, monkeypatch):
+    root = tmp_path / "inbox"
+    root.mkdir()
+    (root / "ok.txt").write_text("fine")
+    locked = root / "locked.txt"
+    locked.write_text("in use")
+    db = tmp_path / "q.sqlite"
+    jq = JobQueue(db)
+
+    real_hash = job_queue.content_hash
+
+    def hash_or_fail(path, *args):
+        if path == str(locked):
+            raise PermissionError("locked by another process")
+        return real_hash(path, *args)
+
+    monkeypatch.setattr(job_queue, "content_hash", hash_or_fail)
+    stats = BackfillScanner(str(root), jq, db_path=db, workers=2).run()
+    assert (stats["enqueued"], stats["unreadable"]) == (1, 1)
+    assert _manifest(db) == {str(root / "ok.txt")}
+
+    monkeypatch.setattr(job_queue, "content_hash", real_hash)
+    stats = BackfillScanner(str(root), jq, db_path=db, workers=2).run()
+    assert (stats["changed"], stats["enqueued"]) == (1, 1)
+    assert _manifest(db) == {str(root / "ok.txt"), str(locked)}
+
+
+def test_already_known_content_is_recorded(tmp_path):
+    root = tmp_path / "inbox"
+    root.mkdir()
+    f = root / "a.txt"
+    f.write_text("same")
+    db = tmp_path / "q.sqlite"
+    jq = JobQueue(db)
+    jq.enqueue(str(f), root=str(root))   # the watcher got there first
+
+    stats = BackfillScanner(str(root), jq, db_path=db, workers=2).run()
+    assert (stats["changed"], stats["enqueued"], stats["unreadable"]) == (1, 0, 0)
+    assert _manifest(db) == {str(f)}
+
+
+def test_files_handled_by_the_pipeline_are_not_rescanned(tmp_path):
+    root = tmp_path / "inbox"
+    (root / "filed").mkdir(parents=True)
+    queued = root / "a.txt"
+    queued.write_text("from the watcher")
+    moved = root / "filed" / "b.txt"
+    moved.write_text("auto_apply put it here")
+    db = tmp_path / "q.sqlite"
+    init_manifest(db)
+    record_manifest([queued, moved, root / "gone.txt"], db)
+    flush_all()
+    assert _manifest(db) == {str(queued), str(moved)}
+
+    stats = BackfillScanner(str(root), JobQueue(db), db_path=db, workers=2).run()
+    assert (stats["changed"], stats["enqueued"]) == (0, 0)
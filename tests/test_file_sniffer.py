@@ -0,0 +1,56 @@
+import pytest
+
+from src.tools.utils.file_sniffer import clear_cache, effective_suffix, sniff_type
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    clear_cache()
+    yield
+    clear_cache()
+
+
+def _write(tmp_path, name, data):
+    p = tmp_path / name
+    p.write_bytes(data)
+    return p
+
+
+@pytest.mark.parametrize("name, data, expected", [
+    ("scan.jpg", b"%PDF-1.7\n...", ".pdf"),                  # misnamed PDF
+    ("photo.pdf", b"\x89PNG\r\n\x1a\n" + b"\0" * 32, ".png"),
+    ("notes", b"%PDF-1.4\n", ".pdf"),                         # no suffix at all
+    ("report.docx", b"PK\x03\x04" + b"\0" * 26 + b"word/document.xml", ".docx"),
+    ("sheet.xls", b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\0" * 32, ".xls"),
+])
+def test_binary_signature_wins(tmp_path, name, data, expected):
+    assert effective_suffix(_write(tmp_path, name, data)) == expected
+
+
+@pytest.mark.parametrize("name, data", [
+    ("logo.svg", b'<?xml version="1.0"?><svg xmlns="http://www.w3.org/2000/svg"/>'),
+    ("letter.rtf", b"{\\rtf1\\ansi Hello}"),
+    ("main.c", b"#include <stdio.h>\nint main(void) { return 0; }\n"),
+    ("index.php", b"<?php echo 'hi'; ?>"),
+    ("data.csv", b"a,b\n1,2\n"),
+])
+def test_text_content_keeps_its_own_suffix(tmp_path, name, data):
+    p = _write(tmp_path, name, data)
+    assert effective_suffix(p) == p.suffix
+
+
+def test_text_guess_names_files_without_a_suffix(tmp_path):
+    assert effective_suffix(_write(tmp_path, "README", b"plain words\n")) == ".txt"
+    assert effective_suffix(_write(tmp_path, "payload", b'{"a": 1}')) == ".json"
+
+
+def test_sniff_is_cached_by_size_and_mtime(tmp_path):
+    p = _write(tmp_path, "x.bin", b"%PDF-1.4")
+    assert sniff_type(p) == ".pdf"
+    p.write_bytes(b"GIF89a" + b"\0" * 16)   # size changes → new cache key
+    assert sniff_type(p) == ".gif"
+
+
+def test_missing_file(tmp_path):
+    assert sniff_type(tmp_path / "nope.pdf") is None
+    assert effective_suffix(tmp_path / "nope.pdf") == ".pdf"
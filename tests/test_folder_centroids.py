@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pandas")  # folder_db
+
+from src.fileflow.folder_centroids import FolderCentroids, HashingEmbedder  # noqa: E402
+from src.fileflow.mover import FileJob, Pipeline  # noqa: E402
+from src.fileflow.rename_rules import DatabaseManager  # noqa: E402
+
+TAX = "tax return irs refund deduction form 1040 income"
+MEDICAL = "doctor clinic prescription patient diagnosis insurance claim"
+
+
+@pytest.fixture
+def centroids(tmp_path):
+    db = tmp_path / "folders.sqlite"
+    with sqlite3.connect(db) as conn:
+        conn.execute("CREATE TABLE folder_structure (folder_Id INTEGER PRIMARY KEY, folder_Path TEXT)")
+        conn.executemany("INSERT INTO folder_structure VALUES (?, ?)",
+                         [(1, "Finance/Taxes"), (2, "Health/Medical")])
+    c = FolderCentroids(db, embed=HashingEmbedder(128), base=tmp_path / "filed")
+    c.update(1, c.vector_for(TAX))
+    c.update(2, c.vector_for(MEDICAL))
+    return c
+
+
+def test_approval_folds_the_file_into_its_suggested_folder(centroids, tmp_path):
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    scan = inbox / "scan_0001.pdf"
+    scan.write_bytes(b"%PDF-1.4")
+    dbm = DatabaseManager(str(tmp_path / "reviews.sqlite"))
+    pipeline = Pipeline(dbm, None, None, guarded=False, centroids=centroids,
+                        namer=lambda job: "20240415_tax_return.pdf")
+
+    job = FileJob(scan, text=f"{TAX} 2023 refund")
+    pipeline._embed(job, {})
+    pipeline._classify(job, {})
+    pipeline._move(job, {})      # review mode: stays in the inbox
+    pipeline._record(job, {})
+    dbm.writer.flush()
+
+    (review,) = dbm.get_pending_reviews()
+    assert review["id"] == str(scan) and review["folder_id"] == 1
+    assert job.destination == tmp_path / "filed" / "Finance/Taxes"
+
+    before, count = centroids.means[1].copy(), centroids.counts[1]
+    dbm.apply_review_actions([(review["id"], "approve", review["suggested_name"])])
+    centroids.approve_many([(review["id"], review["folder_id"])], background=False)
+    assert centroids.counts[1] == count + 1
+    assert not np.allclose(centroids.means[1], before)
+    assert centroids.counts[2] == 1           # the other folder is untouched
+
+
+def test_auto_apply_learns_from_where_the_file_landed(centroids, tmp_path):
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    scan = inbox / "visit.pdf"
+    scan.write_bytes(b"%PDF-1.4")
+    pipeline = Pipeline(None, None, None, guarded=False, centroids=centroids, auto_apply=True,
+                        namer=lambda job: "20240301_clinic_visit.pdf")
+    job = FileJob(scan, text=f"{MEDICAL} follow-up")
+    for stage in (pipeline._embed, pipeline._classify, pipeline._move, pipeline._record):
+        stage(job, {})
+    assert job.final_path == tmp_path / "filed" / "Health/Medical" / "20240301_clinic_visit.pdf"
+    assert centroids.counts[2] == 2
+
+
+def test_unknown_folder_is_not_learned(centroids):
+    assert centroids.approve("/nowhere/file.pdf", None, text=TAX) is None
+    assert centroids.approve("/nowhere/file.pdf", 99, text=TAX) is None
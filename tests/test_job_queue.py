@@ -0,0 +1,139 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from src.fileflow.job_queue import DONE, FAILED, PENDING, RUNNING, JobDispatcher, JobQueue
+
+
+@pytest.fixture
+def jq(tmp_path):
+    return JobQueue(tmp_path / "jobs.sqlite", backoff_base=0.0, fifo_every=0)
+
+
+def _file(folder, name, size=10):
+    folder.mkdir(parents=True, exist_ok=True)
+    p = folder / name
+    p.write_bytes(name.encode() + b"\0" * size)
+    return p
+
+
+def test_enqueue_is_idempotent_per_content(jq, tmp_path):
+    p = _file(tmp_path / "a", "x.txt")
+    assert jq.enqueue(str(p), root=str(tmp_path / "a")) is not None
+    assert jq.enqueue(str(p), root=str(tmp_path / "a")) is None
+    p.write_bytes(b"changed")
+    assert jq.enqueue(str(p), root=str(tmp_path / "a")) is not None
+
+
+def test_lease_expiry_and_release(jq, tmp_path):
+    p = _file(tmp_path / "a", "x.txt")
+    jq.enqueue(str(p), root=str(tmp_path / "a"))
+
+    (job,) = jq.claim("w1", lease_seconds=0.05)
+    assert job.attempts == 1
+    assert jq.claim("w2") == []                 # leased
+    time.sleep(0.1)
+    (again,) = jq.claim("w2", lease_seconds=60)  # expired → claimable
+    assert again.id == job.id and again.attempts == 2
+
+    jq.release([again.id])
+    assert jq.counts()[PENDING] == 1
+    assert jq.claim("w3")[0].attempts == 2      # a release doesn't count an attempt
+
+
+def test_fail_retries_then_gives_up(tmp_path):
+    jq = JobQueue(tmp_path / "jobs.sqlite", max_attempts=2, backoff_base=0.0)
+    jq.enqueue(str(_file(tmp_path / "a", "x.txt")), root=str(tmp_path / "a"))
+    (job,) = jq.claim("w")
+    jq.fail(job.id, "boom")
+    assert jq.counts()[PENDING] == 1
+    (job,) = jq.claim("w")
+    jq.fail(job.id, "boom")
+    assert jq.counts()[FAILED] == 1
+
+
+def test_interactive_jobs_first_then_roots_take_turns(jq, tmp_path):
+    big, small = tmp_path / "big", tmp_path / "small"
+    for i in range(6):
+        jq.enqueue(str(_file(big, f"b{i}.txt")), root=str(big))
+    for i in range(2):
+        jq.enqueue(str(_file(small, f"s{i}.txt")), root=str(small))
+    picked = str(big / "b5.txt")
+    assert jq.prioritize([picked]) == 1
+
+    jobs = jq.claim("w", batch_size=5)
+    assert jobs[0].path == picked
+    roots = [j.root for j in jobs[1:]]
+    # equal weights and costs: the small root isn't starved behind the big one
+    assert roots.count(str(small)) == 2
+    assert roots[:2] != [str(big)] * 2
+
+
+def test_root_weight_shares_claims(tmp_path):
+    jq = JobQueue(tmp_path / "jobs.sqlite", fifo_every=0,
+                  root_weights={str(tmp_path / "fast"): 3.0})
+    for root in ("fast", "slow"):
+        for i in range(8):
+            jq.enqueue(str(_file(tmp_path / root, f"{root}{i}.txt")), root=str(tmp_path / root))
+    roots = [j.root for j in jq.claim("w", batch_size=8)]
+    assert roots.count(str(tmp_path / "fast")) == 6
+
+
+class _Pipeline:
+    def __init__(self, fail_first=0):
+        self.callbacks, self.submitted, self.fail_first = [], [], fail_first
+        self.seen = threading.Event()
+
+    def add_done_callback(self, fn):
+        self.callbacks.append(fn)
+
+    def submit(self, path, job_id=None):
+        if self.fail_first:
+            self.fail_first -= 1
+            raise RuntimeError("pipeline is closed")
+        self.submitted.append(path)
+        from types import SimpleNamespace
+        for fn in self.callbacks:
+            fn(SimpleNamespace(job_id=job_id, error=None))
+        self.seen.set()
+
+
+def _wait_for(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return cond()
+
+
+def test_dispatcher_survives_submit_errors(jq, tmp_path):
+    jq.enqueue(str(_file(tmp_path / "a", "x.txt")), root=str(tmp_path / "a"))
+    pipeline = _Pipeline(fail_first=1)
+    d = JobDispatcher(jq, pipeline, idle_wait=0.01)
+    d.start()
+    try:
+        assert _wait_for(lambda: jq.counts()[DONE] == 1)
+    finally:
+        d.stop()
+    assert pipeline.submitted == [str(tmp_path / "a" / "x.txt")]
+
+
+def test_dispatcher_survives_database_errors(jq, tmp_path, monkeypatch):
+    jq.enqueue(str(_file(tmp_path / "a", "x.txt")), root=str(tmp_path / "a"))
+    real_claim, calls = jq.claim, []
+
+    def flaky_claim(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return real_claim(*args, **kwargs)
+
+    monkeypatch.setattr(jq, "claim", flaky_claim)
+    d = JobDispatcher(jq, _Pipeline(), idle_wait=0.01)
+    d.start()
+    try:
+        assert _wait_for(lambda: jq.counts()[DONE] == 1)
+    finally:
+        d.stop()
+    assert jq.counts()[RUNNING] == 0
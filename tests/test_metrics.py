@@ -0,0 +1,52 @@
+import threading
+
+from src.core import metrics
+
+
+def test_one_flusher_per_process(monkeypatch):
+    started = []
+
+    class FakeFlusher:
+        def start(self):
+            started.append(self)
+            return self
+
+    monkeypatch.setattr(metrics, "MetricsFlusher", FakeFlusher)
+    monkeypatch.setattr(metrics, "_flusher", None)
+    got = []
+    threads = [threading.Thread(target=lambda: got.append(metrics.get_flusher())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(started) == 1
+    assert all(f is started[0] for f in got)
+
+
+def test_metrics_server_once_and_bind_failure_is_not_fatal(monkeypatch):
+    calls = []
+
+    def busy(port):
+        calls.append(port)
+        raise OSError(98, "Address already in use")
+
+    monkeypatch.setattr(metrics, "start_metrics_server", busy)
+    monkeypatch.setattr(metrics, "_server", None)
+    monkeypatch.setattr(metrics, "_server_started", False)
+    assert metrics.get_metrics_server(9464) is None
+    assert metrics.get_metrics_server(9464) is None   # second session: no new bind attempt
+    assert calls == [9464]
+
+
+def test_metrics_endpoint_serves_registry():
+    import urllib.request
+    registry = metrics.MetricsRegistry()
+    registry.inc("qilife_test_total", 3)
+    server = metrics.start_metrics_server(0, registry=registry)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        body = urllib.request.urlopen(url, timeout=5).read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert "qilife_test_total 3" in body
@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+pytest.importorskip("watchdog")
+
+from src.fileflow.job_queue import JobQueue  # noqa: E402
+from src.monitor.monitoring_service import MonitoringService, RootRules  # noqa: E402
+
+
+@pytest.fixture
+def service(tmp_path):
+    svc = MonitoringService(job_queue=JobQueue(tmp_path / "q.sqlite"), backfill=False)
+    yield svc
+    for root in svc.roots():
+        svc.remove_root(root.path)
+    svc.stop()
+
+
+def test_events_route_to_the_root_that_accepts_them(service, tmp_path):
+    rules_dir = tmp_path / "config"
+    rules_dir.mkdir()
+    service.add_root(str(rules_dir), rules=RootRules(include=("folder_rules.json",)),
+                     recursive=False, on_ready=lambda p: None, polling=True)
+    service.add_root(str(tmp_path), polling=True)
+
+    assert service._root_for(str(rules_dir / "folder_rules.json")).path == str(rules_dir)
+    # not matched by the inner root's include, nor within its (non-recursive) depth
+    assert service._root_for(str(rules_dir / "notes.txt")).path == str(tmp_path)
+    assert service._root_for(str(rules_dir / "sub" / "folder_rules.json")).path == str(tmp_path)
+
+
+def test_stop_keeps_callback_roots(service, tmp_path):
+    rules_dir = tmp_path / "config"
+    rules_dir.mkdir()
+    callback = service.add_root(str(rules_dir), on_ready=lambda p: None, polling=True)
+    service.add_root(str(tmp_path), polling=True)
+
+    service.stop()
+    assert service.roots() == [callback]
+    assert service._poller is not None and service._poller.is_alive()
+
+
+def test_on_ready_hashes_off_the_coalescer_thread(service, tmp_path, monkeypatch):
+    service.add_root(str(tmp_path), polling=True)
+    f = tmp_path / "a.txt"
+    f.write_text("hello")
+    seen = []
+    enqueue = service.job_queue.enqueue
+    monkeypatch.setattr(service.job_queue, "enqueue",
+                        lambda path, root=None: seen.append(threading.current_thread()) or
+                        enqueue(path, root=root))
+
+    service._on_ready(str(f))
+    service._enqueuer.shutdown(wait=True)
+    assert seen and seen[0] is not threading.current_thread()
+    assert sum(service.job_queue.counts().values()) == 1  # queued (maybe already claimed)
@@ -0,0 +1,42 @@
+import os
+
+from src.fileflow.mover import FileJob, Pipeline, is_own_write
+
+
+def _pipeline(**options):
+    return Pipeline(None, None, None, auto_apply=True, guarded=False, **options)
+
+
+def test_file_already_named_as_suggested_is_left_alone(tmp_path):
+    src = tmp_path / "20240712_invoice_acme.pdf"
+    src.write_bytes(b"%PDF-1.4")
+    job = FileJob(src, suggested_name=src.name)
+    _pipeline()._move(job, {})
+    assert job.final_path == src
+    assert sorted(p.name for p in tmp_path.iterdir()) == [src.name]
+
+
+def test_moved_file_is_recognised_as_own_write(tmp_path):
+    src = tmp_path / "scan.pdf"
+    src.write_bytes(b"%PDF-1.4")
+    dest = tmp_path / "Taxes"
+    job = FileJob(src, suggested_name="20240712_tax_irs.pdf", destination=dest)
+    _pipeline()._move(job, {})
+
+    assert job.final_path == dest / "20240712_tax_irs.pdf"
+    assert job.final_path.exists() and not src.exists()
+    assert is_own_write(job.final_path)
+    assert not is_own_write(src)
+
+    # a later edit by the user is a real change again
+    job.final_path.write_bytes(b"%PDF-1.4 edited")
+    os.utime(job.final_path, ns=(0, 1))
+    assert not is_own_write(job.final_path)
+
+
+def test_review_mode_does_not_touch_the_file(tmp_path):
+    src = tmp_path / "scan.pdf"
+    src.write_bytes(b"%PDF-1.4")
+    job = FileJob(src, suggested_name="other.pdf")
+    Pipeline(None, None, None, guarded=False)._move(job, {})
+    assert job.final_path is None and src.exists()
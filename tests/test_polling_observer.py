@@ -0,0 +1,46 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip("watchdog")
+
+from src.monitor.polling_observer import AdaptivePollingObserver, _Snapshot  # noqa: E402
+
+
+def test_poll_reports_old_stats_of_deleted_files(tmp_path):
+    f = tmp_path / "a.txt"
+    f.write_text("a")
+    ino = f.stat().st_ino
+    snap = _Snapshot(str(tmp_path))
+    f.unlink()
+    created, deleted, modified = snap.poll()
+    assert created == [] and modified == []
+    assert deleted[str(f)][2] == ino
+
+
+def test_rename_is_one_moved_event_and_baseline_is_off_thread(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.txt").write_text("a")
+    events = []
+
+    class Handler:
+        def dispatch(self, event):
+            events.append(event)
+
+    observer = AdaptivePollingObserver(min_interval=0.05, max_interval=0.1)
+    observer.start()
+    try:
+        watch = observer.schedule(Handler(), str(tmp_path), recursive=True)
+        assert watch.snapshot is None            # schedule() doesn't walk the tree
+        deadline = time.monotonic() + 5
+        while watch.snapshot is None and time.monotonic() < deadline:
+            time.sleep(0.02)
+        os.rename(tmp_path / "a.txt", tmp_path / "sub" / "b.txt")
+        while not events and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        observer.stop()
+        observer.join()
+    assert [(type(e).__name__, e.src_path, e.dest_path) for e in events] == [
+        ("FileMovedEvent", str(tmp_path / "a.txt"), str(tmp_path / "sub" / "b.txt"))]
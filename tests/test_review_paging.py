@@ -0,0 +1,47 @@
+from src.fileflow.rename_rules import DatabaseManager
+
+
+def _db(tmp_path, n):
+    db = DatabaseManager(str(tmp_path / "reviews.sqlite"))
+    for i in range(n):
+        db.add_review(f"/inbox/{i:04d}.pdf", f"{i:04d}.pdf", f"new_{i:04d}.pdf")
+    db.writer.flush()
+    return db
+
+
+def _pages(db, size):
+    after, pages = 0, []
+    while True:
+        rows = db.get_pending_reviews(limit=size, after=after)
+        if not rows:
+            return pages
+        pages.append([r["id"] for r in rows])
+        after = rows[-1]["seq"]
+
+
+def test_keyset_pages_cover_every_pending_review_once(tmp_path):
+    db = _db(tmp_path, 23)
+    pages = _pages(db, 10)
+    assert [len(p) for p in pages] == [10, 10, 3]
+    assert [i for p in pages for i in p] == [f"/inbox/{i:04d}.pdf" for i in range(23)]
+
+
+def test_pages_skip_handled_reviews_and_stats_follow(tmp_path):
+    db = _db(tmp_path, 12)
+    first = db.get_pending_reviews(limit=5)
+    db.apply_review_actions([(r["id"], "approve", r["suggested_name"]) for r in first[:3]]
+                            + [(first[3]["id"], "reject", None)])
+    assert db.get_database_stats()["pending_reviews"] == 8
+
+    # the cursor of the first page still works after rows on it were handled
+    nxt = db.get_pending_reviews(limit=5, after=first[-1]["seq"])
+    assert [r["id"] for r in nxt] == [f"/inbox/{i:04d}.pdf" for i in range(5, 10)]
+    assert [r["id"] for r in db.get_pending_reviews(limit=5)][:2] == ["/inbox/0004.pdf",
+                                                                     "/inbox/0005.pdf"]
+
+
+def test_re_adding_a_review_keeps_counts_right(tmp_path):
+    db = _db(tmp_path, 3)
+    db.add_review("/inbox/0000.pdf", "0000.pdf", "renamed.pdf", status="approved", sync=True)
+    stats = db.get_database_stats()
+    assert (stats["total_files"], stats["pending_reviews"]) == (3, 2)
@@ -0,0 +1,98 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from src.fileflow import transcriber
+from src.fileflow.transcriber import (DummyTranscriber, Transcriber, WhisperTranscriber,
+                                      _transcribe_cached)
+from src.qai import rate_limiter
+
+
+def test_base_transcriber_is_abstract():
+    with pytest.raises(TypeError):
+        Transcriber()
+
+
+def test_dummy_transcriber_is_cached_per_segment(tmp_path):
+    segment = tmp_path / "seg_00000.wav"
+    segment.write_bytes(b"\0" * 64)
+    cache = tmp_path / "cache"
+    cache.mkdir()
+
+    calls = []
+
+    class Counting(DummyTranscriber):
+        def transcribe(self, segment):
+            calls.append(segment)
+            return super().transcribe(segment)
+
+    engine = Counting()
+    first = _transcribe_cached(engine, segment, cache)
+    second = _transcribe_cached(engine, segment, cache)
+    assert first == second == "[seg_00000: 64 bytes]"
+    assert len(calls) == 1
+
+
+
+def test_concurrent_cache_writers_dont_share_a_temp_file(tmp_path):
+    segment = tmp_path / "seg_00000.wav"
+    segment.write_bytes(b"\0" * 64)
+    cache = tmp_path / "cache"
+    cache.mkdir()
+    barrier = threading.Barrier(4)
+
+    class Racing(DummyTranscriber):
+        def transcribe(self, segment):
+            barrier.wait()  # every writer misses the cache, then all write together
+            return super().transcribe(segment)
+
+    engine = Racing()
+    results, errors = [], []
+
+    def run():
+        try:
+            results.append(_transcribe_cached(engine, segment, cache))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert results == ["[seg_00000: 64 bytes]"] * 4
+    assert [p.suffix for p in cache.iterdir()] == [".txt"]
+
+
+def test_whisper_goes_through_the_rate_limiter(tmp_path, monkeypatch):
+    segment = tmp_path / "seg_00000.wav"
+    segment.write_bytes(b"RIFF")
+    limiter = rate_limiter.RateLimiter(daily_cost_cap=0)
+    monkeypatch.setattr(rate_limiter, "_limiter", limiter)
+    monkeypatch.setattr(rate_limiter.time, "sleep", lambda s: None)
+
+    class RateLimitError(Exception):
+        status_code = 429
+
+    attempts = []
+
+    def create(model, file):
+        attempts.append(file.read())
+        if len(attempts) == 1:
+            raise RateLimitError("slow down")
+        return SimpleNamespace(text="hello")
+
+    engine = WhisperTranscriber(api_key="test")
+    engine._client = SimpleNamespace(audio=SimpleNamespace(
+        transcriptions=SimpleNamespace(create=create)))
+    assert engine.transcribe(segment) == "hello"
+    # the file is reopened for the retry, not sent half-read
+    assert attempts == [b"RIFF", b"RIFF"]
+    assert "whisper-1" in limiter._buckets
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        transcriber.get_transcriber("nope")
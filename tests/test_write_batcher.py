@@ -0,0 +1,51 @@
+import sqlite3
+
+import pytest
+
+from src.core.write_batcher import WriteBatcher
+
+
+@pytest.fixture
+def batcher(tmp_path):
+    db = tmp_path / "t.sqlite"
+    with sqlite3.connect(db) as conn:
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+    b = WriteBatcher(str(db), max_rows=50, max_delay_ms=50)
+    yield b
+    b.close()
+
+
+def _rows(batcher):
+    with sqlite3.connect(batcher.db_path) as conn:
+        return conn.execute("SELECT id, v FROM t ORDER BY id").fetchall()
+
+
+def test_rows_are_group_committed(batcher):
+    for i in range(120):
+        batcher.write("INSERT INTO t (id, v) VALUES (?, ?)", (i, str(i)))
+    batcher.flush()
+    assert len(_rows(batcher)) == 120
+    assert batcher.rows == 120
+    assert batcher.batches < 120
+
+
+def test_bad_row_does_not_sink_its_batch(batcher):
+    batcher.write("INSERT INTO t (id, v) VALUES (1, 'a')")
+    batcher.write("INSERT INTO t (id, v) VALUES (1, 'dup')")
+    batcher.write("INSERT INTO t (id, v) VALUES (2, 'b')")
+    batcher.flush()
+    assert _rows(batcher) == [(1, "a"), (2, "b")]
+
+
+def test_sync_write_raises_its_own_error(batcher):
+    batcher.write("INSERT INTO t (id, v) VALUES (1, 'a')", sync=True)
+    with pytest.raises(sqlite3.IntegrityError):
+        batcher.write("INSERT INTO t (id, v) VALUES (1, 'b')", sync=True)
+
+
+def test_close_flushes_and_rejects_new_writes(batcher):
+    batcher.write("INSERT INTO t (id, v) VALUES (3, 'c')")
+    batcher.close()
+    assert _rows(batcher) == [(3, "c")]
+    with pytest.raises(RuntimeError):
+        batcher.write("INSERT INTO t (id, v) VALUES (4, 'd')")